@@ -0,0 +1,166 @@
+# backend/apps/agents/batch.py
+
+import logging
+import time
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, FilteredRelation, Q
+from django.utils import timezone
+
+from apps.transactions.models import TransactionStatus
+from .models import AgentProfile, TRUST_LEVELS, DEFAULT_TRUST_LEVEL
+
+logger = logging.getLogger(__name__)
+
+
+BULK_BATCH_SIZE = 1000
+
+
+class AgentBatchScorer:
+    """
+    Recalcul nocturne des scores de réputation de tous les agents.
+
+    Mêmes règles et mêmes sources que AIScoringEngine.calculate_score
+    (historique : compteurs du profil, voir rebuild_agent_counters ;
+    fenêtres 7j / 30j : transactions), mais :
+    - une seule requête groupée (agents LEFT JOIN transactions récentes,
+      comptages conditionnels) chargée dans un DataFrame,
+    - scores et niveaux de confiance calculés de façon vectorisée,
+    - écriture par bulk_update des seuls agents modifiés.
+    """
+
+    BASE_SCORE = 50
+    MAX_SCORE = 100
+    MIN_SCORE = 0
+
+    def __init__(self, now=None):
+        self.now = now or timezone.now()
+
+    # -----------------------------
+    # EXÉCUTION
+    # -----------------------------
+    def run(self, batch_size=BULK_BATCH_SIZE):
+        started = time.monotonic()
+
+        frame = self.aggregates()
+        if frame.empty:
+            return {"agents": 0, "updated": 0, "seconds": 0.0}
+
+        frame["new_score"] = self.scores(frame)
+        frame["new_trust_level"] = self.trust_levels(frame["new_score"])
+
+        changed = frame[
+            (frame["new_score"] != frame["reputation_score"])
+            | (frame["new_trust_level"] != frame["trust_level"])
+        ]
+
+        profiles = [
+            AgentProfile(
+                pk=row.id,
+                reputation_score=int(row.new_score),
+                trust_level=row.new_trust_level,
+                updated_at=self.now
+            )
+            for row in changed.itertuples(index=False)
+        ]
+
+        with db_transaction.atomic():
+            AgentProfile.objects.bulk_update(
+                profiles,
+                ["reputation_score", "trust_level", "updated_at"],
+                batch_size=batch_size
+            )
+
+        summary = {
+            "agents": len(frame),
+            "updated": len(profiles),
+            "seconds": round(time.monotonic() - started, 3),
+        }
+
+        logger.info("Rescored %(agents)s agents (%(updated)s updated) in %(seconds)ss", summary)
+
+        return summary
+
+    # -----------------------------
+    # AGRÉGATS (UNE REQUÊTE)
+    # -----------------------------
+    def aggregates(self):
+        last_7_days = self.now - timedelta(days=7)
+        last_30_days = self.now - timedelta(days=30)
+
+        # Jointure bornée aux 30 derniers jours (index agent, created_at)
+        rows = AgentProfile.objects.annotate(
+            recent=FilteredRelation(
+                "transaction",
+                condition=Q(transaction__created_at__gte=last_30_days)
+            )
+        ).values(
+            "id",
+            "reputation_score",
+            "trust_level",
+            completed=F("successful_transactions"),
+            failed=F("failed_transactions"),
+            disputed=F("dispute_count"),
+        ).annotate(
+            disputes_30d=Count(
+                "recent",
+                filter=Q(recent__status=TransactionStatus.DISPUTED)
+            ),
+            failures_7d=Count(
+                "recent",
+                filter=Q(
+                    recent__status=TransactionStatus.FAILED,
+                    recent__created_at__gte=last_7_days
+                )
+            ),
+        ).order_by()
+
+        return pd.DataFrame.from_records(
+            rows,
+            columns=[
+                "id",
+                "reputation_score",
+                "trust_level",
+                "completed",
+                "failed",
+                "disputed",
+                "disputes_30d",
+                "failures_7d",
+            ]
+        )
+
+    # -----------------------------
+    # SCORE VECTORISÉ
+    # -----------------------------
+    @classmethod
+    def scores(cls, frame):
+        completed = frame["completed"].to_numpy(dtype=float)
+
+        score = (
+            cls.BASE_SCORE
+            + completed * 0.4
+            + np.minimum(20, completed * 0.1)                               # plafond bonus activité
+            + np.where(frame["disputes_30d"].to_numpy() == 0, 10, 0)        # bonus stabilité
+            - frame["failed"].to_numpy(dtype=float) * 2
+            - frame["disputed"].to_numpy(dtype=float) * 6
+            - np.select(                                                    # échecs récents
+                [frame["failures_7d"].to_numpy() >= 5, frame["failures_7d"].to_numpy() >= 3],
+                [10, 5],
+                default=0
+            )
+        )
+
+        return np.clip(np.trunc(score), cls.MIN_SCORE, cls.MAX_SCORE).astype(int)
+
+    @staticmethod
+    def trust_levels(scores):
+        scores = np.asarray(scores)
+
+        return np.select(
+            [scores >= threshold for threshold, _ in TRUST_LEVELS],
+            [level for _, level in TRUST_LEVELS],
+            default=DEFAULT_TRUST_LEVEL
+        )
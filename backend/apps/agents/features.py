@@ -0,0 +1,188 @@
+# backend/apps/agents/features.py
+
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+
+from apps.transactions.models import Transaction, TransactionStatus
+from apps.transactions.velocity import (
+    VelocityCounter,
+    SCOPE_AGENT,
+    WINDOW_24H,
+    WINDOW_DAY,
+)
+from .models import AgentProfile
+
+
+DEFAULT_TTL = 0             # secondes (0 = pas de mémoire entre évaluations)
+MAX_ENTRIES = 10000
+
+# Statuts détaillés par fenêtre (comptage + volume)
+WINDOW_STATUSES = [
+    TransactionStatus.CONFIRMED,
+    TransactionStatus.FAILED,
+    TransactionStatus.DISPUTED,
+]
+
+
+def resolve_profile(agent):
+    """
+    AgentProfile à partir d'un profil (Transaction.agent) ou de son utilisateur.
+    """
+    if isinstance(agent, AgentProfile):
+        return agent
+
+    return AgentProfile.objects.get(user=agent)
+
+
+class AgentFeatureStore:
+    """
+    Snapshot unique des features d'un agent, partagé par
+    FraudDetectionEngine, AIScoringEngine, AgentScoringEngine et
+    AgentLimitManager.
+
+    - Historique complet : compteurs F() du profil (aucune requête),
+      seule source des comptages à vie, aussi lue par AgentBatchScorer
+      (initialisés par rebuild_agent_counters).
+    - Fenêtres (24h, aujourd'hui, 7j, 30j) : une seule requête
+      Transaction.objects.windowed() sur les transactions de l'agent.
+      Avec les compteurs de vélocité, les volumes viennent de Redis.
+
+    Le partage se fait au sein d'une évaluation : le snapshot est
+    calculé une fois puis passé aux moteurs.
+
+    La mémoire par processus (AGENT_FEATURES_TTL, désactivée par
+    défaut) est indexée par version du profil (updated_at). Les
+    écritures F() et Redis (compteurs, vélocité) ne changent pas
+    updated_at : elle peut donc servir des volumes périmés, et les
+    contrôles de limite et de vélocité lisent sans mémoire (ttl=0).
+    calculate_score sauvegardant le profil à chaque évaluation, elle
+    sert de toute façon rarement d'une requête à l'autre.
+    """
+
+    _lock = threading.Lock()
+    _entries = {}           # (agent pk, updated_at) -> (expires_at, snapshot)
+
+    def __init__(self, ttl=None, counters=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, "AGENT_FEATURES_TTL", DEFAULT_TTL)
+        self.counters = counters or VelocityCounter()
+
+    # ---------------------------
+    # LECTURE
+    # ---------------------------
+    def get(self, agent, now=None):
+        profile = resolve_profile(agent)
+
+        if not self.ttl:
+            return self.compute(profile, now)
+
+        # Toute écriture du profil (score, gel...) change la clé
+        key = (profile.pk, profile.updated_at)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        snapshot = self.compute(profile, now)
+
+        with self._lock:
+            if len(self._entries) >= MAX_ENTRIES:
+                self._prune()
+            self._entries[key] = (time.monotonic() + self.ttl, snapshot)
+
+        return snapshot
+
+    @classmethod
+    def invalidate(cls, agent_id=None):
+        with cls._lock:
+            if agent_id is None:
+                cls._entries.clear()
+            else:
+                for key in [key for key in cls._entries if key[0] == agent_id]:
+                    del cls._entries[key]
+
+    # ---------------------------
+    # CALCUL
+    # ---------------------------
+    def compute(self, profile, now=None):
+        now = now or timezone.now()
+
+        snapshot = {
+            "agent_id": profile.pk,
+            "reputation_score": profile.reputation_score,
+            "trust_level": profile.trust_level,
+            "is_frozen": profile.is_frozen,
+            "is_flagged": profile.is_flagged,
+            "total_volume": profile.total_volume,
+            "total_transactions": profile.total_transactions,
+            "successful_transactions": profile.successful_transactions,
+            "failed_transactions": profile.failed_transactions,
+            "dispute_count": profile.dispute_count,
+        }
+
+        snapshot.update(self._windows(profile.pk, now))
+
+        return snapshot
+
+    # ---------------------------
+    # FENÊTRES (UNE REQUÊTE)
+    # ---------------------------
+    def _windows(self, agent_id, now):
+        last_24h = now - timedelta(hours=24)
+        last_7_days = now - timedelta(days=7)
+        last_30_days = now - timedelta(days=30)
+        start_of_day = timezone.localtime(now).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+        queryset = Transaction.objects.for_agent(agent_id)
+        windows = {
+            "30d": last_30_days,
+            "7d": last_7_days,
+            "24h": last_24h,
+        }
+
+        volumes = None
+        if self.counters.enabled:
+            velocity = self.counters.snapshot(SCOPE_AGENT, agent_id, [WINDOW_24H, WINDOW_DAY], now=now)
+            volumes = {
+                "volume_24h": velocity[WINDOW_24H]["volume"],
+                "volume_today": velocity[WINDOW_DAY]["volume"],
+            }
+        else:
+            windows["today"] = start_of_day
+
+        rows = queryset.windowed(windows, statuses=WINDOW_STATUSES)
+
+        result = {
+            "failed_24h": rows["24h"]["statuses"][TransactionStatus.FAILED]["count"],
+            "failed_7d": rows["7d"]["statuses"][TransactionStatus.FAILED]["count"],
+            "disputes_30d": rows["30d"]["statuses"][TransactionStatus.DISPUTED]["count"],
+            "confirmed_volume_24h": rows["24h"]["statuses"][TransactionStatus.CONFIRMED]["volume"],
+        }
+
+        if volumes is None:
+            volumes = {
+                "volume_24h": rows["24h"]["volume"],
+                "volume_today": rows["today"]["volume"],
+            }
+
+        result.update(volumes)
+
+        return result
+
+    # ---------------------------
+    # HELPERS
+    # ---------------------------
+    @classmethod
+    def _prune(cls):
+        now = time.monotonic()
+        for key in [key for key, (expires_at, _) in cls._entries.items() if expires_at <= now]:
+            del cls._entries[key]
+
+        if len(cls._entries) >= MAX_ENTRIES:
+            cls._entries.clear()
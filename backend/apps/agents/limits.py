@@ -1,12 +1,8 @@
 # backend/apps/agents/limits.py
 
 from decimal import Decimal
-from django.utils import timezone
-from django.db.models import Sum
-from datetime import timedelta
 
-from apps.transactions.models import Transaction
-from .models import AgentProfile
+from .features import AgentFeatureStore, resolve_profile
 
 
 class AgentLimitManager:
@@ -19,9 +15,19 @@ class AgentLimitManager:
     NEW_AGENT_LIMIT = Decimal("50")         # Nouveau agent limité
     HIGH_TRUST_MULTIPLIER = Decimal("3")    # Bonus pour agents fiables
 
-    def __init__(self, agent):
+    def __init__(self, agent, features=None):
+        # agent : AgentProfile ou son utilisateur
+        # features : snapshot AgentFeatureStore partagé (sinon calculé à la demande)
         self.agent = agent
-        self.profile = AgentProfile.objects.get(user=agent)
+        self.profile = resolve_profile(agent)
+        self._features = features
+
+    @property
+    def features(self):
+        if self._features is None:
+            # Volume du jour toujours relu : la mémoire ignore les écritures F()
+            self._features = AgentFeatureStore(ttl=0).get(self.profile)
+        return self._features
 
     # ---------------------------
     # CALCUL LIMITE JOURNALIÈRE
@@ -60,16 +66,7 @@ class AgentLimitManager:
     # TOTAL UTILISÉ AUJOURD’HUI
     # ---------------------------
     def get_today_volume(self):
-        today = timezone.now()
-        start_day = today.replace(hour=0, minute=0, second=0, microsecond=0)
-
-        total = (
-            Transaction.objects
-            .filter(agent=self.agent, created_at__gte=start_day, status="completed")
-            .aggregate(Sum("amount"))["amount__sum"]
-        )
-
-        return total or Decimal("0")
+        return self.features["volume_today"]
 
     # ---------------------------
     # VÉRIFICATION TRANSACTION
@@ -103,8 +100,7 @@ class AgentLimitManager:
         Gèle automatiquement si comportement suspect.
         """
         if self.profile.reputation_score < 20:
-            self.profile.is_frozen = True
-            self.profile.save()
+            self.profile.freeze()
             return True
 
         return False
\ No newline at end of file
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.transactions.counters import rebuild_agent_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild agent success/failure/dispute counters from the transaction table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--agent",
+            type=int,
+            action="append",
+            dest="agents",
+            help="Only rebuild this agent profile id (repeatable)."
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_agent_counters(agent_ids=options["agents"])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters of {rows} agents."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.agents.batch import AgentBatchScorer
+
+
+class Command(BaseCommand):
+    help = "Recompute reputation scores and trust levels of all agents in one batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows per bulk UPDATE (default 1000)."
+        )
+
+    def handle(self, *args, **options):
+        summary = AgentBatchScorer().run(batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescored {summary['agents']} agents "
+            f"({summary['updated']} updated) in {summary['seconds']}s."
+        ))
@@ -6,6 +6,15 @@ from django.utils import timezone
 from decimal import Decimal
 
 
+# Niveaux de confiance selon le score IA (seuil minimal, du plus haut au plus bas)
+TRUST_LEVELS = [
+    (85, "elite"),
+    (70, "trusted"),
+    (50, "standard"),
+]
+DEFAULT_TRUST_LEVEL = "new"
+
+
 class AgentProfile(models.Model):
     """
     Profil agent FubaPay.
@@ -23,6 +32,7 @@ class AgentProfile(models.Model):
     # ---------------------------
     is_active = models.BooleanField(default=True)
     is_frozen = models.BooleanField(default=False)
+    is_flagged = models.BooleanField(default=False)
 
     # ---------------------------
     # SCORING IA
@@ -90,16 +100,12 @@ class AgentProfile(models.Model):
         selon le score IA.
         """
 
-        if self.reputation_score >= 85:
-            self.trust_level = "elite"
-        elif self.reputation_score >= 70:
-            self.trust_level = "trusted"
-        elif self.reputation_score >= 50:
-            self.trust_level = "standard"
-        else:
-            self.trust_level = "new"
+        self.trust_level = next(
+            (level for threshold, level in TRUST_LEVELS if self.reputation_score >= threshold),
+            DEFAULT_TRUST_LEVEL
+        )
 
-        self.save()
+        self.save(update_fields=["reputation_score", "trust_level", "updated_at"])
 
     def increase_score(self, points=1):
         self.reputation_score = min(100, self.reputation_score + points)
@@ -111,11 +117,37 @@ class AgentProfile(models.Model):
 
     def freeze(self):
         self.is_frozen = True
-        self.save()
+        self.save(update_fields=["is_frozen", "updated_at"])
 
     def unfreeze(self):
         self.is_frozen = False
-        self.save()
+        self.save(update_fields=["is_frozen", "updated_at"])
+
+    def flag(self):
+        self.is_flagged = True
+        self.save(update_fields=["is_flagged", "updated_at"])
+
+    # ---------------------------
+    # STATISTIQUES (compteurs F(), sans lecture-modification-écriture)
+    # ---------------------------
+    def record_transaction(self, amount, successful=True):
+        from apps.transactions.counters import ProfileCounters
+
+        if successful:
+            ProfileCounters().add(
+                "agents.AgentProfile",
+                self.pk,
+                total_volume=amount,
+                total_transactions=1,
+                successful_transactions=1
+            )
+        else:
+            ProfileCounters().add(
+                "agents.AgentProfile",
+                self.pk,
+                total_transactions=1,
+                failed_transactions=1
+            )
 
     def success_rate(self):
         if self.total_transactions == 0:
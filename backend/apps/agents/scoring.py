@@ -1,11 +1,9 @@
 # backend/apps/agents/scoring.py
 
 from decimal import Decimal
-from django.utils import timezone
-from datetime import timedelta
 
-from apps.transactions.models import Transaction
-from .models import AgentProfile
+from apps.transactions.models import TransactionStatus
+from .features import AgentFeatureStore, resolve_profile
 
 
 class AgentScoringEngine:
@@ -17,9 +15,18 @@ class AgentScoringEngine:
     MAX_SCORE = 100
     MIN_SCORE = 0
 
-    def __init__(self, agent):
+    def __init__(self, agent, features=None):
+        # agent : AgentProfile ou son utilisateur
+        # features : snapshot AgentFeatureStore partagé (sinon calculé à la demande)
         self.agent = agent
-        self.profile = AgentProfile.objects.get(user=agent)
+        self.profile = resolve_profile(agent)
+        self._features = features
+
+    @property
+    def features(self):
+        if self._features is None:
+            self._features = AgentFeatureStore().get(self.profile)
+        return self._features
 
     # -----------------------------
     # MISE À JOUR APRÈS TRANSACTION
@@ -29,11 +36,11 @@ class AgentScoringEngine:
         Met à jour le score après une transaction.
         """
 
-        if transaction.status == "completed":
+        if transaction.status == TransactionStatus.CONFIRMED:
             self._reward_success(transaction.amount)
-        elif transaction.status == "failed":
+        elif transaction.status == TransactionStatus.FAILED:
             self._penalize_failure()
-        elif transaction.status == "disputed":
+        elif transaction.status == TransactionStatus.DISPUTED:
             self._penalize_dispute()
 
         self.profile.update_trust_level()
@@ -61,8 +68,7 @@ class AgentScoringEngine:
         self._decrease_score(3)
 
     def _penalize_dispute(self):
-        self.profile.dispute_count += 1
-        self.profile.save()
+        # dispute_count est déjà incrémenté par la machine à états (counters.py)
         self._decrease_score(7)
 
     # -----------------------------
@@ -73,16 +79,8 @@ class AgentScoringEngine:
         Vérifie comportement suspect sur 24h.
         """
 
-        now = timezone.now()
-        last_24h = now - timedelta(hours=24)
-
-        transactions = Transaction.objects.filter(
-            agent=self.agent,
-            created_at__gte=last_24h
-        )
-
-        total_volume = sum(t.amount for t in transactions if t.status == "completed")
-        failed_count = transactions.filter(status="failed").count()
+        total_volume = self.features["confirmed_volume_24h"]
+        failed_count = self.features["failed_24h"]
 
         # Volume anormalement élevé
         if total_volume > Decimal("1000"):
@@ -100,14 +98,14 @@ class AgentScoringEngine:
             self.MAX_SCORE,
             self.profile.reputation_score + points
         )
-        self.profile.save()
+        self.profile.save(update_fields=["reputation_score", "updated_at"])
 
     def _decrease_score(self, points):
         self.profile.reputation_score = max(
             self.MIN_SCORE,
             self.profile.reputation_score - points
         )
-        self.profile.save()
+        self.profile.save(update_fields=["reputation_score", "updated_at"])
 
     # -----------------------------
     # SCORE GLOBAL RECALCUL
@@ -118,11 +116,9 @@ class AgentScoringEngine:
         Utile pour audit ou recalibrage IA.
         """
 
-        transactions = Transaction.objects.filter(agent=self.agent)
-
-        completed = transactions.filter(status="completed").count()
-        failed = transactions.filter(status="failed").count()
-        disputed = transactions.filter(status="disputed").count()
+        completed = self.features["successful_transactions"]
+        failed = self.features["failed_transactions"]
+        disputed = self.features["dispute_count"]
 
         score = 50  # Base neutre
 
@@ -133,7 +129,6 @@ class AgentScoringEngine:
         score = max(self.MIN_SCORE, min(self.MAX_SCORE, int(score)))
 
         self.profile.reputation_score = score
-        self.profile.save()
         self.profile.update_trust_level()
 
         return score
\ No newline at end of file
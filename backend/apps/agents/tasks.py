@@ -0,0 +1,16 @@
+# backend/apps/agents/tasks.py
+
+from celery import shared_task
+
+from .batch import AgentBatchScorer
+
+
+# -----------------------------
+# RECALIBRAGE NOCTURNE
+# -----------------------------
+@shared_task
+def rescore_agents():
+    """
+    Recalcule le score de réputation et le niveau de confiance de tous les agents.
+    """
+    return AgentBatchScorer().run()
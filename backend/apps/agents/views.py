@@ -102,7 +102,7 @@ class RecalculateScoreView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        scoring = AgentScoringEngine(profile.user)
+        scoring = AgentScoringEngine(profile)
         new_score = scoring.full_recalculate()
 
         return Response({
@@ -0,0 +1,125 @@
+# backend/apps/ai_engine/breaker.py
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from apps.ai_engine.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+DEFAULT_FAILURE_THRESHOLD = 5       # échecs consécutifs avant ouverture
+DEFAULT_SLOW_CALL_THRESHOLD = 1.5   # secondes : un appel plus lent compte comme un échec
+DEFAULT_RESET_TIMEOUT = 30          # secondes avant un appel d'essai
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur autour d'un fournisseur externe (par processus).
+
+    CLOSED    : les appels passent ; les erreurs et appels trop lents
+                consécutifs sont comptés.
+    OPEN      : après failure_threshold échecs, plus aucun appel
+                pendant reset_timeout secondes (repli immédiat).
+    HALF_OPEN : un seul appel d'essai ; succès → CLOSED, échec → OPEN.
+    """
+
+    def __init__(
+        self,
+        name,
+        failure_threshold=None,
+        slow_call_threshold=None,
+        reset_timeout=None,
+        clock=time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or getattr(
+            settings, "AI_BREAKER_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD
+        )
+        self.slow_call_threshold = slow_call_threshold or getattr(
+            settings, "AI_BREAKER_SLOW_CALL_THRESHOLD", DEFAULT_SLOW_CALL_THRESHOLD
+        )
+        self.reset_timeout = reset_timeout or getattr(
+            settings, "AI_BREAKER_RESET_TIMEOUT", DEFAULT_RESET_TIMEOUT
+        )
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    # ==========================================
+    # ÉTAT
+    # ==========================================
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def reset(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def allow(self):
+        """
+        True si un appel peut être tenté maintenant.
+        """
+        with self._lock:
+            if self._state == OPEN:
+                if self.clock() - self._opened_at < self.reset_timeout:
+                    metrics.incr(f"breaker.{self.name}.rejected")
+                    return False
+
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == HALF_OPEN:
+                if self._trial_in_flight:
+                    metrics.incr(f"breaker.{self.name}.rejected")
+                    return False
+
+                self._trial_in_flight = True
+
+            return True
+
+    # ==========================================
+    # RÉSULTATS
+    # ==========================================
+
+    def record_success(self, duration):
+        if duration >= self.slow_call_threshold:
+            metrics.incr(f"breaker.{self.name}.slow_calls")
+            self.record_failure()
+            return
+
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("Circuit %s opened after %s failures", self.name, self._failures)
+                    metrics.incr(f"breaker.{self.name}.opened")
+
+                self._state = OPEN
+                self._opened_at = self.clock()
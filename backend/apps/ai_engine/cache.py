@@ -0,0 +1,237 @@
+# backend/apps/ai_engine/cache.py
+
+import hashlib
+import json
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+
+from django.conf import settings
+
+from apps.ai_engine.metrics import metrics
+
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+DEFAULT_TTL = 300            # secondes
+DEFAULT_MAX_SIZE = 1024      # entrées
+
+# Bornes des tranches (la dernière tranche est ouverte : "10000+")
+AMOUNT_BUCKETS = [0, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+VOLUME_BUCKETS = [0, 100, 1000, 10000, 100000, 1000000]
+COUNT_BUCKETS = [0, 1, 5, 10, 25, 50, 100, 500, 1000]
+REPUTATION_STEP = 5
+MAX_DISPUTES = 5
+
+# Compteurs par cache : <name>.hits, <name>.misses...
+HITS = "hits"
+MISSES = "misses"
+EVICTIONS = "evictions"
+EXPIRATIONS = "expirations"
+
+
+# ==========================================
+# VECTEUR DE FEATURES CANONIQUE
+# ==========================================
+
+def bucket(value, edges):
+    """
+    Tranche contenant value : "100-250", "10000+".
+    """
+    index = max(bisect_right(edges, value) - 1, 0)
+
+    if index == len(edges) - 1:
+        return f"{edges[-1]}+"
+
+    return f"{edges[index]}-{edges[index + 1]}"
+
+
+def decision_features(payload):
+    """
+    Réduit le payload de _build_payload à un vecteur de features
+    canonique et tranché : deux contextes de risque équivalents
+    donnent exactement le même vecteur (et donc le même prompt).
+    Les champs propres à une transaction (horodatage) sont exclus.
+    """
+    tx = payload["transaction"]
+    agent = payload.get("agent")
+
+    features = {
+        "transaction": {
+            "amount": bucket(tx["amount"], AMOUNT_BUCKETS),
+            "currency": tx["currency"],
+            "status": tx["status"],
+        },
+        "agent": None,
+    }
+
+    if agent:
+        disputes = agent["dispute_count"]
+        features["agent"] = {
+            "reputation_score": agent["reputation_score"] // REPUTATION_STEP * REPUTATION_STEP,
+            "trust_level": agent["trust_level"],
+            "total_volume": bucket(agent["total_volume"], VOLUME_BUCKETS),
+            "total_transactions": bucket(agent["total_transactions"], COUNT_BUCKETS),
+            "dispute_count": disputes if disputes < MAX_DISPUTES else f"{MAX_DISPUTES}+",
+            "is_frozen": agent["is_frozen"],
+        }
+
+    return features
+
+
+# ==========================================
+# CACHE LRU + TTL
+# ==========================================
+
+class DecisionCache:
+    """
+    Cache des décisions IA par vecteur de features (LRU + TTL).
+
+    En mémoire, par processus worker. Les appels concurrents pour une
+    même clé attendent le premier appel (single-flight) : un contexte
+    de risque identique ne paie qu'une fois la latence et le coût LLM
+    dans la fenêtre TTL.
+    """
+
+    def __init__(self, max_size=None, ttl=None, clock=time.monotonic, name="decision_cache"):
+        self.name = name
+        self.max_size = max_size or getattr(settings, "AI_DECISION_CACHE_SIZE", DEFAULT_MAX_SIZE)
+        self.ttl = ttl or getattr(settings, "AI_DECISION_CACHE_TTL", DEFAULT_TTL)
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()       # key -> (expires_at, value)
+        self._inflight = {}                 # key -> Lock
+
+    # ==========================================
+    # LECTURE / CALCUL
+    # ==========================================
+
+    def get_or_compute(self, features, compute, cacheable=None, timeout=None):
+        """
+        Retourne la décision en cache pour ces features,
+        sinon appelle compute() et la met en cache
+        (si cacheable(decision) est vrai).
+
+        timeout borne l'attente d'un calcul concurrent pour la même
+        clé (TimeoutError au-delà).
+        """
+        key = self.key(features)
+
+        value = self._lookup(key)
+        if value is not None:
+            self._incr(HITS)
+            return dict(value)
+
+        with self._lock:
+            flight = self._inflight.setdefault(key, threading.Lock())
+
+        if not flight.acquire(timeout=-1 if timeout is None else max(timeout, 0)):
+            raise TimeoutError("Decision for the same context still in flight")
+
+        try:
+            value = self._lookup(key)
+            if value is not None:
+                self._incr(HITS)
+                return dict(value)
+
+            self._incr(MISSES)
+            value = compute()
+
+            if cacheable is None or cacheable(value):
+                self._store(key, value)
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.release()
+
+        return dict(value)
+
+    def get(self, features):
+        """
+        Décision en cache pour ces features, ou None.
+        """
+        value = self._lookup(self.key(features))
+        self._incr(MISSES if value is None else HITS)
+
+        return None if value is None else dict(value)
+
+    def set(self, features, value):
+        self._store(self.key(features), value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": metrics.get(self._metric(HITS)),
+            "misses": metrics.get(self._metric(MISSES)),
+            "evictions": metrics.get(self._metric(EVICTIONS)),
+            "expirations": metrics.get(self._metric(EXPIRATIONS)),
+            "hit_rate": metrics.ratio(self._metric(HITS), self._metric(MISSES)),
+        }
+
+    # ==========================================
+    # HELPERS
+    # ==========================================
+
+    @staticmethod
+    def key(features):
+        canonical = json.dumps(features, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def _metric(self, event):
+        return f"{self.name}.{event}"
+
+    def _incr(self, event, value=1):
+        # Hors du verrou du cache : un export de métriques relit stats()
+        if value:
+            metrics.incr(self._metric(event), value)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            expired = expires_at <= self.clock()
+
+            if expired:
+                del self._entries[key]
+            else:
+                self._entries.move_to_end(key)
+
+        if expired:
+            self._incr(EXPIRATIONS)
+            return None
+
+        return value
+
+    def _store(self, key, value):
+        evicted = 0
+
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, dict(value))
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                evicted += 1
+
+        self._incr(EVICTIONS, evicted)
+
+
+decision_cache = DecisionCache()
+metrics.register(decision_cache.name, decision_cache.stats)
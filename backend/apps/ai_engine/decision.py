@@ -2,61 +2,170 @@
 
 import os
 import json
+import logging
+import time
 from decimal import Decimal
 
 from django.conf import settings
-from apps.agents.models import AgentProfile
+from apps.ai_engine.breaker import CircuitBreaker
+from apps.ai_engine.cache import decision_cache, decision_features
+from apps.ai_engine.metrics import metrics
+from apps.ai_engine.prompt import (
+    BATCH_SYSTEM_PROMPT,
+    DEFAULT_MODEL,
+    MAX_COMPLETION_TOKENS,
+    MAX_COMPLETION_TOKENS_PER_ITEM,
+    SYSTEM_PROMPT,
+    TOKEN_BUCKETS,
+    TokenCounter,
+    build_messages,
+    compact,
+    cost_usd,
+)
 from apps.transactions.models import Transaction
 
-from openai import OpenAI
+from openai import APITimeoutError, OpenAI, OpenAIError
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TIMEOUT = 2.0       # secondes
+
+openai_breaker = CircuitBreaker("openai")
+
+
+class AIUnavailable(Exception):
+    """
+    Le fournisseur LLM n'a pas répondu dans le budget
+    (erreur, timeout ou disjoncteur ouvert).
+    """
 
 
 class AIDecisionEngine:
     """
     Moteur de décision IA FubaPay basé sur ChatGPT.
+
+    Les décisions sont mises en cache par vecteur de features tranché
+    (voir ai_engine.cache) : un contexte de risque identique dans la
+    fenêtre TTL ne déclenche pas un second appel LLM.
+
+    Chaque appel est borné par un timeout (sans retry) et protégé par
+    un disjoncteur : en cas d'échec, AIUnavailable est levée et
+    l'appelant se replie sur les moteurs locaux.
+
+    Le prompt est compacté (voir ai_engine.prompt) et chaque appel
+    exporte latence, tokens et coût dans les métriques ai.llm.* /
+    ai.tokens.* / ai.cost.*.
     """
 
-    def __init__(self):
+    def __init__(self, cache=None, breaker=None, timeout=None):
+        self.timeout = timeout or getattr(settings, "AI_DECISION_TIMEOUT", DEFAULT_TIMEOUT)
         self.client = OpenAI(
-            api_key=settings.OPENAI_API_KEY
+            api_key=settings.OPENAI_API_KEY,
+            base_url=getattr(settings, "OPENAI_BASE_URL", None) or None,
+            timeout=self.timeout,
+            max_retries=0
         )
+        self.cache = cache or decision_cache
+        self.breaker = breaker or openai_breaker
+        self.model = getattr(settings, "AI_LLM_MODEL", DEFAULT_MODEL)
+        self.tokens = None          # TokenCounter, créé au premier appel sans usage
 
     # ==========================================
     # DÉCISION PRINCIPALE
     # ==========================================
 
-    def evaluate_transaction(self, transaction: Transaction):
+    def evaluate_transaction(self, transaction: Transaction, timeout=None):
         """
         Analyse une transaction et retourne :
         APPROVE / REVIEW / BLOCK
+
+        timeout : budget restant en secondes (par défaut AI_DECISION_TIMEOUT).
+        Lève AIUnavailable si aucune décision n'est obtenue dans ce budget.
         """
 
-        agent_profile = AgentProfile.objects.get(user=transaction.agent)
-
-        payload = self._build_payload(transaction, agent_profile)
-
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a financial fraud detection AI for a crypto fintech "
-                        "called FubaPay operating in Africa. "
-                        "Return ONLY valid JSON in this format: "
-                        '{"decision": "APPROVE|REVIEW|BLOCK", "risk_score": 0-100, "reason": "short explanation"}'
-                    )
-                },
-                {
-                    "role": "user",
-                    "content": json.dumps(payload)
-                }
-            ],
-            temperature=0.2
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        deadline = time.monotonic() + timeout
+
+        features = decision_features(
+            self._build_payload(transaction, transaction.agent)
         )
 
         try:
-            decision_data = json.loads(response.choices[0].message.content)
+            return self.cache.get_or_compute(
+                features,
+                lambda: self._ask_model(features, deadline - time.monotonic()),
+                cacheable=self._is_cacheable,
+                timeout=timeout
+            )
+        except TimeoutError:
+            metrics.incr("ai.timeouts")
+            raise AIUnavailable("Deadline exceeded waiting for a concurrent decision")
+
+    def evaluate_batch(self, transactions, timeout=None):
+        """
+        Évalue plusieurs transactions en un seul appel LLM
+        (prompt multi-items, réponse démultiplexée et validée par item).
+
+        Les contextes déjà en cache ne sont pas envoyés, et les contextes
+        identiques du lot ne sont envoyés qu'une fois.
+        Retourne {transaction.pk: décision} ; les transactions absentes
+        n'ont pas reçu de réponse valide.
+        """
+
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        deadline = time.monotonic() + timeout
+
+        decisions = {}
+        pending = {}                # clé cache -> (features, [transactions])
+
+        for transaction in transactions:
+            features = decision_features(
+                self._build_payload(transaction, transaction.agent)
+            )
+
+            cached = self.cache.get(features)
+            if cached is not None:
+                decisions[transaction.pk] = cached
+                continue
+
+            pending.setdefault(self.cache.key(features), (features, []))[1].append(transaction)
+
+        if not pending:
+            return decisions
+
+        groups = list(pending.values())
+        results = self._ask_model_batch(
+            [features for features, _ in groups],
+            deadline - time.monotonic()
+        )
+
+        for index, (features, group) in enumerate(groups):
+            decision = results.get(index)
+            if decision is None:
+                continue
+
+            self.cache.set(features, decision)
+            for transaction in group:
+                decisions[transaction.pk] = dict(decision)
+
+        return decisions
+
+    # ==========================================
+    # APPEL LLM
+    # ==========================================
+
+    def _ask_model(self, features, timeout):
+
+        content = self._call(
+            SYSTEM_PROMPT,
+            compact(features),
+            timeout,
+            max_tokens=MAX_COMPLETION_TOKENS
+        )
+
+        try:
+            decision_data = json.loads(content)
         except Exception:
             return {
                 "decision": "REVIEW",
@@ -66,25 +175,157 @@ class AIDecisionEngine:
 
         return decision_data
 
+    def _ask_model_batch(self, items, timeout):
+        """
+        items : liste de vecteurs de features.
+        Retourne {index: décision} pour les réponses valides uniquement.
+        """
+
+        content = self._call(
+            BATCH_SYSTEM_PROMPT,
+            [{"id": index, **compact(features)} for index, features in enumerate(items)],
+            timeout,
+            response_format={"type": "json_object"},
+            max_tokens=MAX_COMPLETION_TOKENS_PER_ITEM * len(items)
+        )
+
+        try:
+            results = json.loads(content)["results"]
+        except Exception:
+            metrics.incr("ai.batch.parse_errors")
+            return {}
+
+        decisions = {}
+
+        for result in results if isinstance(results, list) else []:
+            if not isinstance(result, dict):
+                continue
+
+            decision = dict(result)
+            index = decision.pop("id", None)
+
+            if (
+                isinstance(index, int)
+                and 0 <= index < len(items)
+                and index not in decisions
+                and self._is_cacheable(decision)
+            ):
+                decisions[index] = decision
+
+        metrics.incr("ai.batch.calls")
+        metrics.incr("ai.batch.items", len(items))
+        metrics.incr("ai.batch.invalid_items", len(items) - len(decisions))
+
+        return decisions
+
+    def _call(self, system_prompt, content, timeout, **options):
+        """
+        Appel LLM borné (timeout, disjoncteur) ; retourne le texte de la réponse.
+        """
+
+        if timeout <= 0:
+            metrics.incr("ai.timeouts")
+            raise AIUnavailable("Deadline exceeded")
+
+        if not self.breaker.allow():
+            raise AIUnavailable("Circuit open")
+
+        messages = build_messages(system_prompt, content)
+        started = time.monotonic()
+
+        try:
+            response = self._complete(messages, timeout, **options)
+        except OpenAIError as e:
+            self.breaker.record_failure()
+            metrics.incr("ai.timeouts" if isinstance(e, APITimeoutError) else "ai.errors")
+            logger.warning("AI decision call failed: %s", e)
+            raise AIUnavailable(str(e)) from e
+        except Exception as e:
+            # Toute autre erreur libère aussi l'appel d'essai (HALF_OPEN)
+            self.breaker.record_failure()
+            metrics.incr("ai.errors")
+            logger.exception("AI decision call crashed")
+            raise AIUnavailable(str(e)) from e
+
+        elapsed = time.monotonic() - started
+        self.breaker.record_success(elapsed)
+
+        text = response.choices[0].message.content
+        self._record_usage(response, messages, text, elapsed)
+
+        return text
+
+    def _complete(self, messages, timeout, **options):
+
+        return self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=0.2,
+            timeout=timeout,
+            **options
+        )
+
+    def _record_usage(self, response, messages, text, elapsed):
+        """
+        Latence, tokens et coût d'un appel. Les tokens viennent de
+        response.usage, sinon du comptage tiktoken local.
+        """
+
+        usage = getattr(response, "usage", None)
+
+        if usage is not None:
+            prompt_tokens = usage.prompt_tokens
+            completion_tokens = usage.completion_tokens
+        else:
+            if self.tokens is None:
+                self.tokens = TokenCounter(self.model)
+
+            prompt_tokens = self.tokens.count_messages(messages)
+            completion_tokens = self.tokens.count(text or "")
+            metrics.incr("ai.tokens.estimated_calls")
+
+        metrics.incr("ai.llm.calls")
+        metrics.observe("ai.llm.latency_ms", elapsed * 1000)
+        metrics.observe("ai.tokens.prompt_per_call", prompt_tokens, TOKEN_BUCKETS)
+        metrics.incr("ai.tokens.prompt", prompt_tokens)
+        metrics.incr("ai.tokens.completion", completion_tokens)
+        metrics.incr("ai.cost.micro_usd", round(cost_usd(prompt_tokens, completion_tokens) * 1_000_000))
+
+    @staticmethod
+    def _is_cacheable(decision):
+        # Seules les réponses valides du modèle sont mises en cache
+        return (
+            isinstance(decision, dict)
+            and decision.get("decision") in ("APPROVE", "REVIEW", "BLOCK")
+            and decision.get("reason") != "AI parsing error"
+        )
+
     # ==========================================
     # PAYLOAD POUR IA
     # ==========================================
 
     def _build_payload(self, transaction, agent_profile):
 
-        return {
+        payload = {
             "transaction": {
                 "amount": float(transaction.amount),
                 "currency": transaction.currency,
                 "status": transaction.status,
                 "created_at": str(transaction.created_at)
             },
-            "agent": {
-                "reputation_score": agent_profile.reputation_score,
-                "trust_level": agent_profile.trust_level,
-                "total_volume": float(agent_profile.total_volume),
-                "total_transactions": agent_profile.total_transactions,
-                "dispute_count": agent_profile.dispute_count,
-                "is_frozen": agent_profile.is_frozen
-            }
-        }
\ No newline at end of file
+            "agent": None
+        }
+
+        if agent_profile is None:
+            return payload
+
+        payload["agent"] = {
+            "reputation_score": agent_profile.reputation_score,
+            "trust_level": agent_profile.trust_level,
+            "total_volume": float(agent_profile.total_volume),
+            "total_transactions": agent_profile.total_transactions,
+            "dispute_count": agent_profile.dispute_count,
+            "is_frozen": agent_profile.is_frozen
+        }
+
+        return payload
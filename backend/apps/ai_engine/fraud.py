@@ -1,11 +1,8 @@
 # backend/apps/ai_engine/fraud.py
 
 from decimal import Decimal
-from django.utils import timezone
-from datetime import timedelta
 
-from apps.agents.models import AgentProfile
-from apps.transactions.models import Transaction
+from apps.agents.features import AgentFeatureStore, resolve_profile
 
 
 class FraudDetectionEngine:
@@ -17,9 +14,19 @@ class FraudDetectionEngine:
     HIGH_RISK_THRESHOLD = 70
     MEDIUM_RISK_THRESHOLD = 40
 
-    def __init__(self, agent):
-        self.agent = agent
-        self.profile = AgentProfile.objects.get(user=agent)
+    def __init__(self, agent, features=None):
+        # agent : AgentProfile (Transaction.agent) ou son utilisateur
+        # features : snapshot AgentFeatureStore partagé (sinon calculé à la demande)
+        self.profile = resolve_profile(agent)
+        self.agent = self.profile
+        self._features = features
+
+    @property
+    def features(self):
+        if self._features is None:
+            # Contrôles de vélocité : volumes relus, jamais mémorisés
+            self._features = AgentFeatureStore(ttl=0).get(self.profile)
+        return self._features
 
     # ==================================================
     # ANALYSE GLOBALE
@@ -95,25 +102,7 @@ class FraudDetectionEngine:
     # ==================================================
 
     def _get_volume_last_24h(self):
-        now = timezone.now()
-        last_24h = now - timedelta(hours=24)
-
-        transactions = Transaction.objects.filter(
-            agent=self.agent,
-            status="completed",
-            created_at__gte=last_24h
-        )
-
-        total = sum(t.amount for t in transactions)
-
-        return total or Decimal("0")
+        return self.features["volume_24h"]
 
     def _failed_last_24h(self):
-        now = timezone.now()
-        last_24h = now - timedelta(hours=24)
-
-        return Transaction.objects.filter(
-            agent=self.agent,
-            status="failed",
-            created_at__gte=last_24h
-        ).count()
\ No newline at end of file
+        return self.features["failed_24h"]
@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ai_engine.shadow import ENGINES, REPLAY_CHUNK_SIZE, ShadowReplay, get_engine
+
+
+class Command(BaseCommand):
+    help = "Replay candidate risk engines over historical transactions and report latency and decision disagreement."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--engine",
+            action="append",
+            dest="engines",
+            required=True,
+            help=f"Engine to replay: {', '.join(ENGINES)} or a dotted path (repeatable)."
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help="History window in days (default 7)."
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Only replay the oldest N transactions of the window."
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Worker processes, defaults to the CPU count (1 = inline)."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=REPLAY_CHUNK_SIZE,
+            help=f"Transactions per worker task (default {REPLAY_CHUNK_SIZE})."
+        )
+        parser.add_argument(
+            "--no-record",
+            action="store_true",
+            help="Do not store ShadowEvaluation rows, only print the summary."
+        )
+
+    def handle(self, *args, **options):
+        for name in options["engines"]:
+            try:
+                get_engine(name)
+            except ImportError:
+                raise CommandError(f"Unknown engine: {name}")
+
+        summary = ShadowReplay(
+            options["engines"],
+            days=options["days"],
+            limit=options["limit"],
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            record=not options["no_record"],
+        ).run()
+
+        self.stdout.write(json.dumps(summary, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {summary['transactions']} transactions in {summary['seconds']}s"
+        ))
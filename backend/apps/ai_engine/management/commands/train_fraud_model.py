@@ -0,0 +1,42 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ai_engine.model import FraudModelTrainer
+
+
+class Command(BaseCommand):
+    help = "Train the local fraud model on historical transactions and save a versioned artifact."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=180,
+            help="History window in days (default 180)."
+        )
+        parser.add_argument(
+            "--min-samples",
+            type=int,
+            default=100,
+            help="Minimum number of labeled transactions (default 100)."
+        )
+        parser.add_argument(
+            "--output",
+            help="Artifact directory, defaults to AI_MODEL_DIR."
+        )
+
+    def handle(self, *args, **options):
+        trainer = FraudModelTrainer(days=options["days"], min_samples=options["min_samples"])
+
+        try:
+            artifact = trainer.train()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        path = trainer.save(artifact, options["output"])
+
+        self.stdout.write(json.dumps(artifact["metrics"], indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved fraud model {artifact['version']} to {path}"
+        ))
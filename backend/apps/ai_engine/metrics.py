@@ -0,0 +1,197 @@
+# backend/apps/ai_engine/metrics.py
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+logger = logging.getLogger("fubapay.ai.metrics")
+
+
+# Bornes supérieures des buckets d'histogramme (latences en millisecondes)
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+DEFAULT_EXPORT_INTERVAL = 60        # secondes entre deux lignes ai.metrics (0 = jamais)
+
+
+class Histogram:
+    """
+    Histogramme à buckets fixes (cumul, nombre, somme).
+    """
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)     # dernier bucket = +inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """
+        Borne supérieure du bucket contenant le quantile q (0-1).
+        """
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return float(self.bounds[index]) if index < len(self.bounds) else float("inf")
+
+        return float("inf")
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": dict(zip([*map(str, self.bounds), "+inf"], self.counts)),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """
+    Compteurs et histogrammes en mémoire du moteur IA (par processus).
+    Thread-safe, lisibles via snapshot() / histograms().
+
+    Export : au plus une fois par AI_METRICS_EXPORT_INTERVAL, la première
+    écriture qui suit l'intervalle émet une ligne de log JSON
+    (logger fubapay.ai.metrics) avec les compteurs et histogrammes
+    cumulés du processus et les sources enregistrées (stats des caches).
+    Chaque processus web ou worker exporte ses propres valeurs, avec son pid.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._histograms = {}
+        self._sources = {}
+        self._exported_at = clock()
+
+    # ==========================================
+    # ÉCRITURE
+    # ==========================================
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+        self._maybe_export()
+
+    def observe(self, name, value, bounds=LATENCY_BUCKETS_MS):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(bounds)
+            histogram.observe(value)
+
+        self._maybe_export()
+
+    def register(self, name, source):
+        """
+        source : callable -> dict ajouté à chaque export sous name
+        (ex. DecisionCache.stats).
+        """
+        with self._lock:
+            self._sources[name] = source
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    # ==========================================
+    # LECTURE
+    # ==========================================
+
+    def get(self, name):
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def ratio(self, hits, misses):
+        """
+        Ratio hits / (hits + misses), 0.0 si aucun appel.
+        """
+        with self._lock:
+            hit_count = self._counters.get(hits, 0)
+            total = hit_count + self._counters.get(misses, 0)
+
+        return hit_count / total if total else 0.0
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def histogram(self, name):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            return histogram.to_dict() if histogram else None
+
+    def histograms(self):
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in self._histograms.items()}
+
+    # ==========================================
+    # EXPORT
+    # ==========================================
+
+    def export(self):
+        """
+        Émet la ligne de log ai.metrics et retourne son contenu.
+        Histogrammes sans quantiles : buckets, nombre et somme
+        s'additionnent entre processus.
+        """
+        with self._lock:
+            self._exported_at = self.clock()
+            sources = dict(self._sources)
+            record = {
+                "event": "ai.metrics",
+                "pid": os.getpid(),
+                "counters": dict(self._counters),
+                "histograms": {
+                    name: {
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": dict(zip([*map(str, histogram.bounds), "+inf"], histogram.counts)),
+                    }
+                    for name, histogram in self._histograms.items()
+                },
+            }
+
+        record["sources"] = {name: source() for name, source in sources.items()}
+
+        logger.info(json.dumps(record, default=str), extra={"event": record})
+
+        return record
+
+    def _maybe_export(self):
+        interval = getattr(settings, "AI_METRICS_EXPORT_INTERVAL", DEFAULT_EXPORT_INTERVAL)
+
+        if not interval or self.clock() - self._exported_at < interval:
+            return
+
+        # Un seul thread exporte par intervalle
+        with self._lock:
+            if self.clock() - self._exported_at < interval:
+                return
+            self._exported_at = self.clock()
+
+        self.export()
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,444 @@
+# backend/apps/ai_engine/model.py
+
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.transactions.models import Transaction, TransactionStatus
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+# Ordre des colonnes du modèle (voir point_in_time_features)
+FEATURES = [
+    "log_amount",
+    "log_daily_volume",
+    "hourly_count",
+    "account_age_days",
+    "agent_log_transactions",
+    "agent_failure_rate",
+    "agent_dispute_count",
+]
+
+# Colonnes de l'historique lu par point_in_time_features
+HISTORY_COLUMNS = ["sender_id", "agent_id", "amount", "status", "created_at", "date_joined"]
+
+# Version des définitions : un artefact d'une autre version est ignoré
+FEATURE_SET = 2
+
+AGENT_WINDOW = timedelta(days=30)           # historique agent pris en compte
+AGENT_OUTCOME_DELAY = timedelta(hours=24)   # issues plus récentes pas encore connues
+
+FRAUD_STATUSES = [TransactionStatus.DISPUTED, TransactionStatus.REJECTED]
+LEGIT_STATUSES = [TransactionStatus.CONFIRMED]
+
+ARTIFACT_PREFIX = "fraud_model_"
+ARTIFACT_SUFFIX = ".joblib"
+
+MAX_ACCOUNT_AGE_DAYS = 365
+
+DEFAULT_RELOAD_INTERVAL = 60        # secondes entre deux résolutions de l'artefact
+
+
+# ==========================================
+# FEATURES
+# ==========================================
+
+def point_in_time_features(history):
+    """
+    FEATURES de chaque transaction de history à son instant (created_at),
+    à partir des seules transactions antérieures. Seule définition des
+    features : l'entraînement l'applique à tout l'historique, l'inférence
+    à une transaction et à son historique récent (transaction_features).
+
+    history : DataFrame (HISTORY_COLUMNS). Retourne une copie triée par
+    created_at (index d'origine conservé) avec les colonnes FEATURES.
+
+    Les statuts des transactions antérieures ne sont pas datés : lus à
+    l'entraînement, ce sont les statuts finaux. Les features n'utilisent
+    donc que ce qui est déjà connu à l'instant de la transaction :
+    - émetteur : montants et nombre de transactions, quel que soit le statut ;
+    - agent : issues (aboutie / échouée / contestée) des transactions de la
+      fenêtre AGENT_WINDOW créées plus de AGENT_OUTCOME_DELAY auparavant.
+    """
+    frame = history.sort_values("created_at", kind="stable")
+    frame["amount"] = frame["amount"].astype(float)
+
+    created_at = pd.to_datetime(frame["created_at"], utc=True)
+    date_joined = pd.to_datetime(frame["date_joined"], utc=True)
+    local_day = created_at.dt.tz_convert(str(timezone.get_current_timezone())).dt.normalize()
+
+    times = created_at.dt.tz_convert(None).to_numpy()
+    day_start = local_day.dt.tz_convert(None).to_numpy()
+    ones = np.ones(len(frame))
+
+    # Émetteur : volume tenté du jour et nombre sur 1h
+    senders = frame["sender_id"].to_numpy()
+    daily_volume = _window_sums(times, senders, frame["amount"].to_numpy(), day_start, times)
+    hourly_count = _window_sums(times, senders, ones, times - np.timedelta64(1, "h"), times)
+
+    # Agent : issues connues sur la fenêtre
+    agents = frame["agent_id"].to_numpy()
+    since = times - np.timedelta64(AGENT_WINDOW)
+    until = times - np.timedelta64(AGENT_OUTCOME_DELAY)
+    status = frame["status"]
+
+    finished = status.isin([TransactionStatus.CONFIRMED, TransactionStatus.FAILED]).to_numpy(dtype=float)
+    failed = (status == TransactionStatus.FAILED).to_numpy(dtype=float)
+    disputed = (status == TransactionStatus.DISPUTED).to_numpy(dtype=float)
+
+    agent_transactions = _window_sums(times, agents, finished, since, until)
+    agent_failed = _window_sums(times, agents, failed, since, until)
+    agent_disputes = _window_sums(times, agents, disputed, since, until)
+
+    account_age = (created_at - date_joined).dt.days.clip(lower=0, upper=MAX_ACCOUNT_AGE_DAYS)
+
+    frame["created_at"] = created_at
+    frame["log_amount"] = np.log1p(frame["amount"])
+    frame["log_daily_volume"] = np.log1p(daily_volume)
+    frame["hourly_count"] = hourly_count
+    frame["account_age_days"] = account_age.astype(float)
+    frame["agent_log_transactions"] = np.log1p(agent_transactions)
+    frame["agent_failure_rate"] = np.divide(
+        agent_failed,
+        agent_transactions,
+        out=np.zeros(len(frame)),
+        where=agent_transactions > 0
+    )
+    frame["agent_dispute_count"] = agent_disputes
+
+    return frame
+
+
+def transaction_features(transaction, now=None):
+    """
+    Vecteur FEATURES d'une transaction, à son created_at (maintenant si
+    elle n'est pas encore enregistrée) : point_in_time_features sur la
+    transaction et son historique récent, lu en une requête.
+    """
+    at = transaction.created_at or now or timezone.now()
+    start_of_day = timezone.localtime(at).replace(hour=0, minute=0, second=0, microsecond=0)
+
+    recent = Q(
+        sender_id=transaction.sender_id,
+        created_at__gte=min(start_of_day, at - timedelta(hours=1))
+    )
+
+    if transaction.agent_id:
+        recent |= Q(
+            agent_id=transaction.agent_id,
+            created_at__gte=at - AGENT_WINDOW,
+            created_at__lt=at - AGENT_OUTCOME_DELAY
+        )
+
+    rows = (
+        Transaction.objects
+        .filter(recent, created_at__lt=at)
+        .exclude(pk=transaction.pk)
+        .values(*HISTORY_COLUMNS[:-1])
+    )
+
+    target = {
+        "sender_id": transaction.sender_id,
+        "agent_id": transaction.agent_id,
+        "amount": transaction.amount,
+        "status": transaction.status,
+        "created_at": at,
+        "date_joined": transaction.sender.date_joined,
+    }
+
+    frame = point_in_time_features(
+        pd.DataFrame.from_records([target, *rows], columns=HISTORY_COLUMNS)
+    )
+
+    return frame.loc[0, FEATURES].astype(float).tolist()
+
+
+def _window_sums(times, keys, values, lower, upper):
+    """
+    Pour chaque ligne : somme de values sur les lignes de même clé créées
+    dans [lower, upper). times est trié ; une clé nulle donne 0.
+    """
+    sums = np.zeros(len(times))
+    groups = pd.DataFrame({"key": keys}).groupby("key", sort=False).indices
+
+    for positions in groups.values():
+        group_times = times[positions]
+        cumulative = np.concatenate([[0.0], np.cumsum(values[positions])])
+
+        sums[positions] = (
+            cumulative[np.searchsorted(group_times, upper[positions], side="left")]
+            - cumulative[np.searchsorted(group_times, lower[positions], side="left")]
+        )
+
+    return sums
+
+
+# ==========================================
+# INFÉRENCE
+# ==========================================
+
+class FraudModel:
+    """
+    Modèle local de probabilité de fraude (régression logistique).
+
+    La normalisation est repliée dans les poids au chargement :
+    une prédiction est un produit scalaire + sigmoïde en Python pur,
+    soit quelques microsecondes, sans numpy ni scikit-learn.
+    """
+
+    # Modèle courant du processus : ((répertoire, version), modèle, résolu à)
+    _current = None
+    _lock = threading.Lock()
+
+    def __init__(self, artifact, path=None):
+        self.path = path
+        self.version = artifact["version"]
+        self.features = artifact["features"]
+        self.metrics = artifact.get("metrics", {})
+
+        self.weights = [
+            coef / scale
+            for coef, scale in zip(artifact["coef"], artifact["scale"])
+        ]
+        self.bias = artifact["intercept"] - sum(
+            weight * mean
+            for weight, mean in zip(self.weights, artifact["mean"])
+        )
+
+    # ==========================================
+    # CHARGEMENT
+    # ==========================================
+
+    @classmethod
+    def current(cls, directory=None):
+        """
+        Dernière version entraînée (ou AI_MODEL_VERSION), None si aucune.
+
+        L'artefact n'est résolu (glob du répertoire) qu'une fois toutes les
+        AI_MODEL_RELOAD_INTERVAL secondes, et seul le modèle courant reste
+        en mémoire. reload() force une nouvelle résolution.
+        """
+        key = (str(directory or settings.AI_MODEL_DIR), getattr(settings, "AI_MODEL_VERSION", None))
+
+        current = cls._current
+        if cls._is_fresh(current, key):
+            return current[1]
+
+        with cls._lock:
+            current = cls._current
+            if cls._is_fresh(current, key):
+                return current[1]
+
+            previous = current[1] if current is not None and current[0] == key else None
+            model = cls._load(cls.artifact_path(directory), previous)
+
+            cls._current = (key, model, time.monotonic())
+
+            return model
+
+    @classmethod
+    def reload(cls):
+        """
+        Oublie le modèle courant : le prochain current() relit le répertoire.
+        """
+        with cls._lock:
+            cls._current = None
+
+    @staticmethod
+    def _is_fresh(current, key):
+        interval = getattr(settings, "AI_MODEL_RELOAD_INTERVAL", DEFAULT_RELOAD_INTERVAL)
+
+        return (
+            current is not None
+            and current[0] == key
+            and time.monotonic() - current[2] < interval
+        )
+
+    @classmethod
+    def _load(cls, path, previous=None):
+        if path is None:
+            return None
+
+        # Même artefact qu'avant : pas de rechargement
+        if previous is not None and previous.path == path:
+            return previous
+
+        artifact = joblib.load(path)
+
+        if artifact["features"] != FEATURES or artifact.get("feature_set") != FEATURE_SET:
+            logger.error("Fraud model %s has incompatible features, ignored", path.name)
+            return None
+
+        logger.info("Loaded fraud model %s", artifact["version"])
+
+        return cls(artifact, path)
+
+    @staticmethod
+    def artifact_path(directory=None, version=None):
+        directory = Path(directory or settings.AI_MODEL_DIR)
+        version = version or getattr(settings, "AI_MODEL_VERSION", None)
+
+        if version:
+            path = directory / f"{ARTIFACT_PREFIX}{version}{ARTIFACT_SUFFIX}"
+            return path if path.exists() else None
+
+        artifacts = sorted(directory.glob(f"{ARTIFACT_PREFIX}*{ARTIFACT_SUFFIX}"))
+
+        return artifacts[-1] if artifacts else None
+
+    # ==========================================
+    # PRÉDICTION
+    # ==========================================
+
+    def predict(self, vector):
+        """
+        Probabilité de fraude (0-1) pour un vecteur de FEATURES.
+        """
+        z = self.bias
+        for weight, value in zip(self.weights, vector):
+            z += weight * value
+
+        if z < -35:
+            return 0.0
+
+        return 1.0 / (1.0 + math.exp(-z))
+
+
+# ==========================================
+# ENTRAÎNEMENT
+# ==========================================
+
+class FraudModelTrainer:
+    """
+    Entraîne le modèle sur l'historique des transactions.
+
+    Les features viennent de point_in_time_features (même fonction qu'à
+    l'inférence), en une requête + calculs pandas vectorisés.
+    Étiquettes : DISPUTED / REJECTED = fraude, CONFIRMED = légitime.
+
+    Le modèle est ajusté sur les transactions les plus anciennes puis
+    calibré (sigmoïde, CalibratedClassifierCV) sur les plus récentes :
+    les seuils AI_MODEL_APPROVE_THRESHOLD / AI_MODEL_BLOCK_THRESHOLD
+    s'appliquent à des probabilités, malgré class_weight="balanced".
+    """
+
+    HOLDOUT = 0.2       # dernières transactions, gardées pour la calibration
+
+    def __init__(self, days=180, min_samples=100):
+        self.days = days
+        self.min_samples = min_samples
+
+    def train(self):
+        # scikit-learn n'est nécessaire qu'à l'entraînement
+        from sklearn.calibration import CalibratedClassifierCV
+        from sklearn.metrics import brier_score_loss, roc_auc_score
+
+        since = timezone.now() - timedelta(days=self.days)
+
+        # Historique agent des premières transactions : AGENT_WINDOW en plus
+        frame = point_in_time_features(self._history(since - AGENT_WINDOW))
+        labeled = frame[
+            (frame["created_at"] >= since)
+            & frame["status"].isin(FRAUD_STATUSES + LEGIT_STATUSES)
+        ]
+
+        if len(labeled) < self.min_samples:
+            raise ValueError(
+                f"Not enough labeled transactions to train ({len(labeled)} < {self.min_samples})"
+            )
+
+        X = labeled[FEATURES].to_numpy(dtype=float)
+        y = labeled["status"].isin(FRAUD_STATUSES).to_numpy(dtype=int)
+
+        if len(set(y)) < 2:
+            raise ValueError("Training data needs both fraudulent and legitimate transactions")
+
+        # Ajustement / calibration en ordre chronologique
+        split = int(len(X) * (1 - self.HOLDOUT))
+        if not 0 < split < len(X) or len(set(y[:split])) < 2 or len(set(y[split:])) < 2:
+            raise ValueError(
+                "Training and calibration sets both need fraudulent and legitimate transactions"
+            )
+
+        scaler, model = self._fit(X[:split], y[:split])
+        holdout = scaler.transform(X[split:])
+
+        calibrated = CalibratedClassifierCV(model, method="sigmoid", cv="prefit")
+        calibrated.fit(holdout, y[split:])
+        probabilities = calibrated.predict_proba(holdout)[:, 1]
+
+        # p = 1 / (1 + exp(a·z + b)) : repliée dans les poids linéaires
+        sigmoid = calibrated.calibrated_classifiers_[0].calibrators[0]
+        slope, offset = -sigmoid.a_, -sigmoid.b_
+
+        return {
+            "version": timezone.now().strftime("%Y%m%d%H%M%S"),
+            "trained_at": timezone.now().isoformat(),
+            "features": FEATURES,
+            "feature_set": FEATURE_SET,
+            "mean": scaler.mean_.tolist(),
+            "scale": scaler.scale_.tolist(),
+            "coef": (slope * model.coef_[0]).tolist(),
+            "intercept": float(slope * model.intercept_[0] + offset),
+            "metrics": {
+                "samples": int(len(y)),
+                "positives": int(y.sum()),
+                "calibration_samples": int(len(y) - split),
+                "holdout_auc": float(roc_auc_score(y[split:], probabilities)),
+                "holdout_brier": float(brier_score_loss(y[split:], probabilities)),
+            },
+        }
+
+    @staticmethod
+    def save(artifact, directory=None):
+        directory = Path(directory or settings.AI_MODEL_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        path = directory / f"{ARTIFACT_PREFIX}{artifact['version']}{ARTIFACT_SUFFIX}"
+        joblib.dump(artifact, path)
+
+        # Nouvelle version visible tout de suite dans ce processus
+        FraudModel.reload()
+
+        return path
+
+    # ==========================================
+    # HELPERS
+    # ==========================================
+
+    @staticmethod
+    def _fit(X, y):
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+
+        scaler = StandardScaler().fit(X)
+        model = LogisticRegression(class_weight="balanced", max_iter=1000)
+        model.fit(scaler.transform(X), y)
+        return scaler, model
+
+    @staticmethod
+    def _history(since):
+        return pd.DataFrame.from_records(
+            Transaction.objects.filter(
+                created_at__gte=since
+            ).order_by("created_at").values(
+                *HISTORY_COLUMNS[:-1],
+                date_joined=F("sender__date_joined"),
+            ),
+            columns=HISTORY_COLUMNS
+        )
@@ -0,0 +1,60 @@
+# backend/apps/ai_engine/models.py
+
+from django.db import models
+
+
+class ShadowMode(models.TextChoices):
+    LIVE = "live", "Live traffic"
+    REPLAY = "replay", "Historical replay"
+
+
+class ShadowEvaluation(models.Model):
+    """
+    Résultat d'un moteur candidat exécuté en mode ombre, comparé
+    à la décision de production (jamais appliqué à la transaction).
+    """
+
+    # Pas de contrainte FK : l'évaluation peut être écrite avant le
+    # commit de la requête qui a créé la transaction
+    transaction = models.ForeignKey(
+        "transactions.Transaction",
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name="shadow_evaluations"
+    )
+
+    engine = models.CharField(max_length=100)
+    mode = models.CharField(
+        max_length=10,
+        choices=ShadowMode.choices,
+        default=ShadowMode.LIVE
+    )
+
+    # ---------------------------
+    # DÉCISIONS (APPROVE | REVIEW | BLOCK)
+    # ---------------------------
+    production_decision = models.CharField(max_length=10)
+    production_risk_score = models.FloatField(null=True)
+
+    decision = models.CharField(max_length=10, blank=True)
+    risk_score = models.FloatField(null=True)
+
+    # None si le moteur a échoué
+    agrees = models.BooleanField(null=True)
+
+    # ---------------------------
+    # PERFORMANCE
+    # ---------------------------
+    latency_ms = models.FloatField()
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["engine", "created_at"]),
+            models.Index(fields=["engine", "agrees"]),
+        ]
+
+    def __str__(self):
+        return f"{self.engine} {self.mode} {self.decision or 'error'} vs {self.production_decision}"
@@ -0,0 +1,175 @@
+# backend/apps/ai_engine/prompt.py
+
+import json
+import logging
+import math
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================
+# CONFIGURATION
+# ==========================================
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Prix USD par million de tokens (gpt-4o-mini)
+DEFAULT_PROMPT_PRICE = 0.15
+DEFAULT_COMPLETION_PRICE = 0.60
+
+# Plafond de tokens de réponse (une décision JSON ≈ 40 tokens)
+MAX_COMPLETION_TOKENS = 80
+MAX_COMPLETION_TOKENS_PER_ITEM = 60
+
+# Surcoût du format chat (par message + amorce de réponse)
+MESSAGE_OVERHEAD = 3
+REPLY_OVERHEAD = 3
+
+# Bornes d'histogramme des tokens de prompt par appel
+TOKEN_BUCKETS = [50, 100, 200, 400, 800, 1600, 3200, 6400]
+
+
+# ==========================================
+# PROMPTS PRÉCONSTRUITS
+# ==========================================
+
+# Clés courtes envoyées au modèle (vecteur decision_features aplati)
+TRANSACTION_KEYS = {
+    "amount": "amt",
+    "currency": "cur",
+    "status": "st",
+}
+
+AGENT_KEYS = {
+    "reputation_score": "rep",
+    "trust_level": "lvl",
+    "total_volume": "vol",
+    "total_transactions": "n",
+    "dispute_count": "disp",
+    "is_frozen": "frz",
+}
+
+# Préfixe commun (identique à chaque appel, décision unique ou lot)
+PROMPT_PREFIX = (
+    "Fraud screening for FubaPay, a crypto fintech in Africa. "
+    "Keys: amt=amount range, cur=currency, st=status; "
+    "agent (absent if none): rep=reputation 0-100, lvl=trust level, "
+    "vol=lifetime volume range, n=lifetime transactions range, "
+    "disp=disputes, frz=1 if frozen."
+)
+
+DECISION_FORMAT = '{"decision":"APPROVE|REVIEW|BLOCK","risk_score":0-100,"reason":"max 12 words"}'
+
+SYSTEM_PROMPT = f"{PROMPT_PREFIX} Reply with JSON only: {DECISION_FORMAT}"
+
+BATCH_SYSTEM_PROMPT = (
+    f"{PROMPT_PREFIX} Input is a JSON array; each item has an integer id. "
+    "Judge each item independently. Reply with JSON only: "
+    '{"results":[{"id":0,"decision":"APPROVE|REVIEW|BLOCK","risk_score":0-100,"reason":"max 12 words"}]} '
+    "with exactly one result per id."
+)
+
+
+# ==========================================
+# COMPACTION
+# ==========================================
+
+def compact(features):
+    """
+    Vecteur decision_features -> objet plat à clés courtes.
+    """
+    compacted = {
+        short: features["transaction"][key]
+        for key, short in TRANSACTION_KEYS.items()
+    }
+
+    agent = features.get("agent")
+    if agent:
+        for key, short in AGENT_KEYS.items():
+            value = agent[key]
+            compacted[short] = int(value) if isinstance(value, bool) else value
+
+    return compacted
+
+
+def encode(content):
+    """
+    JSON sans espaces (chaque séparateur coûte un token).
+    """
+    return json.dumps(content, separators=(",", ":"))
+
+
+def build_messages(system_prompt, content):
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": encode(content)},
+    ]
+
+
+# ==========================================
+# COMPTAGE DES TOKENS
+# ==========================================
+
+class TokenCounter:
+    """
+    Comptage des tokens avec tiktoken (encodage du modèle).
+
+    Si l'encodage n'est pas disponible (fichier BPE non téléchargeable,
+    modèle inconnu), on estime à ~4 caractères par token.
+    """
+
+    _encodings = {}         # modèle -> encodage (None = indisponible)
+    _lock = threading.Lock()
+
+    def __init__(self, model=None):
+        self.model = model or getattr(settings, "AI_LLM_MODEL", DEFAULT_MODEL)
+        self.encoding = self._encoding(self.model)
+
+    @property
+    def exact(self):
+        return self.encoding is not None
+
+    def count(self, text):
+        if self.encoding is None:
+            return math.ceil(len(text) / 4)
+
+        return len(self.encoding.encode(text))
+
+    def count_messages(self, messages):
+        return sum(
+            self.count(message["content"]) + MESSAGE_OVERHEAD
+            for message in messages
+        ) + REPLY_OVERHEAD
+
+    @classmethod
+    def _encoding(cls, model):
+        with cls._lock:
+            if model not in cls._encodings:
+                try:
+                    import tiktoken
+
+                    try:
+                        encoding = tiktoken.encoding_for_model(model)
+                    except KeyError:
+                        encoding = tiktoken.get_encoding("o200k_base")
+                except Exception as e:
+                    logger.warning("tiktoken encoding unavailable for %s, estimating tokens: %s", model, e)
+                    encoding = None
+
+                cls._encodings[model] = encoding
+
+            return cls._encodings[model]
+
+
+# ==========================================
+# COÛT
+# ==========================================
+
+def cost_usd(prompt_tokens, completion_tokens):
+    prompt_price = getattr(settings, "AI_LLM_PROMPT_PRICE", DEFAULT_PROMPT_PRICE)
+    completion_price = getattr(settings, "AI_LLM_COMPLETION_PRICE", DEFAULT_COMPLETION_PRICE)
+
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
@@ -0,0 +1,241 @@
+# backend/apps/ai_engine/review.py
+
+import logging
+
+import redis
+from django.conf import settings
+from django.db import transaction as db_transaction
+
+from apps.ai_engine.breaker import CircuitBreaker
+from apps.ai_engine.decision import AIDecisionEngine, AIUnavailable
+from apps.ai_engine.metrics import metrics
+from apps.transactions.models import Transaction, TransactionStatus
+from apps.transactions.state import TransactionStateMachine, TRANSITIONS
+from apps.transactions.velocity import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_REVIEW_TIMEOUT = 20.0       # secondes : hors chemin de paiement
+DEFAULT_BATCH_SIZE = 20             # transactions par prompt
+
+PENDING_KEY = "ai:reviews:pending"
+
+# Disjoncteur propre à la revue : ses appels (unitaires et par lots) sont
+# longs par nature et ne doivent pas ouvrir celui du chemin de paiement
+# (openai_breaker)
+review_breaker = CircuitBreaker(
+    "openai-review",
+    slow_call_threshold=getattr(settings, "AI_REVIEW_TIMEOUT", DEFAULT_REVIEW_TIMEOUT)
+)
+
+# Statuts encore concernés par une revue IA
+REVIEWABLE_STATUSES = [
+    TransactionStatus.PENDING,
+    TransactionStatus.APPROVED,
+    TransactionStatus.PROCESSING,
+    TransactionStatus.CONFIRMED,
+]
+
+
+class AIReviewService:
+    """
+    Revue IA asynchrone, après autorisation locale.
+
+    Les transactions à faible risque sont approuvées par les règles
+    locales puis mises en file. Le verdict du modèle peut
+    ensuite, rétroactivement :
+    - BLOCK  → DISPUTED + agent signalé (is_flagged)
+    - REVIEW → AI_REVIEW si la transaction n'est pas encore partie
+    - APPROVE → raison enregistrée uniquement
+
+    Les transactions en attente sont regroupées dans un set Redis et
+    revues par lots (drain(), tâche périodique) : un seul appel LLM
+    par lot au lieu d'un appel par transaction.
+    """
+
+    def __init__(self, engine=None, client=None):
+        self.engine = engine
+        self.client = client
+
+    # ==========================================
+    # MISE EN FILE
+    # ==========================================
+
+    @classmethod
+    def enqueue(cls, transaction):
+        metrics.incr("ai.reviews.queued")
+
+        transaction_id = str(transaction.pk)
+        db_transaction.on_commit(lambda: cls()._push(transaction_id))
+
+    def _push(self, transaction_id):
+        try:
+            self._redis().sadd(PENDING_KEY, transaction_id)
+        except redis.RedisError as e:
+            # File de lots indisponible : revue unitaire
+            from apps.ai_engine.tasks import review_transaction
+
+            logger.warning("Review queue unavailable, reviewing individually: %s", e)
+            review_transaction.delay(transaction_id)
+
+    # ==========================================
+    # REVUE PAR LOTS (WORKER)
+    # ==========================================
+
+    def drain(self, batch_size=None):
+        """
+        Revoit toutes les transactions en attente, par lots.
+        Retourne le nombre de transactions revues.
+        """
+        from apps.ai_engine.tasks import review_transaction
+
+        batch_size = batch_size or getattr(settings, "AI_REVIEW_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        client = self._redis()
+        reviewed = 0
+
+        while True:
+            members = client.spop(PENDING_KEY, batch_size)
+            if not members:
+                break
+
+            ids = [member.decode() for member in members]
+
+            try:
+                result = self.review_batch(ids)
+            except AIUnavailable as e:
+                # Remis en file pour la prochaine fenêtre
+                client.sadd(PENDING_KEY, *ids)
+                logger.warning("AI review batch postponed: %s", e)
+                break
+
+            # Sans réponse valide dans le lot : revue unitaire (avec retries)
+            for transaction_id in result["unresolved"]:
+                review_transaction.delay(transaction_id)
+
+            reviewed += len(result["reviewed"])
+
+        return reviewed
+
+    def review_batch(self, transaction_ids):
+        """
+        Un appel LLM pour tout le lot, verdicts appliqués par transaction.
+        """
+
+        transactions = list(
+            Transaction.objects.select_related("agent").filter(
+                pk__in=transaction_ids,
+                status__in=REVIEWABLE_STATUSES
+            )
+        )
+
+        if not transactions:
+            return {"reviewed": [], "unresolved": []}
+
+        decisions = self._engine().evaluate_batch(transactions)
+
+        return {
+            "reviewed": [
+                self.apply(transaction, decisions[transaction.pk])
+                for transaction in transactions
+                if transaction.pk in decisions
+            ],
+            "unresolved": [
+                str(transaction.pk)
+                for transaction in transactions
+                if transaction.pk not in decisions
+            ],
+        }
+
+    # ==========================================
+    # REVUE
+    # ==========================================
+
+    def review(self, transaction_id):
+        """
+        Évalue la transaction avec le modèle et applique le verdict.
+        Lève AIUnavailable si le modèle ne répond pas (la tâche réessaie).
+        """
+
+        transaction = Transaction.objects.select_related("agent").filter(
+            pk=transaction_id,
+            status__in=REVIEWABLE_STATUSES
+        ).first()
+
+        if transaction is None:
+            return {"transaction_id": str(transaction_id), "skipped": True}
+
+        decision = self._engine().evaluate_transaction(transaction)
+
+        return self.apply(transaction, decision)
+
+    def apply(self, transaction, decision):
+        verdict = decision.get("decision")
+        fields = {
+            "risk_score": decision.get("risk_score", transaction.risk_score),
+            "ai_decision_reason": decision.get("reason", ""),
+        }
+
+        metrics.incr(f"ai.reviews.{str(verdict).lower()}")
+
+        flagged = False
+
+        with db_transaction.atomic():
+            if verdict == "BLOCK":
+                self._move(transaction, TransactionStatus.DISPUTED, fields)
+
+                if transaction.agent_id:
+                    transaction.agent.flag()
+                    flagged = True
+
+                logger.warning(
+                    "AI review blocked transaction %s (agent flagged: %s)",
+                    transaction.pk,
+                    flagged
+                )
+
+            elif verdict == "REVIEW":
+                self._move(transaction, TransactionStatus.AI_REVIEW, fields)
+
+            else:
+                Transaction.objects.filter(pk=transaction.pk).update(
+                    ai_decision_reason=fields["ai_decision_reason"]
+                )
+
+        return {
+            "transaction_id": str(transaction.pk),
+            "decision": verdict,
+            "status": transaction.status,
+            "agent_flagged": flagged,
+        }
+
+    # ==========================================
+    # HELPERS
+    # ==========================================
+
+    def _engine(self):
+        if self.engine is None:
+            self.engine = AIDecisionEngine(
+                breaker=review_breaker,
+                timeout=getattr(settings, "AI_REVIEW_TIMEOUT", DEFAULT_REVIEW_TIMEOUT)
+            )
+
+        return self.engine
+
+    def _redis(self):
+        if self.client is None:
+            self.client = get_redis_client()
+
+        return self.client
+
+    @staticmethod
+    def _move(transaction, to_status, fields):
+        """
+        Transition si elle est encore permise depuis le statut courant,
+        sinon (ex. déjà en cours on-chain) seule l'analyse est enregistrée.
+        """
+        if transaction.status in TRANSITIONS[to_status]:
+            if TransactionStateMachine().transition(transaction, to_status, **fields):
+                return
+
+        Transaction.objects.filter(pk=transaction.pk).update(**fields)
@@ -1,22 +1,56 @@
 # backend/apps/ai_engine/risk.py
 
+import time
+
+from django.conf import settings
+
+from apps.agents.features import AgentFeatureStore
 from apps.ai_engine.fraud import FraudDetectionEngine
 from apps.ai_engine.scoring import AIScoringEngine
-from apps.ai_engine.decision import AIDecisionEngine
+from apps.ai_engine.decision import AIDecisionEngine, AIUnavailable, DEFAULT_TIMEOUT
+from apps.ai_engine.metrics import metrics
+from apps.ai_engine.model import FraudModel, transaction_features
+from apps.ai_engine.review import AIReviewService
+
+
+MIN_AI_BUDGET = 0.05        # secondes : en dessous, inutile d'appeler l'IA
+FALLBACK_REVIEW_SCORE = 40  # score agent sous lequel le repli passe en REVIEW
+ASYNC_REVIEW_MAX_RISK = 20  # risque local sous lequel l'IA passe en asynchrone
 
 
 class RiskEngine:
     """
     Moteur global de gestion du risque FubaPay.
     Combine règles locales + scoring + IA externe.
+
+    L'évaluation complète est bornée par AI_DECISION_TIMEOUT : l'IA ne
+    reçoit que le budget restant après les règles locales, et si elle
+    ne répond pas à temps (ou si le disjoncteur est ouvert), la décision
+    est prise par les moteurs locaux seuls.
+
+    Avec AI_ASYNC_REVIEW, les transactions à faible risque sont
+    approuvées immédiatement et revues par l'IA en tâche de fond
+    (AIReviewService) ; seuls les cas limites attendent le modèle.
+
+    Quand un modèle local est entraîné (train_fraud_model), c'est lui
+    qui tranche : probabilité basse → APPROVE, très haute → BLOCK, et
+    le LLM n'est appelé qu'entre les deux (escalade).
     """
 
     def __init__(self, transaction):
         self.transaction = transaction
         self.agent = transaction.agent
+        self.budget = getattr(settings, "AI_DECISION_TIMEOUT", DEFAULT_TIMEOUT)
+        self.async_review = getattr(settings, "AI_ASYNC_REVIEW", False)
+        self.save_score = True          # False : évaluation sans écriture (mode ombre)
+        self.model = FraudModel.current()
 
-        self.fraud_engine = FraudDetectionEngine(self.agent)
-        self.scoring_engine = AIScoringEngine(self.agent)
+        # Un seul snapshot agent (une requête) partagé par les moteurs locaux,
+        # relu à chaque évaluation (limites et vélocité)
+        self.agent_features = AgentFeatureStore(ttl=0).get(self.agent)
+
+        self.fraud_engine = FraudDetectionEngine(self.agent, self.agent_features)
+        self.scoring_engine = AIScoringEngine(self.agent, self.agent_features)
         self.ai_engine = AIDecisionEngine()
 
     # ====================================================
@@ -33,6 +67,8 @@ class RiskEngine:
         }
         """
 
+        started = time.monotonic()
+
         # 1️⃣ RÈGLES RAPIDES (LOCAL)
         fraud_result = self.fraud_engine.analyze_transaction(self.transaction)
 
@@ -47,7 +83,7 @@ class RiskEngine:
             }
 
         # 2️⃣ SCORING ACTUEL
-        current_score = self.scoring_engine.calculate_score()
+        current_score = self.scoring_engine.calculate_score(save=self.save_score)
 
         # Si score extrêmement bas → blocage direct
         if current_score < 15:
@@ -60,8 +96,46 @@ class RiskEngine:
                 }
             }
 
-        # 3️⃣ IA CONTEXTUELLE (ChatGPT)
-        ai_result = self.ai_engine.evaluate_transaction(self.transaction)
+        # 3️⃣ MODÈLE LOCAL : le LLM n'est qu'un chemin d'escalade
+        if self.model is not None:
+            probability = self.model.predict(transaction_features(self.transaction))
+
+            if probability < settings.AI_MODEL_APPROVE_THRESHOLD:
+                return self._model_result("APPROVE", probability, fraud_result, current_score)
+
+            if probability >= settings.AI_MODEL_BLOCK_THRESHOLD:
+                return self._model_result("BLOCK", probability, fraud_result, current_score)
+
+            metrics.incr("ai.model.escalations")
+
+        # 4️⃣ SANS MODÈLE : FAIBLE RISQUE → approbation locale, revue IA asynchrone
+        elif self.async_review and self._is_low_risk(fraud_result, current_score):
+            AIReviewService.enqueue(self.transaction)
+
+            return {
+                "decision": "APPROVE",
+                "risk_score": fraud_result["risk_score"],
+                "details": {
+                    "source": "local",
+                    "fraud_flags": fraud_result["flags"],
+                    "ai_review": "queued",
+                    "agent_score": current_score
+                }
+            }
+
+        # 5️⃣ CAS LIMITE : IA CONTEXTUELLE (ChatGPT), dans le budget restant
+        remaining = self.budget - (time.monotonic() - started)
+
+        try:
+            if remaining < MIN_AI_BUDGET:
+                raise AIUnavailable("No budget left")
+
+            ai_result = self.ai_engine.evaluate_transaction(
+                self.transaction,
+                timeout=remaining
+            )
+        except AIUnavailable as e:
+            return self._fallback(fraud_result, current_score, str(e))
 
         # ====================================================
         # FUSION DES DÉCISIONS
@@ -82,6 +156,68 @@ class RiskEngine:
             }
         }
 
+    # ====================================================
+    # DÉCISION DU MODÈLE LOCAL
+    # ====================================================
+
+    def _model_result(self, decision, probability, fraud_result, current_score):
+
+        metrics.incr(f"ai.model.{decision.lower()}")
+
+        # Les règles antifraude gardent la main si elles sont plus strictes
+        if decision == "APPROVE" and fraud_result["decision"] == "REVIEW":
+            decision = "REVIEW"
+
+        return {
+            "decision": decision,
+            "risk_score": max(round(probability * 100), fraud_result["risk_score"]),
+            "details": {
+                "source": "model",
+                "model_version": self.model.version,
+                "fraud_probability": probability,
+                "fraud_flags": fraud_result["flags"],
+                "agent_score": current_score
+            }
+        }
+
+    # ====================================================
+    # TRI FAIBLE RISQUE / CAS LIMITE
+    # ====================================================
+
+    @staticmethod
+    def _is_low_risk(fraud_result, current_score):
+        return (
+            fraud_result["decision"] == "APPROVE"
+            and fraud_result["risk_score"] < ASYNC_REVIEW_MAX_RISK
+            and current_score >= FALLBACK_REVIEW_SCORE
+        )
+
+    # ====================================================
+    # REPLI LOCAL (IA INDISPONIBLE)
+    # ====================================================
+
+    def _fallback(self, fraud_result, current_score, reason):
+        """
+        Décision déterministe : règles antifraude + score agent.
+        """
+
+        metrics.incr("ai.fallbacks")
+
+        decision = fraud_result["decision"]
+        if decision == "APPROVE" and current_score < FALLBACK_REVIEW_SCORE:
+            decision = "REVIEW"
+
+        return {
+            "decision": decision,
+            "risk_score": fraud_result["risk_score"],
+            "details": {
+                "source": "fallback",
+                "fraud_flags": fraud_result["flags"],
+                "ai_reason": f"AI unavailable: {reason}",
+                "agent_score": current_score
+            }
+        }
+
     # ====================================================
     # LOGIQUE DE FUSION
     # ====================================================
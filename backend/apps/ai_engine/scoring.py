@@ -1,11 +1,7 @@
 # backend/apps/ai_engine/scoring.py
 
-from decimal import Decimal
-from django.utils import timezone
-from datetime import timedelta
-
-from apps.agents.models import AgentProfile
-from apps.transactions.models import Transaction
+from apps.agents.features import AgentFeatureStore, resolve_profile
+from apps.transactions.models import TransactionStatus
 
 
 class AIScoringEngine:
@@ -18,29 +14,34 @@ class AIScoringEngine:
     MAX_SCORE = 100
     MIN_SCORE = 0
 
-    def __init__(self, agent):
-        self.agent = agent
-        self.profile = AgentProfile.objects.get(user=agent)
+    def __init__(self, agent, features=None):
+        # agent : AgentProfile (Transaction.agent) ou son utilisateur
+        # features : snapshot AgentFeatureStore partagé (sinon calculé à la demande)
+        self.profile = resolve_profile(agent)
+        self.agent = self.profile
+        self._features = features
+
+    @property
+    def features(self):
+        if self._features is None:
+            self._features = AgentFeatureStore().get(self.profile)
+        return self._features
 
     # =====================================================
     # RECALCUL GLOBAL INTELLIGENT
     # =====================================================
 
-    def calculate_score(self):
+    def calculate_score(self, save=True):
         """
         Recalcule complètement le score IA
         en fonction du comportement global.
-        """
 
-        transactions = Transaction.objects.filter(agent=self.agent)
-
-        completed = transactions.filter(status="completed").count()
-        failed = transactions.filter(status="failed").count()
-        disputed = transactions.filter(status="disputed").count()
+        save=False : score calculé sans toucher au profil (évaluation en ombre).
+        """
 
-        total_volume = transactions.filter(
-            status="completed"
-        ).aggregate_sum()
+        completed = self.features["successful_transactions"]
+        failed = self.features["failed_transactions"]
+        disputed = self.features["dispute_count"]
 
         score = self.BASE_SCORE
 
@@ -65,8 +66,11 @@ class AIScoringEngine:
         # Normalisation
         score = max(self.MIN_SCORE, min(self.MAX_SCORE, int(score)))
 
+        if not save:
+            return score
+
+        # Une seule écriture : update_trust_level sauvegarde aussi le score
         self.profile.reputation_score = score
-        self.profile.save()
         self.profile.update_trust_level()
 
         return score
@@ -80,16 +84,7 @@ class AIScoringEngine:
         Bonus si aucune activité suspecte récente.
         """
 
-        now = timezone.now()
-        last_30_days = now - timedelta(days=30)
-
-        disputes_recent = Transaction.objects.filter(
-            agent=self.agent,
-            status="disputed",
-            created_at__gte=last_30_days
-        ).count()
-
-        if disputes_recent == 0:
+        if self.features["disputes_30d"] == 0:
             return 10
 
         return 0
@@ -100,14 +95,7 @@ class AIScoringEngine:
 
     def _recent_failure_penalty(self):
 
-        now = timezone.now()
-        last_7_days = now - timedelta(days=7)
-
-        failures = Transaction.objects.filter(
-            agent=self.agent,
-            status="failed",
-            created_at__gte=last_7_days
-        ).count()
+        failures = self.features["failed_7d"]
 
         if failures >= 5:
             return 10
@@ -126,13 +114,13 @@ class AIScoringEngine:
         sans recalcul complet.
         """
 
-        if transaction.status == "completed":
+        if transaction.status == TransactionStatus.CONFIRMED:
             self._increase(1)
 
-        elif transaction.status == "failed":
+        elif transaction.status == TransactionStatus.FAILED:
             self._decrease(3)
 
-        elif transaction.status == "disputed":
+        elif transaction.status == TransactionStatus.DISPUTED:
             self._decrease(7)
 
         self.profile.update_trust_level()
@@ -146,11 +134,11 @@ class AIScoringEngine:
             self.MAX_SCORE,
             self.profile.reputation_score + points
         )
-        self.profile.save()
+        self.profile.save(update_fields=["reputation_score", "updated_at"])
 
     def _decrease(self, points):
         self.profile.reputation_score = max(
             self.MIN_SCORE,
             self.profile.reputation_score - points
         )
-        self.profile.save()
\ No newline at end of file
+        self.profile.save(update_fields=["reputation_score", "updated_at"])
\ No newline at end of file
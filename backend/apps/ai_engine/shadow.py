@@ -0,0 +1,410 @@
+# backend/apps/ai_engine/shadow.py
+
+import logging
+import multiprocessing
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, connections, transaction as db_transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.ai_engine.breaker import CircuitBreaker
+from apps.ai_engine.cache import DecisionCache
+from apps.ai_engine.metrics import Histogram, metrics
+from apps.ai_engine.models import ShadowEvaluation, ShadowMode
+from apps.transactions.models import RiskLevel, Transaction
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_WORKERS = 2
+MAX_PENDING_PER_WORKER = 50     # au-delà, les échantillons sont abandonnés
+REPLAY_CHUNK_SIZE = 200
+
+# Niveaux de risque qui envoient une transaction en revue (apply_risk_result)
+REVIEW_RISK_LEVELS = [RiskLevel.HIGH, RiskLevel.CRITICAL]
+
+# Disjoncteur et cache propres au moteur IA en ombre : ses appels lents ou
+# en échec n'ouvrent pas le disjoncteur de production (openai_breaker), ne
+# prennent pas son appel d'essai et ne faussent pas son taux de hit
+shadow_breaker = CircuitBreaker("openai-shadow")
+shadow_cache = DecisionCache(name="shadow.decision_cache")
+metrics.register(shadow_cache.name, shadow_cache.stats)
+
+
+# ==========================================
+# ADAPTATEURS DE MOTEURS
+# ==========================================
+# Un moteur candidat est un callable transaction -> {decision, risk_score},
+# ou None s'il ne s'applique pas à cette transaction.
+
+def from_rules(result):
+    """
+    Résultat de transactions.risk.RiskEngine -> décision comparable.
+    """
+    return {
+        "decision": "REVIEW" if result["risk_level"] in REVIEW_RISK_LEVELS else "APPROVE",
+        "risk_score": result["risk_score"],
+    }
+
+
+def rules_engine(transaction):
+    from apps.transactions.risk import RiskEngine
+
+    return from_rules(RiskEngine(transaction).evaluate())
+
+
+def ai_engine(transaction):
+    from apps.ai_engine.decision import AIDecisionEngine
+    from apps.ai_engine.risk import RiskEngine
+
+    # Le moteur IA ne s'applique qu'aux transactions avec agent
+    if not transaction.agent_id:
+        return None
+
+    engine = RiskEngine(transaction)
+    engine.async_review = False         # aucune revue mise en file depuis l'ombre
+    engine.save_score = False           # aucun verrou de ligne tenu pendant l'appel LLM
+    engine.ai_engine = AIDecisionEngine(cache=shadow_cache, breaker=shadow_breaker)
+
+    result = engine.evaluate()
+
+    return {
+        "decision": result["decision"],
+        "risk_score": result["risk_score"],
+    }
+
+
+ENGINES = {
+    "rules": rules_engine,
+    "ai": ai_engine,
+}
+
+
+def get_engine(name):
+    """
+    Nom du registre ENGINES ou chemin pointé vers un callable.
+    """
+    if name in ENGINES:
+        return ENGINES[name]
+
+    return import_string(name)
+
+
+# ==========================================
+# ÉVALUATION EN OMBRE
+# ==========================================
+
+class ShadowEvaluator:
+    """
+    Exécute des moteurs de risque candidats à côté de la production,
+    sans jamais influencer la décision.
+
+    - Trafic live : un échantillon (AI_SHADOW_SAMPLE_RATE) est envoyé à
+      un pool de threads hors du chemin de la requête ; si la file est
+      pleine, l'échantillon est abandonné (shadow.dropped).
+    - Les moteurs intégrés n'écrivent pas en base (score agent calculé
+      sans sauvegarde), pour ne pas tenir de verrou pendant un appel
+      LLM. Par sécurité, chaque moteur tourne dans une transaction DB
+      annulée : les écritures d'un candidat ne sont jamais persistées.
+    - Latence par moteur en histogramme (shadow.<moteur>.latency_ms),
+      accords / désaccords / erreurs en compteurs, et une ligne
+      ShadowEvaluation par moteur pour l'analyse.
+    """
+
+    _executor = None
+    _slots = None
+    _lock = threading.Lock()
+
+    def __init__(self, engines=None, sample_rate=None):
+        self.engines = list(
+            engines if engines is not None else getattr(settings, "AI_SHADOW_ENGINES", [])
+        )
+        self.sample_rate = (
+            sample_rate if sample_rate is not None
+            else getattr(settings, "AI_SHADOW_SAMPLE_RATE", 0.0)
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.engines) and self.sample_rate > 0
+
+    # ==========================================
+    # TRAFIC LIVE
+    # ==========================================
+
+    def submit(self, transaction, production, latency=None):
+        """
+        production : {decision, risk_score} de la décision appliquée
+        latency : durée (s) du moteur de production
+
+        Retourne True si l'échantillon a été mis en file.
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return False
+
+        executor, slots = self._pool()
+
+        if not slots.acquire(blocking=False):
+            metrics.incr("shadow.dropped")
+            return False
+
+        try:
+            executor.submit(self._run_live, transaction, production, latency, slots)
+        except RuntimeError:
+            # Pool arrêté (fin de processus)
+            slots.release()
+            return False
+
+        metrics.incr("shadow.sampled")
+        return True
+
+    def _run_live(self, transaction, production, latency, slots):
+        try:
+            self.run(transaction, production, latency)
+        except Exception:
+            logger.exception("Shadow evaluation failed for transaction %s", transaction.pk)
+        finally:
+            slots.release()
+            connection.close()      # connexion propre au thread
+
+    # ==========================================
+    # EXÉCUTION
+    # ==========================================
+
+    def run(self, transaction, production, production_latency=None, mode=ShadowMode.LIVE, record=True):
+        """
+        Exécute tous les moteurs candidats sur une transaction.
+        Retourne les ShadowEvaluation (enregistrées si record).
+        """
+        if production_latency is not None:
+            metrics.observe("shadow.production.latency_ms", production_latency * 1000)
+
+        evaluations = [
+            evaluation
+            for evaluation in (
+                self.evaluate(name, transaction, production, mode)
+                for name in self.engines
+            )
+            if evaluation is not None
+        ]
+
+        if record and evaluations:
+            ShadowEvaluation.objects.bulk_create(evaluations)
+
+        return evaluations
+
+    def evaluate(self, name, transaction, production, mode=ShadowMode.LIVE):
+        engine = get_engine(name)
+
+        result = None
+        error = ""
+
+        started = time.perf_counter()
+        try:
+            with db_transaction.atomic():
+                result = engine(transaction)
+                db_transaction.set_rollback(True)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        if result is None and not error:
+            metrics.incr(f"shadow.{name}.skipped")
+            return None
+
+        metrics.observe(f"shadow.{name}.latency_ms", latency_ms)
+
+        if error:
+            metrics.incr(f"shadow.{name}.errors")
+            agrees = None
+        else:
+            agrees = result["decision"] == production["decision"]
+            metrics.incr(f"shadow.{name}.{'agree' if agrees else 'disagree'}")
+
+        return ShadowEvaluation(
+            transaction_id=transaction.pk,
+            engine=name,
+            mode=mode,
+            production_decision=production["decision"],
+            production_risk_score=production.get("risk_score"),
+            decision=result["decision"] if result else "",
+            risk_score=result.get("risk_score") if result else None,
+            agrees=agrees,
+            latency_ms=latency_ms,
+            error=error,
+        )
+
+    # ==========================================
+    # POOL
+    # ==========================================
+
+    @classmethod
+    def _pool(cls):
+        with cls._lock:
+            if cls._executor is None:
+                workers = getattr(settings, "AI_SHADOW_WORKERS", DEFAULT_WORKERS)
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix="shadow"
+                )
+                cls._slots = threading.BoundedSemaphore(workers * MAX_PENDING_PER_WORKER)
+
+            return cls._executor, cls._slots
+
+    @classmethod
+    def shutdown(cls, wait=True):
+        with cls._lock:
+            executor, cls._executor, cls._slots = cls._executor, None, None
+
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# ==========================================
+# REJEU HISTORIQUE
+# ==========================================
+
+class ShadowReplay:
+    """
+    Rejoue des moteurs candidats sur les transactions historiques,
+    réparties par paquets sur plusieurs processus.
+
+    La décision de référence est celle enregistrée sur la transaction
+    (risk_level / risk_score). Les features sont recalculées au moment
+    du rejeu : c'est une estimation de l'impact, pas une reconstitution
+    exacte de l'état passé.
+    """
+
+    def __init__(
+        self,
+        engines,
+        days=7,
+        limit=None,
+        workers=None,
+        chunk_size=REPLAY_CHUNK_SIZE,
+        record=True
+    ):
+        self.engines = list(engines)
+        self.days = days
+        self.limit = limit
+        self.workers = workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.record = record
+
+    def run(self):
+        started = time.monotonic()
+
+        ids = self.transaction_ids()
+        tasks = [
+            (self.engines, ids[index:index + self.chunk_size], self.record)
+            for index in range(0, len(ids), self.chunk_size)
+        ]
+
+        if self.workers <= 1 or len(tasks) <= 1:
+            results = [_replay_chunk(task) for task in tasks]
+        else:
+            # Les processus fils ouvrent leurs propres connexions
+            connections.close_all()
+
+            with multiprocessing.get_context("fork").Pool(self.workers) as pool:
+                results = list(pool.imap_unordered(_replay_chunk, tasks))
+
+        summary = self._merge(results)
+        summary["transactions"] = len(ids)
+        summary["seconds"] = round(time.monotonic() - started, 3)
+
+        return summary
+
+    def transaction_ids(self):
+        queryset = Transaction.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=self.days)
+        ).order_by("created_at").values_list("pk", flat=True)
+
+        if self.limit:
+            queryset = queryset[:self.limit]
+
+        return list(queryset)
+
+    def _merge(self, results):
+        engines = {}
+
+        for result in results:
+            for name, stats in result.items():
+                merged = engines.setdefault(name, {
+                    "evaluated": 0,
+                    "agree": 0,
+                    "disagree": 0,
+                    "errors": 0,
+                    "skipped": 0,
+                    "latency": Histogram(),
+                })
+                for key in ("evaluated", "agree", "disagree", "errors", "skipped"):
+                    merged[key] += stats[key]
+                for latency in stats["latencies"]:
+                    merged["latency"].observe(latency)
+
+        for merged in engines.values():
+            latency = merged.pop("latency")
+            compared = merged["agree"] + merged["disagree"]
+
+            merged["disagreement_rate"] = round(merged["disagree"] / compared, 4) if compared else 0.0
+            merged["latency_ms"] = {
+                "mean": round(latency.sum / latency.count, 3) if latency.count else 0.0,
+                "p50": latency.quantile(0.5),
+                "p95": latency.quantile(0.95),
+                "p99": latency.quantile(0.99),
+            }
+
+        return {"engines": engines}
+
+
+def _replay_chunk(task):
+    """
+    Un paquet de transactions (exécuté dans un processus du pool).
+    """
+    engines, ids, record = task
+    evaluator = ShadowEvaluator(engines=engines, sample_rate=1.0)
+
+    stats = {
+        name: {"evaluated": 0, "agree": 0, "disagree": 0, "errors": 0, "skipped": 0, "latencies": []}
+        for name in engines
+    }
+    evaluations = []
+
+    transactions = Transaction.objects.filter(pk__in=ids).select_related("agent", "sender")
+
+    for transaction in transactions:
+        production = from_rules({
+            "risk_level": transaction.risk_level,
+            "risk_score": transaction.risk_score,
+        })
+
+        for name in engines:
+            evaluation = evaluator.evaluate(name, transaction, production, ShadowMode.REPLAY)
+
+            if evaluation is None:
+                stats[name]["skipped"] += 1
+                continue
+
+            stats[name]["evaluated"] += 1
+            stats[name]["latencies"].append(evaluation.latency_ms)
+
+            if evaluation.agrees is None:
+                stats[name]["errors"] += 1
+            elif evaluation.agrees:
+                stats[name]["agree"] += 1
+            else:
+                stats[name]["disagree"] += 1
+
+            evaluations.append(evaluation)
+
+    if record and evaluations:
+        ShadowEvaluation.objects.bulk_create(evaluations)
+
+    return stats
@@ -0,0 +1,30 @@
+# backend/apps/ai_engine/tasks.py
+
+from celery import shared_task
+
+from apps.ai_engine.decision import AIUnavailable
+from apps.ai_engine.review import AIReviewService
+
+
+# ==========================================
+# REVUE IA ASYNCHRONE
+# ==========================================
+
+@shared_task
+def review_pending_transactions():
+    """
+    Revue IA par lots des transactions en attente (fenêtre = période beat).
+    """
+    return AIReviewService().drain()
+
+
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def review_transaction(self, transaction_id):
+    """
+    Revue IA d'une transaction déjà approuvée localement.
+    Réessaie plus tard si le fournisseur LLM est indisponible.
+    """
+    try:
+        return AIReviewService().review(transaction_id)
+    except AIUnavailable as e:
+        raise self.retry(exc=e)
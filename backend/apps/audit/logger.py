@@ -60,6 +60,12 @@ class AuditLogger:
             log_hash=log_hash,
         )
 
+        # Risk alerts appear on the merchant dashboard
+        if user and "RISK" in action.upper():
+            from apps.merchants.dashboard import MerchantDashboardCache
+
+            MerchantDashboardCache.invalidate([user.id])
+
         # Optional: Store encrypted log on IPFS
         ipfs_hash = None
         if store_on_ipfs:
@@ -1,111 +1,223 @@
 # backend/apps/merchants/dashboard.py
 
-from datetime import timedelta
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.db.models import Q, Sum
 from django.utils import timezone
-from django.db.models import Sum, Count
 
-from apps.transactions.models import Transaction
+from apps.transactions.models import Transaction, MERCHANT_TRANSACTION_TYPES
 from apps.audit.models import AuditLog
 
+from .models import MerchantDailyStats
+from .rollups import MerchantRevenueRollup
+
 
 class MerchantDashboardService:
     """
     FubaPay Merchant Dashboard Logic
     Provides statistics and insights for merchant panel
+
+    Revenue figures are read from the MerchantDailyStats rollup
+    (today's row is kept current by the transaction state machine),
+    so a dashboard load is a handful of indexed lookups.
     """
 
-    def __init__(self, merchant_user):
-        self.user = merchant_user
+    def __init__(self, merchant):
+        self.merchant = merchant
+        self.user_id = merchant.user_id
         self.now = timezone.now()
+        self.today = MerchantRevenueRollup.day_of(self.now)
 
     # ----------------------------------
-    # Total Revenue (All Time)
+    # Revenue (All Time / Today / Month) + Count
     # ----------------------------------
-    def total_revenue(self):
-        return (
-            Transaction.objects.filter(
-                merchant=self.user,
-                status="completed"
-            ).aggregate(total=Sum("amount"))["total"] or 0
+    def revenue(self):
+        first_day = self.today.replace(day=1)
+
+        totals = MerchantDailyStats.objects.filter(
+            merchant=self.merchant
+        ).aggregate(
+            total_revenue=Sum("volume"),
+            today_revenue=Sum("volume", filter=Q(date=self.today)),
+            monthly_revenue=Sum("volume", filter=Q(date__gte=first_day)),
+            total_transactions=Sum("transaction_count"),
         )
 
+        return {
+            "total_revenue": totals["total_revenue"] or Decimal("0"),
+            "today_revenue": totals["today_revenue"] or Decimal("0"),
+            "monthly_revenue": totals["monthly_revenue"] or Decimal("0"),
+            "total_transactions": totals["total_transactions"] or 0,
+        }
+
     # ----------------------------------
-    # Today's Revenue
+    # Recent Transactions
     # ----------------------------------
-    def today_revenue(self):
-        today = self.now.date()
-        return (
+    def recent_transactions(self, limit=10):
+        return list(
             Transaction.objects.filter(
-                merchant=self.user,
-                status="completed",
-                created_at__date=today
-            ).aggregate(total=Sum("amount"))["total"] or 0
+                receiver_id=self.user_id,
+                type__in=MERCHANT_TRANSACTION_TYPES
+            ).order_by("-created_at").values(
+                "id",
+                "reference",
+                "type",
+                "status",
+                "amount",
+                "currency",
+                "created_at"
+            )[:limit]
         )
 
     # ----------------------------------
-    # Monthly Revenue
+    # Suspicious Alerts (latest + count)
     # ----------------------------------
-    def monthly_revenue(self):
-        first_day = self.now.replace(day=1)
-        return (
-            Transaction.objects.filter(
-                merchant=self.user,
-                status="completed",
-                created_at__gte=first_day
-            ).aggregate(total=Sum("amount"))["total"] or 0
+    def risk_alerts(self, limit=5):
+        alerts = AuditLog.objects.filter(
+            user_id=self.user_id,
+            action__icontains="RISK"
+        )
+
+        latest = list(
+            alerts.order_by("-created_at").values(
+                "id",
+                "action",
+                "metadata",
+                "created_at"
+            )[:limit]
         )
 
+        # The full count is only needed when the latest page is full
+        count = len(latest) if len(latest) < limit else alerts.count()
+
+        return latest, count
+
     # ----------------------------------
-    # Transaction Count
+    # IA Score (simple example)
     # ----------------------------------
-    def total_transactions(self):
-        return Transaction.objects.filter(
-            merchant=self.user
-        ).count()
+    @staticmethod
+    def ai_score(total_transactions, suspicious):
+        if total_transactions == 0:
+            return 50  # neutral
+
+        return max(0, 100 - (suspicious * 5))
 
     # ----------------------------------
-    # Recent Transactions
+    # Global Dashboard Data
     # ----------------------------------
-    def recent_transactions(self, limit=10):
-        return Transaction.objects.filter(
-            merchant=self.user
-        ).order_by("-created_at")[:limit]
+    def get_dashboard_data(self):
+        revenue = self.revenue()
+        alerts, suspicious = self.risk_alerts()
+
+        return {
+            **revenue,
+            "ai_score": self.ai_score(revenue["total_transactions"], suspicious),
+            "recent_transactions": self.recent_transactions(),
+            "alerts": alerts,
+        }
+
+
+class MerchantDashboardCache:
+    """
+    Per-merchant dashboard cache with event-driven invalidation.
+
+    Entries are stored under a per-merchant version number; confirmed
+    payments, refunds and risk alerts bump the version, so the next poll
+    recomputes. Only one poll per merchant recomputes at a time
+    (cache.add lock); concurrent polls get the last dashboard while it
+    runs, or wait briefly for the fresh one when there is none. Only the
+    poll that acquired the lock releases it.
+    """
+
+    TIMEOUT = 10                 # fresh entry TTL (seconds)
+    STALE_TIMEOUT = 300          # last known dashboard, served during recompute
+    LOCK_TIMEOUT = 10
+    LOCK_WAIT = 2
+    LOCK_POLL_INTERVAL = 0.05
+
+    def __init__(self, merchant):
+        self.merchant = merchant
+        self.user_id = merchant.user_id
 
     # ----------------------------------
-    # Suspicious Alerts
+    # Read-through
     # ----------------------------------
-    def suspicious_alerts(self):
-        return AuditLog.objects.filter(
-            user=self.user,
-            action__icontains="RISK"
-        ).order_by("-created_at")[:5]
+    def get(self):
+        version = self._version()
+        key = self._key(version)
+
+        data = cache.get(key)
+        if data is not None:
+            return data
+
+        lock = f"{key}:lock"
+        locked = cache.add(lock, 1, self.LOCK_TIMEOUT)
+
+        if not locked:
+            stale = cache.get(self._stale_key())
+            if stale is not None:
+                return stale
+
+            deadline = time.monotonic() + self.LOCK_WAIT
+            while time.monotonic() < deadline:
+                time.sleep(self.LOCK_POLL_INTERVAL)
+                data = cache.get(key)
+                if data is not None:
+                    return data
+
+        # Owner, or the wait expired: recompute, but only the owner
+        # releases the lock
+        try:
+            data = MerchantDashboardService(self.merchant).get_dashboard_data()
+            cache.set(key, data, self.TIMEOUT)
+            cache.set(self._stale_key(), data, self.STALE_TIMEOUT)
+        finally:
+            if locked:
+                cache.delete(lock)
+
+        return data
 
     # ----------------------------------
-    # IA Score (simple example)
+    # Invalidation
     # ----------------------------------
-    def ai_score(self):
-        total_tx = self.total_transactions()
-        if total_tx == 0:
-            return 50  # neutral
+    @classmethod
+    def invalidate(cls, user_ids):
+        """
+        Bump the version of each merchant (by merchant user id)
+        once the current transaction commits.
+        """
 
-        suspicious = AuditLog.objects.filter(
-            user=self.user,
-            action__icontains="RISK"
-        ).count()
+        def bump():
+            for user_id in user_ids:
+                key = cls._version_key(user_id)
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    cache.set(key, 1, None)
 
-        score = max(0, 100 - (suspicious * 5))
-        return score
+        db_transaction.on_commit(bump)
 
     # ----------------------------------
-    # Global Dashboard Data
+    # Helpers
     # ----------------------------------
-    def get_dashboard_data(self):
-        return {
-            "total_revenue": self.total_revenue(),
-            "today_revenue": self.today_revenue(),
-            "monthly_revenue": self.monthly_revenue(),
-            "total_transactions": self.total_transactions(),
-            "ai_score": self.ai_score(),
-            "recent_transactions": self.recent_transactions(),
-            "alerts": self.suspicious_alerts(),
-        }
\ No newline at end of file
+    def _version(self):
+        version = cache.get(self._version_key(self.user_id))
+
+        if version is None:
+            cache.add(self._version_key(self.user_id), 1, None)
+            version = cache.get(self._version_key(self.user_id), 1)
+
+        return version
+
+    def _key(self, version):
+        return f"merchants:dashboard:{self.user_id}:{version}"
+
+    def _stale_key(self):
+        return f"merchants:dashboard:{self.user_id}:last"
+
+    @staticmethod
+    def _version_key(user_id):
+        return f"merchants:dashboard:{user_id}:version"
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.merchants.rollups import MerchantRevenueRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild daily merchant revenue rollups from confirmed payments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--merchant",
+            action="append",
+            dest="merchants",
+            help="Only rebuild this merchant profile id (repeatable)."
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Only rebuild the last N days."
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["days"]:
+            since = timezone.localdate() - timedelta(days=options["days"] - 1)
+
+        rows = MerchantRevenueRollup().backfill(
+            merchant_ids=options["merchants"],
+            since=since
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} merchant daily rows."))
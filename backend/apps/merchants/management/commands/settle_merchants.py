@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.merchants.settlement import SettlementEngine
+
+
+class Command(BaseCommand):
+    help = "Settle confirmed merchant payments and print payout instructions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            help="Last day of the settlement period (YYYY-MM-DD), defaults to yesterday."
+        )
+
+    def handle(self, *args, **options):
+        period_end = None
+        if options["date"]:
+            period_end = parse_date(options["date"])
+            if period_end is None:
+                raise CommandError("--date must be YYYY-MM-DD")
+
+        summary = SettlementEngine(period_end).run()
+
+        self.stdout.write(json.dumps(summary["payouts"], indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Settled {summary['settlements']} merchants "
+            f"({summary['transactions']} payments, net {summary['net_amount']}, "
+            f"{summary['on_hold']} on hold)."
+        ))
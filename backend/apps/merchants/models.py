@@ -147,15 +147,27 @@ class MerchantProfile(models.Model):
         self.ai_score = max(0, min(100, score))
         self.save(update_fields=["ai_score"])
 
+    # Counters are updated with F() expressions (or buffered),
+    # in-memory values are not refreshed
     def increase_volume(self, amount: Decimal):
-        self.total_volume += amount
-        self.total_transactions += 1
-        self.save(update_fields=["total_volume", "total_transactions"])
+        from apps.transactions.counters import ProfileCounters
+
+        ProfileCounters().add(
+            "merchants.MerchantProfile",
+            self.pk,
+            total_volume=amount,
+            total_transactions=1
+        )
 
     def apply_commission(self, amount: Decimal) -> Decimal:
+        from apps.transactions.counters import ProfileCounters
+
         commission = (amount * self.commission_rate) / 100
-        self.total_commission_paid += commission
-        self.save(update_fields=["total_commission_paid"])
+        ProfileCounters().add(
+            "merchants.MerchantProfile",
+            self.pk,
+            total_commission_paid=commission
+        )
         return commission
 
     def check_risk_auto_freeze(self):
@@ -193,4 +205,133 @@ class MerchantWallet(models.Model):
         unique_together = ("merchant", "network")
 
     def __str__(self):
-        return f"{self.merchant.business_name} - {self.network}"
\ No newline at end of file
+        return f"{self.merchant.business_name} - {self.network}"
+
+
+# --------------------------------------------
+# DAILY REVENUE ROLLUP
+# --------------------------------------------
+class MerchantDailyStats(models.Model):
+    """
+    Confirmed merchant payments per merchant and day,
+    maintained incrementally by the transaction state machine
+    """
+
+    merchant = models.ForeignKey(
+        MerchantProfile,
+        on_delete=models.CASCADE,
+        related_name="daily_stats"
+    )
+
+    date = models.DateField()
+
+    transaction_count = models.PositiveIntegerField(default=0)
+    volume = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        default=Decimal("0")
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["merchant", "date"],
+                name="unique_merchant_daily_stats"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} - {self.date}"
+
+
+class MerchantHourlyStats(models.Model):
+    """
+    Hourly companion of MerchantDailyStats, used for hour-bucketed charts
+    """
+
+    merchant = models.ForeignKey(
+        MerchantProfile,
+        on_delete=models.CASCADE,
+        related_name="hourly_stats"
+    )
+
+    hour = models.DateTimeField()
+
+    transaction_count = models.PositiveIntegerField(default=0)
+    volume = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        default=Decimal("0")
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["merchant", "hour"],
+                name="unique_merchant_hourly_stats"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} - {self.hour}"
+
+
+
+# --------------------------------------------
+# SETTLEMENTS
+# --------------------------------------------
+SETTLEMENT_STATUS_CHOICES = (
+    ("pending", "Pending payout"),
+    ("on_hold", "On hold (no default wallet)"),
+    ("paid", "Paid"),
+)
+
+
+class MerchantSettlement(models.Model):
+    """
+    Ledger entry settling a merchant's confirmed payments for a period,
+    with the payout instruction to its default wallet
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    merchant = models.ForeignKey(
+        MerchantProfile,
+        on_delete=models.CASCADE,
+        related_name="settlements"
+    )
+
+    batch_id = models.UUIDField(db_index=True)
+
+    period_end = models.DateField()
+    currency = models.CharField(max_length=10)
+
+    transaction_count = models.PositiveIntegerField(default=0)
+    gross_volume = models.DecimalField(max_digits=24, decimal_places=6)
+    commission_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    commission = models.DecimalField(max_digits=24, decimal_places=6)
+    net_amount = models.DecimalField(max_digits=24, decimal_places=6)
+
+    # Payout instruction
+    payout_network = models.CharField(max_length=20, blank=True, null=True)
+    payout_address = models.CharField(max_length=255, blank=True, null=True)
+
+    status = models.CharField(
+        max_length=20,
+        choices=SETTLEMENT_STATUS_CHOICES,
+        default="pending"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["merchant", "period_end"]),
+        ]
+
+    def __str__(self):
+        return f"{self.merchant_id} - {self.period_end} - {self.net_amount} {self.currency}"
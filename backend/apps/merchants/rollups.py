@@ -0,0 +1,183 @@
+# backend/apps/merchants/rollups.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest, TruncDate, TruncHour
+from django.utils import timezone
+
+from apps.transactions.models import (
+    Transaction,
+    TransactionStatus,
+    MERCHANT_TRANSACTION_TYPES,
+)
+
+from .models import MerchantProfile, MerchantDailyStats, MerchantHourlyStats
+
+
+class MerchantRevenueRollup:
+    """
+    Daily and hourly confirmed revenue per merchant.
+
+    A merchant payment is a QR / merchant payment whose receiver owns
+    a MerchantProfile. Rows are adjusted with F() expressions when a
+    payment enters or leaves CONFIRMED, and can be rebuilt from the
+    transaction table with backfill(). Decrements are clamped at zero:
+    a payment confirmed before the rollup existed only leaves it once
+    backfill_merchant_stats has been run.
+    """
+
+    # ----------------------------------
+    # Incremental maintenance
+    # ----------------------------------
+    def record_transitions(self, transactions, previous_statuses):
+        changed = []
+
+        for transaction in transactions:
+            if transaction.type not in MERCHANT_TRANSACTION_TYPES:
+                continue
+
+            was_confirmed = previous_statuses[transaction.pk] == TransactionStatus.CONFIRMED
+            is_confirmed = transaction.status == TransactionStatus.CONFIRMED
+
+            if was_confirmed != is_confirmed:
+                changed.append((transaction, 1 if is_confirmed else -1))
+
+        if not changed:
+            return
+
+        merchants = dict(
+            MerchantProfile.objects.filter(
+                user_id__in={transaction.receiver_id for transaction, _ in changed}
+            ).values_list("user_id", "id")
+        )
+
+        # Dashboards of the merchants whose revenue moved
+        from .dashboard import MerchantDashboardCache
+
+        MerchantDashboardCache.invalidate([
+            transaction.receiver_id
+            for transaction, _ in changed
+            if transaction.receiver_id in merchants
+        ])
+
+        for model, field, period_of in self.periods():
+            deltas = defaultdict(lambda: {"transaction_count": 0, "volume": Decimal("0")})
+
+            for transaction, sign in changed:
+                merchant_id = merchants.get(transaction.receiver_id)
+                if merchant_id is None:
+                    continue
+
+                delta = deltas[(merchant_id, period_of(transaction.created_at))]
+                delta["transaction_count"] += sign
+                delta["volume"] += sign * transaction.amount
+
+            self._apply(model, field, deltas)
+
+    # ----------------------------------
+    # Backfill
+    # ----------------------------------
+    def backfill(self, merchant_ids=None, since=None):
+        """
+        Recompute daily and hourly rows from confirmed payments.
+        Returns the number of daily rows written.
+        """
+        payments = Transaction.objects.filter(
+            status=TransactionStatus.CONFIRMED,
+            type__in=MERCHANT_TRANSACTION_TYPES,
+            receiver__merchant_profile__isnull=False
+        )
+
+        if merchant_ids is not None:
+            payments = payments.filter(receiver__merchant_profile__in=merchant_ids)
+
+        if since is not None:
+            payments = payments.filter(created_at__date__gte=since)
+
+        tzinfo = timezone.get_current_timezone()
+        written = {}
+
+        with db_transaction.atomic():
+            for model, field, truncate, since_lookup in [
+                (MerchantDailyStats, "date", TruncDate("created_at", tzinfo=tzinfo), "date__gte"),
+                (MerchantHourlyStats, "hour", TruncHour("created_at", tzinfo=tzinfo), "hour__date__gte"),
+            ]:
+                existing = model.objects.all()
+
+                if merchant_ids is not None:
+                    existing = existing.filter(merchant_id__in=merchant_ids)
+
+                if since is not None:
+                    existing = existing.filter(**{since_lookup: since})
+
+                rows = payments.values(
+                    merchant_id=F("receiver__merchant_profile"),
+                    period=truncate
+                ).annotate(
+                    count=Count("id"),
+                    total=Sum("amount")
+                ).order_by()
+
+                stats = [
+                    model(
+                        merchant_id=row["merchant_id"],
+                        transaction_count=row["count"],
+                        volume=row["total"] or Decimal("0"),
+                        **{field: row["period"]}
+                    )
+                    for row in rows
+                ]
+
+                existing.delete()
+                model.objects.bulk_create(stats, batch_size=1000)
+
+                written[model] = len(stats)
+
+        return written[MerchantDailyStats]
+
+    # ----------------------------------
+    # Helpers
+    # ----------------------------------
+    @classmethod
+    def periods(cls):
+        return [
+            (MerchantDailyStats, "date", cls.day_of),
+            (MerchantHourlyStats, "hour", cls.hour_of),
+        ]
+
+    @staticmethod
+    def day_of(moment):
+        return timezone.localtime(moment).date()
+
+    @staticmethod
+    def hour_of(moment):
+        return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+    @staticmethod
+    def _apply(model, field, deltas):
+        if not deltas:
+            return
+
+        model.objects.bulk_create(
+            [
+                model(merchant_id=merchant_id, **{field: period})
+                for merchant_id, period in deltas
+            ],
+            ignore_conflicts=True
+        )
+
+        for (merchant_id, period), delta in deltas.items():
+            changes = {
+                name: Greatest(F(name) + value, 0, output_field=model._meta.get_field(name))
+                for name, value in delta.items()
+                if value
+            }
+
+            if changes:
+                model.objects.filter(
+                    merchant_id=merchant_id,
+                    **{field: period}
+                ).update(updated_at=timezone.now(), **changes)
@@ -0,0 +1,213 @@
+# backend/apps/merchants/settlement.py
+
+import uuid
+from datetime import datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from apps.transactions.models import (
+    Transaction,
+    TransactionStatus,
+    MERCHANT_TRANSACTION_TYPES,
+)
+
+from .models import MerchantSettlement, MerchantWallet
+
+
+AMOUNT_QUANTUM = Decimal("0.000001")     # matches DecimalField(decimal_places=6)
+
+
+class SettlementEngine:
+    """
+    Nightly merchant settlement in one pass over all merchants.
+
+    1. One grouped query sums unsettled confirmed merchant payments per
+       merchant and currency, up to the end of the period.
+    2. Commission and net amounts are computed with Decimal and
+       quantized once per group (not per payment).
+    3. Settlements (ledger entries + payout instruction to the default
+       MerchantWallet) are bulk-inserted.
+    4. One UPDATE links the settled payments to their settlement.
+    5. Totals are re-aggregated from the linked payments, since the
+       grouped SELECT and the UPDATE do not share a snapshot under
+       READ COMMITTED. A payment refunded in between is left out of
+       both the link and the amounts.
+
+    Payments are snapshotted by updated_at, so a payment confirmed
+    while the run is in progress is left for the next run.
+    """
+
+    def __init__(self, period_end=None):
+        # Settle everything up to the end of yesterday by default
+        self.period_end = period_end or timezone.localdate() - timedelta(days=1)
+        self.cutoff = timezone.make_aware(
+            datetime.combine(self.period_end + timedelta(days=1), time.min)
+        )
+
+    # ----------------------------------
+    # Run
+    # ----------------------------------
+    def run(self):
+        snapshot = timezone.now()
+        batch_id = uuid.uuid4()
+
+        with db_transaction.atomic():
+            groups = list(
+                self._payments(snapshot).values(
+                    "currency",
+                    merchant_id=F("receiver__merchant_profile"),
+                    rate=F("receiver__merchant_profile__commission_rate"),
+                ).annotate(
+                    count=Count("id"),
+                    gross=Sum("amount")
+                ).order_by()
+            )
+
+            if not groups:
+                return self._summary(batch_id, [])
+
+            wallets = {
+                wallet["merchant_id"]: wallet
+                for wallet in MerchantWallet.objects.filter(
+                    merchant_id__in={group["merchant_id"] for group in groups},
+                    is_default=True
+                ).values("merchant_id", "network", "wallet_address")
+            }
+
+            settlements = [
+                self._settlement(batch_id, group, wallets.get(group["merchant_id"]))
+                for group in groups
+            ]
+
+            MerchantSettlement.objects.bulk_create(settlements, batch_size=1000)
+
+            self._payments(snapshot).update(
+                settlement=Subquery(
+                    MerchantSettlement.objects.filter(
+                        batch_id=batch_id,
+                        merchant__user_id=OuterRef("receiver_id"),
+                        currency=OuterRef("currency")
+                    ).values("id")[:1]
+                )
+            )
+
+            settlements = self._reconcile(settlements)
+
+        return self._summary(batch_id, settlements)
+
+    # ----------------------------------
+    # Payout instructions
+    # ----------------------------------
+    @staticmethod
+    def payout_instructions(settlements):
+        return [
+            {
+                "settlement_id": str(settlement.id),
+                "merchant_id": str(settlement.merchant_id),
+                "network": settlement.payout_network,
+                "address": settlement.payout_address,
+                "amount": str(settlement.net_amount),
+                "currency": settlement.currency,
+            }
+            for settlement in settlements
+            if settlement.status == "pending"
+        ]
+
+    # ----------------------------------
+    # Helpers
+    # ----------------------------------
+    def _payments(self, snapshot):
+        return Transaction.objects.filter(
+            status=TransactionStatus.CONFIRMED,
+            type__in=MERCHANT_TRANSACTION_TYPES,
+            settlement__isnull=True,
+            created_at__lt=self.cutoff,
+            updated_at__lte=snapshot,
+            receiver__merchant_profile__isnull=False
+        )
+
+    def _settlement(self, batch_id, group, wallet):
+        settlement = MerchantSettlement(
+            merchant_id=group["merchant_id"],
+            batch_id=batch_id,
+            period_end=self.period_end,
+            currency=group["currency"],
+            commission_rate=group["rate"],
+            payout_network=wallet["network"] if wallet else None,
+            payout_address=wallet["wallet_address"] if wallet else None,
+            status="pending" if wallet else "on_hold",
+        )
+        self._set_totals(settlement, group["count"], group["gross"])
+
+        return settlement
+
+    @staticmethod
+    def _set_totals(settlement, count, gross):
+        gross = gross or Decimal("0")
+
+        commission = (gross * settlement.commission_rate / Decimal("100")).quantize(
+            AMOUNT_QUANTUM, rounding=ROUND_HALF_UP
+        )
+
+        settlement.transaction_count = count
+        settlement.gross_volume = gross
+        settlement.commission = commission
+        settlement.net_amount = (gross - commission).quantize(AMOUNT_QUANTUM, rounding=ROUND_HALF_UP)
+
+    def _reconcile(self, settlements):
+        """
+        Align each settlement with the payments its UPDATE actually linked.
+        Settlements left without payments are deleted.
+        """
+        linked = {
+            row["settlement"]: row
+            for row in Transaction.objects.filter(
+                settlement__in=[settlement.id for settlement in settlements]
+            ).values("settlement").annotate(
+                count=Count("id"),
+                gross=Sum("amount")
+            ).order_by()
+        }
+
+        kept, changed, empty = [], [], []
+
+        for settlement in settlements:
+            row = linked.get(settlement.id)
+
+            if row is None:
+                empty.append(settlement.id)
+                continue
+
+            if (row["count"], row["gross"]) != (settlement.transaction_count, settlement.gross_volume):
+                self._set_totals(settlement, row["count"], row["gross"])
+                changed.append(settlement)
+
+            kept.append(settlement)
+
+        if empty:
+            MerchantSettlement.objects.filter(id__in=empty).delete()
+
+        if changed:
+            MerchantSettlement.objects.bulk_update(
+                changed,
+                ["transaction_count", "gross_volume", "commission", "net_amount"],
+                batch_size=1000
+            )
+
+        return kept
+
+    def _summary(self, batch_id, settlements):
+        return {
+            "batch_id": str(batch_id),
+            "period_end": self.period_end.isoformat(),
+            "settlements": len(settlements),
+            "transactions": sum(s.transaction_count for s in settlements),
+            "gross_volume": sum((s.gross_volume for s in settlements), Decimal("0")),
+            "commission": sum((s.commission for s in settlements), Decimal("0")),
+            "net_amount": sum((s.net_amount for s in settlements), Decimal("0")),
+            "on_hold": sum(1 for s in settlements if s.status == "on_hold"),
+            "payouts": self.payout_instructions(settlements),
+        }
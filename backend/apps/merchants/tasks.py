@@ -0,0 +1,36 @@
+# backend/apps/merchants/tasks.py
+
+import logging
+
+from celery import shared_task
+
+from .settlement import SettlementEngine
+
+logger = logging.getLogger(__name__)
+
+
+# --------------------------------------------
+# NIGHTLY SETTLEMENT
+# --------------------------------------------
+@shared_task
+def settle_merchants():
+    """
+    Settle all merchants' confirmed payments up to the end of yesterday.
+    """
+    summary = SettlementEngine().run()
+
+    logger.info(
+        "Settlement %s: %s merchants, %s payments, net %s",
+        summary["batch_id"],
+        summary["settlements"],
+        summary["transactions"],
+        summary["net_amount"]
+    )
+
+    return {
+        "batch_id": summary["batch_id"],
+        "settlements": summary["settlements"],
+        "transactions": summary["transactions"],
+        "net_amount": str(summary["net_amount"]),
+        "on_hold": summary["on_hold"],
+    }
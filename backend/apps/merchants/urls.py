@@ -4,6 +4,7 @@ from .views import (
     MerchantProfileView,
     UpdateMerchantSettingsView,
     MerchantDashboardView,
+    MerchantRevenueSeriesView,
     AddMerchantWalletView,
     MerchantWalletListView,
 )
@@ -13,6 +14,7 @@ urlpatterns = [
     path("profile/", MerchantProfileView.as_view()),
     path("update/", UpdateMerchantSettingsView.as_view()),
     path("dashboard/", MerchantDashboardView.as_view()),
+    path("dashboard/series/", MerchantRevenueSeriesView.as_view()),
     path("wallet/add/", AddMerchantWalletView.as_view()),
     path("wallets/", MerchantWalletListView.as_view()),
 ]
\ No newline at end of file
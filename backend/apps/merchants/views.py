@@ -6,9 +6,12 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date, parse_http_date_safe
 
 from .models import MerchantProfile, MerchantWallet
-from .dashboard import MerchantDashboardService
+from .dashboard import MerchantDashboardCache
+from .series import MerchantRevenueSeries
 from apps.audit.logger import AuditLogger
 
 
@@ -99,7 +102,7 @@ class UpdateMerchantSettingsView(APIView):
             "business_category", merchant.business_category
         )
 
-        merchant.save()
+        merchant.save(update_fields=["description", "business_category", "updated_at"])
 
         AuditLogger.log_event(
             action="MERCHANT_UPDATED",
@@ -124,12 +127,75 @@ class MerchantDashboardView(APIView):
             user=request.user
         )
 
-        dashboard = MerchantDashboardService(request.user)
-        data = dashboard.get_dashboard_data()
+        data = MerchantDashboardCache(merchant).get()
 
         return Response(data)
 
 
+# -------------------------------------------------
+# MERCHANT REVENUE TIME SERIES
+# -------------------------------------------------
+class MerchantRevenueSeriesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        merchant = get_object_or_404(
+            MerchantProfile,
+            user=request.user
+        )
+
+        try:
+            series = MerchantRevenueSeries(
+                merchant,
+                interval=request.query_params.get("interval", "day"),
+                start=self._date_param(request, "start"),
+                end=self._date_param(request, "end")
+            )
+        except ValueError as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        etag, last_modified = series.version()
+
+        if self._not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(series.compute())
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+
+        return response
+
+    @staticmethod
+    def _date_param(request, name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"{name} must be a YYYY-MM-DD date")
+
+        return day
+
+    @staticmethod
+    def _not_modified(request, etag, last_modified):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match:
+            return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        if since is not None and last_modified is not None:
+            return int(last_modified.timestamp()) <= since
+
+        return False
+
+
 # -------------------------------------------------
 # ADD WALLET
 # -------------------------------------------------
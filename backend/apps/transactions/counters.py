@@ -0,0 +1,324 @@
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+import redis
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction as db_transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import TransactionStatus, MERCHANT_TRANSACTION_TYPES
+from .velocity import MICRO_UNITS, get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------------------
+# CONFIGURATION
+# -----------------------------------------
+
+COUNTER_FIELDS = {
+    "merchants.MerchantProfile": [
+        "total_volume",
+        "total_transactions",
+        "total_commission_paid",
+    ],
+    "agents.AgentProfile": [
+        "total_volume",
+        "total_transactions",
+        "successful_transactions",
+        "failed_transactions",
+        "dispute_count",
+    ],
+}
+
+DIRTY_KEY = "counters:dirty"
+FLUSH_BATCH_SIZE = 500
+
+
+# -----------------------------------------
+# PROFILE COUNTERS
+# -----------------------------------------
+
+class ProfileCounters:
+    """
+    Lost-update-free statistics counters on merchant and agent profiles.
+
+    Direct mode applies each delta as one UPDATE ... SET f = f + delta.
+    Buffered mode (PROFILE_COUNTERS_BUFFERED) accumulates deltas in a
+    Redis hash per profile once the surrounding transaction commits, and
+    flush() folds them into the database in batches, so a hot merchant
+    takes one row update every few seconds instead of one per payment.
+    """
+
+    def __init__(self, client=None):
+        self.buffered = getattr(settings, "PROFILE_COUNTERS_BUFFERED", False)
+        self.client = client
+
+        if self.buffered and self.client is None:
+            self.client = get_redis_client()
+
+    # ------------------------------
+    # WRITES
+    # ------------------------------
+
+    def add(self, label, pk, **deltas):
+        """
+        Add deltas to counter fields, e.g.
+        add("merchants.MerchantProfile", pk, total_volume=amount, total_transactions=1)
+        """
+        deltas = {field: value for field, value in deltas.items() if value}
+        if not deltas:
+            return
+
+        unknown = set(deltas) - set(COUNTER_FIELDS[label])
+        if unknown:
+            raise ValueError(f"Not a counter field of {label}: {', '.join(sorted(unknown))}")
+
+        if not self.buffered:
+            self._apply(label, {pk: deltas})
+            return
+
+        db_transaction.on_commit(lambda: self._buffer(label, pk, deltas))
+
+    # ------------------------------
+    # FLUSH (BUFFERED MODE)
+    # ------------------------------
+
+    def flush(self, batch_size=FLUSH_BATCH_SIZE):
+        """
+        Move buffered deltas into the database.
+        Returns the number of profiles updated.
+        """
+        if self.client is None:
+            return 0
+
+        flushed = 0
+
+        while True:
+            members = self.client.spop(DIRTY_KEY, batch_size)
+            if not members:
+                break
+
+            # Read-and-reset every hash atomically
+            pipe = self.client.pipeline(transaction=True)
+            for member in members:
+                key = self._buffer_key(member.decode())
+                pipe.hgetall(key)
+                pipe.delete(key)
+            results = pipe.execute()[::2]
+
+            pending = defaultdict(dict)
+            for member, values in zip(members, results):
+                label, pk = member.decode().rsplit(":", 1)
+                if values:
+                    pending[label][pk] = {
+                        field.decode(): self._from_buffer(label, field.decode(), int(value))
+                        for field, value in values.items()
+                    }
+
+            try:
+                with db_transaction.atomic():
+                    for label, rows in pending.items():
+                        self._apply(label, rows)
+            except Exception:
+                # Put the deltas back so the next flush retries them
+                for label, rows in pending.items():
+                    for pk, deltas in rows.items():
+                        self._buffer(label, pk, deltas)
+                raise
+
+            flushed += sum(len(rows) for rows in pending.values())
+
+        return flushed
+
+    # ------------------------------
+    # HELPERS
+    # ------------------------------
+
+    def _buffer(self, label, pk, deltas):
+        member = f"{label}:{pk}"
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for field, value in deltas.items():
+                pipe.hincrby(self._buffer_key(member), field, self._to_buffer(label, field, value))
+            pipe.sadd(DIRTY_KEY, member)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Counter buffer unavailable, writing directly: %s", e)
+            self._apply(label, {pk: deltas})
+
+    @staticmethod
+    def _apply(label, rows):
+        """
+        rows: {pk: {field: delta}}
+        """
+        model = apps.get_model(label)
+        has_updated_at = any(field.name == "updated_at" for field in model._meta.fields)
+
+        for pk, deltas in rows.items():
+            changes = {field: F(field) + value for field, value in deltas.items()}
+            if has_updated_at:
+                changes["updated_at"] = timezone.now()
+
+            model.objects.filter(pk=pk).update(**changes)
+
+    @staticmethod
+    def _is_decimal(label, field):
+        return isinstance(apps.get_model(label)._meta.get_field(field), models.DecimalField)
+
+    def _to_buffer(self, label, field, value):
+        if self._is_decimal(label, field):
+            return int(Decimal(value) * MICRO_UNITS)
+        return int(value)
+
+    def _from_buffer(self, label, field, value):
+        if self._is_decimal(label, field):
+            return Decimal(value) / MICRO_UNITS
+        return value
+
+    @staticmethod
+    def _buffer_key(member):
+        return f"counters:{member}"
+
+
+# -----------------------------------------
+# TRANSACTION LIFECYCLE → PROFILE COUNTERS
+# -----------------------------------------
+
+def record_profile_transitions(transactions, previous_statuses):
+    """
+    Merchant volume/commission on confirmed merchant payments (reverted
+    when they leave CONFIRMED) and agent success/failure/dispute counts.
+    """
+    MerchantProfile = apps.get_model("merchants", "MerchantProfile")
+    counters = ProfileCounters()
+
+    payments = []
+    for transaction in transactions:
+        previous = previous_statuses[transaction.pk]
+        status = transaction.status
+
+        if transaction.type in MERCHANT_TRANSACTION_TYPES:
+            was_confirmed = previous == TransactionStatus.CONFIRMED
+            is_confirmed = status == TransactionStatus.CONFIRMED
+            if was_confirmed != is_confirmed:
+                payments.append((transaction, 1 if is_confirmed else -1))
+
+        if transaction.agent_id and previous != status:
+            if status == TransactionStatus.CONFIRMED:
+                counters.add(
+                    "agents.AgentProfile",
+                    transaction.agent_id,
+                    total_volume=transaction.amount,
+                    total_transactions=1,
+                    successful_transactions=1
+                )
+            elif status == TransactionStatus.FAILED:
+                counters.add(
+                    "agents.AgentProfile",
+                    transaction.agent_id,
+                    total_transactions=1,
+                    failed_transactions=1
+                )
+            elif status == TransactionStatus.DISPUTED:
+                counters.add(
+                    "agents.AgentProfile",
+                    transaction.agent_id,
+                    dispute_count=1
+                )
+
+    if not payments:
+        return
+
+    merchants = {
+        user_id: (pk, rate)
+        for user_id, pk, rate in MerchantProfile.objects.filter(
+            user_id__in={transaction.receiver_id for transaction, _ in payments}
+        ).values_list("user_id", "id", "commission_rate")
+    }
+
+    for transaction, sign in payments:
+        if transaction.receiver_id not in merchants:
+            continue
+
+        merchant_id, rate = merchants[transaction.receiver_id]
+        counters.add(
+            "merchants.MerchantProfile",
+            merchant_id,
+            total_volume=sign * transaction.amount,
+            total_transactions=sign,
+            total_commission_paid=sign * (transaction.amount * rate) / 100
+        )
+
+
+# -----------------------------------------
+# AGENT COUNTERS REBUILD
+# -----------------------------------------
+
+def rebuild_agent_counters(agent_ids=None):
+    """
+    Recompute agent profile counters from the transaction table.
+    Returns the number of profiles written.
+
+    Run once when deploying the counters: transitions before them were
+    never counted, and every agent score reads these counters. Statuses
+    carry no history, so a transaction counts as successful when it is
+    CONFIRMED or REFUNDED (only confirmed payments are refunded), failed
+    when FAILED and disputed when DISPUTED.
+
+    Profiles are locked before the aggregate, like UserStatsRollup.rebuild:
+    a concurrent transition applies its F() delta on top of the rebuilt
+    values. Buffered deltas are flushed first.
+    """
+    AgentProfile = apps.get_model("agents", "AgentProfile")
+
+    ProfileCounters().flush()
+
+    successful = Q(transaction__status__in=[TransactionStatus.CONFIRMED, TransactionStatus.REFUNDED])
+    failed = Q(transaction__status=TransactionStatus.FAILED)
+
+    profiles = AgentProfile.objects.all()
+    if agent_ids is not None:
+        profiles = profiles.filter(pk__in=agent_ids)
+
+    with db_transaction.atomic():
+        locked = list(profiles.select_for_update().values_list("pk", flat=True))
+
+        totals = {
+            row["pk"]: row
+            for row in AgentProfile.objects.filter(pk__in=locked).values("pk").annotate(
+                total_volume=Sum("transaction__amount", filter=successful),
+                successful_transactions=Count("transaction", filter=successful),
+                failed_transactions=Count("transaction", filter=failed),
+                dispute_count=Count(
+                    "transaction",
+                    filter=Q(transaction__status=TransactionStatus.DISPUTED)
+                ),
+            ).order_by()
+        }
+
+        now = timezone.now()
+        rows = [
+            AgentProfile(
+                pk=pk,
+                total_volume=row["total_volume"] or Decimal("0"),
+                total_transactions=row["successful_transactions"] + row["failed_transactions"],
+                successful_transactions=row["successful_transactions"],
+                failed_transactions=row["failed_transactions"],
+                dispute_count=row["dispute_count"],
+                updated_at=now,
+            )
+            for pk, row in totals.items()
+        ]
+
+        AgentProfile.objects.bulk_update(
+            rows,
+            [*COUNTER_FIELDS["agents.AgentProfile"], "updated_at"],
+            batch_size=FLUSH_BATCH_SIZE
+        )
+
+    return len(rows)
@@ -0,0 +1,32 @@
+import json
+import logging
+
+from django.utils import timezone
+
+logger = logging.getLogger("fubapay.transactions.events")
+
+
+# -----------------------------------------
+# TRANSACTION EVENTS
+# -----------------------------------------
+
+def emit_transaction_event(event, transaction, **payload):
+    """
+    Emits a structured lifecycle event for a transaction.
+
+    Used for audit trails of intermediate states (e.g. PENDING before
+    the risk decision) that are no longer written to the database.
+    """
+
+    record = {
+        "event": event,
+        "transaction_id": str(transaction.id),
+        "reference": transaction.reference,
+        "status": transaction.status,
+        "timestamp": timezone.now().isoformat(),
+        **payload
+    }
+
+    logger.info(json.dumps(record, default=str), extra={"event": record})
+
+    return record
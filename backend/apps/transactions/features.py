@@ -0,0 +1,146 @@
+from decimal import Decimal
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import (
+    BooleanField,
+    Count,
+    Exists,
+    FilteredRelation,
+    Q,
+    Sum,
+    Value,
+)
+from django.utils import timezone
+
+from apps.agents.models import AgentProfile
+from .models import VOLUME_STATUSES
+from .velocity import (
+    VelocityCounter,
+    SCOPE_SENDER,
+    WINDOW_1H,
+    WINDOW_DAY,
+)
+
+User = get_user_model()
+
+
+# -----------------------------------------
+# SENDER FEATURE EXTRACTOR
+# -----------------------------------------
+
+class RiskFeatureExtractor:
+    """
+    Pulls every sender-level feature used by RiskEngine
+    in a single conditional-aggregation query.
+
+    When velocity counters are enabled the windowed aggregates come
+    from Redis and only the account/agent attributes hit the database.
+    Otherwise the sender's recent transactions are joined through a
+    FilteredRelation bounded on created_at, so the scan stays on the
+    (sender, created_at) index whatever the history size.
+    """
+
+    def __init__(self, transaction, counters=None):
+        self.transaction = transaction
+        self.counters = counters or VelocityCounter()
+
+    # ------------------------------
+    # PUBLIC ENTRY POINT
+    # ------------------------------
+
+    def extract(self, now=None):
+        now = now or timezone.now()
+
+        if self.counters.enabled:
+            return self._extract_with_counters(now)
+
+        return self._extract_from_database(now)
+
+    # ------------------------------
+    # VELOCITY COUNTERS
+    # ------------------------------
+
+    def _extract_with_counters(self, now):
+        velocity = self.counters.snapshot(
+            SCOPE_SENDER,
+            self.transaction.sender_id,
+            [WINDOW_1H, WINDOW_DAY],
+            now=now
+        )
+
+        row = (
+            User.objects
+            .filter(pk=self.transaction.sender_id)
+            .annotate(agent_flagged=self._agent_flagged())
+            .values("date_joined", "agent_flagged")
+            .get()
+        )
+
+        return {
+            "daily_volume": velocity[WINDOW_DAY]["volume"],
+            "hourly_count": velocity[WINDOW_1H]["count"],
+            "account_age_days": (now - row["date_joined"]).days,
+            "agent_flagged": bool(row["agent_flagged"]),
+        }
+
+    # ------------------------------
+    # SINGLE AGGREGATE QUERY
+    # ------------------------------
+
+    def _extract_from_database(self, now):
+
+        start_of_day = timezone.localtime(now).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        one_hour_ago = now - timedelta(hours=1)
+        window_start = min(start_of_day, one_hour_ago)
+
+        row = (
+            User.objects
+            .filter(pk=self.transaction.sender_id)
+            .annotate(
+                recent=FilteredRelation(
+                    "sent_transactions",
+                    condition=Q(sent_transactions__created_at__gte=window_start)
+                ),
+                agent_flagged=self._agent_flagged(),
+            )
+            .values("date_joined", "agent_flagged")
+            .annotate(
+                daily_volume=Sum(
+                    "recent__amount",
+                    filter=Q(
+                        recent__created_at__gte=start_of_day,
+                        recent__status__in=VOLUME_STATUSES
+                    )
+                ),
+                hourly_count=Count(
+                    "recent__id",
+                    filter=Q(recent__created_at__gte=one_hour_ago)
+                ),
+            )
+            .get()
+        )
+
+        return {
+            "daily_volume": row["daily_volume"] or Decimal("0"),
+            "hourly_count": row["hourly_count"],
+            "account_age_days": (now - row["date_joined"]).days,
+            "agent_flagged": bool(row["agent_flagged"]),
+        }
+
+    # ------------------------------
+    # HELPERS
+    # ------------------------------
+
+    def _agent_flagged(self):
+        if not self.transaction.agent_id:
+            return Value(False, output_field=BooleanField())
+
+        return Exists(
+            AgentProfile.objects.filter(
+                pk=self.transaction.agent_id,
+                is_flagged=True
+            )
+        )
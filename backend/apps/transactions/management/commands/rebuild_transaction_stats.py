@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.transactions.stats import UserStatsRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user transaction stats from confirmed transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="Only rebuild this user id (repeatable)."
+        )
+
+    def handle(self, *args, **options):
+        rows = UserStatsRollup().rebuild(user_ids=options["users"])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} stats rows."))
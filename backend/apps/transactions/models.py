@@ -1,6 +1,7 @@
 import uuid
 from decimal import Decimal
 from django.db import models
+from django.db.models import Count, Q, Sum
 from django.conf import settings
 from django.utils import timezone
 
@@ -29,6 +30,18 @@ class TransactionType(models.TextChoices):
     P2P = "P2P", "Peer to Peer"
 
 
+MERCHANT_TRANSACTION_TYPES = [
+    TransactionType.QR_PAYMENT,
+    TransactionType.MERCHANT_PAYMENT,
+]
+
+# Statuses whose amount counts towards spent volume
+VOLUME_STATUSES = [
+    TransactionStatus.CONFIRMED,
+    TransactionStatus.PROCESSING,
+]
+
+
 class RiskLevel(models.TextChoices):
     LOW = "LOW", "Low"
     MEDIUM = "MEDIUM", "Medium"
@@ -66,6 +79,22 @@ class QRCode(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Merchant listing of live codes
+            models.Index(
+                fields=["merchant", "-created_at"],
+                condition=models.Q(is_active=True),
+                name="qr_active_by_merchant_idx"
+            ),
+            # Expiry sweeper
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(is_active=True, is_dynamic=True),
+                name="qr_expiring_idx"
+            ),
+        ]
+
     def is_valid(self):
         if not self.is_active:
             return False
@@ -73,10 +102,111 @@ class QRCode(models.Model):
             return False
         return True
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._invalidate_cache()
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        self._invalidate_cache(pk)
+        return result
+
+    def deactivate(self):
+        """
+        Deactivate without a full save and drop the cached resolution.
+        """
+        self.is_active = False
+        QRCode.objects.filter(pk=self.pk).update(is_active=False)
+        self._invalidate_cache()
+
+    def _invalidate_cache(self, pk=None):
+        from .qr_cache import QRCodeResolver
+
+        QRCodeResolver().invalidate([pk or self.pk])
+
     def __str__(self):
         return f"{self.label} - {self.merchant.user.email}"
 
 
+# -------------------------
+# WINDOWED AGGREGATES
+# -------------------------
+
+class TransactionQuerySet(models.QuerySet):
+    """
+    Shared query layer for risk, scoring and limit checks.
+
+    windowed() returns count, volume and a per-status breakdown for
+    several time windows in a single conditional-aggregation query,
+    so callers never load transactions just to add them up.
+    """
+
+    def for_sender(self, user_id):
+        return self.filter(sender_id=user_id)
+
+    def for_agent(self, agent_id):
+        return self.filter(agent_id=agent_id)
+
+    def for_merchant(self, user_id):
+        return self.filter(
+            receiver_id=user_id,
+            type__in=MERCHANT_TRANSACTION_TYPES
+        )
+
+    def windowed(self, windows, statuses=(), volume_statuses=VOLUME_STATUSES):
+        """
+        windows: {name: start datetime}
+        statuses: statuses to break down (count + summed amount)
+
+        Returns:
+        {
+            name: {
+                "count": int,
+                "volume": Decimal,      # amounts in volume_statuses
+                "statuses": {status: {"count": int, "volume": Decimal}},
+            }
+        }
+
+        The scan is bounded on the oldest window start.
+        """
+        if not windows:
+            return {}
+
+        aggregates = {}
+        for index, start in enumerate(windows.values()):
+            in_window = Q(created_at__gte=start)
+
+            aggregates[f"w{index}_count"] = Count("id", filter=in_window)
+            aggregates[f"w{index}_volume"] = Sum(
+                "amount", filter=in_window & Q(status__in=volume_statuses)
+            )
+
+            for position, status in enumerate(statuses):
+                in_status = in_window & Q(status=status)
+                aggregates[f"w{index}_s{position}_count"] = Count("id", filter=in_status)
+                aggregates[f"w{index}_s{position}_volume"] = Sum("amount", filter=in_status)
+
+        row = self.filter(
+            created_at__gte=min(windows.values())
+        ).aggregate(**aggregates)
+
+        return {
+            name: {
+                "count": row[f"w{index}_count"],
+                "volume": row[f"w{index}_volume"] or Decimal("0"),
+                "statuses": {
+                    status: {
+                        "count": row[f"w{index}_s{position}_count"],
+                        "volume": row[f"w{index}_s{position}_volume"] or Decimal("0"),
+                    }
+                    for position, status in enumerate(statuses)
+                },
+            }
+            for index, name in enumerate(windows)
+        }
+
+
 # -------------------------
 # MAIN TRANSACTION MODEL
 # -------------------------
@@ -187,38 +317,117 @@ class Transaction(models.Model):
 
     metadata = models.JSONField(default=dict, blank=True)
 
+    # Merchant settlement that paid this payment out
+    settlement = models.ForeignKey(
+        "merchants.MerchantSettlement",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="transactions"
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     executed_at = models.DateTimeField(null=True, blank=True)
 
+    objects = TransactionQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=["status"]),
             models.Index(fields=["created_at"]),
             models.Index(fields=["risk_level"]),
+            models.Index(fields=["sender", "created_at"]),
+            models.Index(fields=["receiver", "created_at"]),
+            # Agent feature snapshot windows
+            models.Index(fields=["agent", "created_at"]),
+            # Nightly settlement scan: confirmed, not yet settled
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status="CONFIRMED", settlement__isnull=True),
+                name="tx_unsettled_idx"
+            ),
         ]
 
+    @staticmethod
+    def generate_reference():
+        return uuid.uuid4().hex[:12].upper()
+
     def save(self, *args, **kwargs):
         if not self.reference:
-            self.reference = uuid.uuid4().hex[:12].upper()
+            self.reference = self.generate_reference()
         super().save(*args, **kwargs)
 
     def mark_processing(self):
-        self.status = TransactionStatus.PROCESSING
-        self.save(update_fields=["status"])
+        from .state import TransactionStateMachine
+
+        return TransactionStateMachine().transition(
+            self,
+            TransactionStatus.PROCESSING
+        )
 
     def mark_confirmed(self, tx_hash, block_number):
-        self.status = TransactionStatus.CONFIRMED
-        self.tx_hash = tx_hash
-        self.block_number = block_number
-        self.executed_at = timezone.now()
-        self.save()
+        from .state import TransactionStateMachine
+
+        return TransactionStateMachine().transition(
+            self,
+            TransactionStatus.CONFIRMED,
+            tx_hash=tx_hash,
+            block_number=block_number,
+            executed_at=timezone.now()
+        )
 
     def __str__(self):
         return f"{self.reference} - {self.amount} {self.currency}"
 
 
+# -------------------------
+# PER-USER STATS ROLLUP
+# -------------------------
+
+class UserTransactionStats(models.Model):
+    """
+    Confirmed sent / received totals per user and currency,
+    maintained incrementally by the transaction state machine.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="transaction_stats"
+    )
+
+    currency = models.CharField(max_length=10)
+
+    sent_count = models.PositiveIntegerField(default=0)
+    sent_volume = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        default=Decimal("0")
+    )
+
+    received_count = models.PositiveIntegerField(default=0)
+    received_volume = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        default=Decimal("0")
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "currency"],
+                name="unique_user_transaction_stats"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.currency}"
+
+
 # -------------------------
 # DISPUTE SYSTEM
 # -------------------------
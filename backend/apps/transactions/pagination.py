@@ -0,0 +1,151 @@
+import base64
+import uuid
+from itertools import chain
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# --------------------------------------
+# TRANSACTION HISTORY CURSOR PAGINATION
+# --------------------------------------
+
+class TransactionHistoryPagination(BasePagination):
+    """
+    Keyset pagination over a user's history, ordered by (-created_at, -id).
+
+    Each side of the history (sent / received) is fetched as its own
+    index range scan on (sender, created_at) or (receiver, created_at),
+    bounded by the cursor and the page size, and the two scans are
+    merged with a UNION. Page cost does not depend on history length.
+    """
+
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_branches(self, branches, request):
+        """
+        branches: querysets for each side of the history.
+        Returns the primary keys of the requested page, in order.
+        """
+
+        self.request = request
+        self.limit = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        scans = []
+        for branch in branches:
+            if position:
+                created_at, pk = position
+                branch = branch.filter(
+                    Q(created_at__lt=created_at)
+                    | Q(created_at=created_at, id__lt=pk)
+                )
+
+            scans.append(
+                branch
+                .order_by(*self.ordering)
+                .values_list("created_at", "id")[:self.limit + 1]
+            )
+
+        if connection.features.supports_slicing_ordering_in_compound:
+            keys = list(
+                scans[0].union(*scans[1:]).order_by(*self.ordering)[:self.limit + 1]
+            )
+        else:
+            keys = sorted(set(chain(*scans)), reverse=True)[:self.limit + 1]
+
+        self.has_next = len(keys) > self.limit
+        keys = keys[:self.limit]
+        self.next_position = keys[-1] if self.has_next else None
+
+        return [pk for _, pk in keys]
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "results": data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+    # ------------------------------
+    # PAGE SIZE
+    # ------------------------------
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+
+        return max(1, min(size, self.max_page_size))
+
+    # ------------------------------
+    # CURSOR ENCODING
+    # ------------------------------
+
+    def get_next_link(self):
+        if not self.next_position:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position)
+        )
+
+    def encode_cursor(self, position):
+        created_at, pk = position
+        raw = f"{created_at.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode()).decode()
+            created_at, pk = raw.split("|")
+            created_at = parse_datetime(created_at)
+            pk = uuid.UUID(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return created_at, pk
+
+
+# --------------------------------------
+# QR CODE LISTING
+# --------------------------------------
+
+class QRCodePagination(CursorPagination):
+    """
+    Cursor pagination for merchant QR code listings, newest first.
+    """
+
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    ordering = "-created_at"
@@ -0,0 +1,144 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+
+from .models import QRCode
+
+
+# -----------------------------------------
+# CONFIGURATION
+# -----------------------------------------
+
+QR_CACHE_TIMEOUT = 600
+QR_NEGATIVE_CACHE_TIMEOUT = 30
+
+MISSING = "missing"                      # negative cache marker
+
+QR_FIELDS = [
+    "id",
+    "merchant_id",
+    "label",
+    "amount",
+    "currency",
+    "is_dynamic",
+    "is_active",
+    "expires_at",
+]
+
+
+# -----------------------------------------
+# QR CODE RESOLUTION CACHE
+# -----------------------------------------
+
+class QRCodeResolver:
+    """
+    Resolves scanned QR codes from the cache.
+
+    Each entry holds the QR fields and the merchant's user id, so
+    scan-to-pay validation runs without touching the database. Unknown
+    codes are cached briefly as well, so bursts of bad scans do not
+    reach the database either.
+
+    Entries only hold data owned by the QR code (the merchant's user
+    never changes), so they are dropped by QRCode.save()/delete()/
+    deactivate() alone.
+    """
+
+    def resolve(self, qr_id):
+        """
+        Returns a QRCode instance built from the cache, or None.
+        """
+        return self.resolve_many([qr_id]).get(self._pk(qr_id))
+
+    def resolve_many(self, qr_ids):
+        """
+        Returns {pk: QRCode} for the codes that exist.
+        One query for all cache misses together.
+        """
+        pks = {self._pk(qr_id) for qr_id in qr_ids}
+        pks.discard(None)
+
+        keys = {self.cache_key(pk): pk for pk in pks}
+        cached = cache.get_many(list(keys))
+
+        entries = {keys[key]: entry for key, entry in cached.items()}
+        misses = pks - set(entries)
+
+        if misses:
+            loaded = self._load(misses)
+
+            cache.set_many(
+                {self.cache_key(pk): entry for pk, entry in loaded.items()},
+                QR_CACHE_TIMEOUT
+            )
+            cache.set_many(
+                {self.cache_key(pk): MISSING for pk in misses - set(loaded)},
+                QR_NEGATIVE_CACHE_TIMEOUT
+            )
+
+            entries.update(loaded)
+
+        return {
+            pk: self._to_instance(entry)
+            for pk, entry in entries.items()
+            if entry != MISSING
+        }
+
+    # ------------------------------
+    # INVALIDATION
+    # ------------------------------
+
+    def invalidate(self, qr_ids):
+        """
+        Drop entries now and again once the current transaction commits,
+        so a concurrent reader cannot re-cache the pre-commit row.
+        """
+        keys = [self.cache_key(pk) for pk in qr_ids]
+
+        if not keys:
+            return
+
+        cache.delete_many(keys)
+        db_transaction.on_commit(lambda: cache.delete_many(keys))
+
+    # ------------------------------
+    # HELPERS
+    # ------------------------------
+
+    @staticmethod
+    def cache_key(pk):
+        return f"transactions:qr:{pk}"
+
+    @staticmethod
+    def _pk(qr_id):
+        if isinstance(qr_id, uuid.UUID):
+            return qr_id
+
+        try:
+            return uuid.UUID(str(qr_id))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _load(pks):
+        rows = QRCode.objects.filter(pk__in=pks).values(*QR_FIELDS, "merchant__user_id")
+
+        return {
+            row["id"]: {
+                **{field: row[field] for field in QR_FIELDS},
+                "merchant_user_id": row["merchant__user_id"],
+            }
+            for row in rows
+        }
+
+    @staticmethod
+    def _to_instance(entry):
+        qr = QRCode(**{field: entry[field] for field in QR_FIELDS})
+        qr._state.adding = False
+        qr._state.db = "default"
+
+        # Denormalized merchant data, avoids lazy-loading merchant.user
+        qr.merchant_user_id = entry["merchant_user_id"]
+
+        return qr
@@ -1,9 +1,7 @@
 from decimal import Decimal
-from django.utils import timezone
-from django.db.models import Sum, Count
-from datetime import timedelta
 
 from .models import Transaction, RiskLevel
+from .features import RiskFeatureExtractor
 
 
 # -----------------------------------------
@@ -22,8 +20,9 @@ SUSPICIOUS_TX_COUNT_1H = 5
 
 class RiskEngine:
 
-    def __init__(self, transaction: Transaction):
+    def __init__(self, transaction: Transaction, features=None):
         self.transaction = transaction
+        self.features = features
         self.score = 0
         self.reasons = []
 
@@ -32,6 +31,9 @@ class RiskEngine:
     # ------------------------------
 
     def evaluate(self):
+        if self.features is None:
+            self.features = RiskFeatureExtractor(self.transaction).extract()
+
         self.check_large_amount()
         self.check_daily_volume()
         self.check_new_account()
@@ -46,6 +48,38 @@ class RiskEngine:
             "reasons": self.reasons
         }
 
+    # ------------------------------
+    # BATCH ENTRY POINT
+    # ------------------------------
+
+    @classmethod
+    def evaluate_batch(cls, transactions, features=None):
+        """
+        Scores a batch of transactions from the same sender in one pass.
+        Sender features are extracted once; earlier items of the batch
+        count towards the hourly frequency of later ones, and agent
+        flags are read from the agents already attached to each item.
+        """
+        if not transactions:
+            return []
+
+        if features is None:
+            features = RiskFeatureExtractor(transactions[0]).extract()
+
+        results = []
+
+        for offset, transaction in enumerate(transactions):
+            item_features = {
+                **features,
+                "hourly_count": features["hourly_count"] + offset,
+                "agent_flagged": bool(
+                    transaction.agent_id and transaction.agent.is_flagged
+                ),
+            }
+            results.append(cls(transaction, item_features).evaluate())
+
+        return results
+
     # ------------------------------
     # RISK RULES
     # ------------------------------
@@ -56,41 +90,26 @@ class RiskEngine:
             self.reasons.append("Large transaction amount")
 
     def check_daily_volume(self):
-        today = timezone.now().date()
-
-        daily_volume = Transaction.objects.filter(
-            sender=self.transaction.sender,
-            created_at__date=today,
-            status__in=["CONFIRMED", "PROCESSING"]
-        ).aggregate(total=Sum("amount"))["total"] or Decimal("0")
+        daily_volume = self.features["daily_volume"]
 
         if daily_volume + self.transaction.amount > MAX_DAILY_VOLUME:
             self.score += 25
             self.reasons.append("Exceeded daily transaction volume")
 
     def check_new_account(self):
-        account_age = timezone.now() - self.transaction.sender.date_joined
-        if account_age.days < NEW_ACCOUNT_DAYS:
+        if self.features["account_age_days"] < NEW_ACCOUNT_DAYS:
             self.score += 15
             self.reasons.append("New account risk")
 
     def check_frequency_spike(self):
-        one_hour_ago = timezone.now() - timedelta(hours=1)
-
-        tx_count = Transaction.objects.filter(
-            sender=self.transaction.sender,
-            created_at__gte=one_hour_ago
-        ).count()
-
-        if tx_count >= SUSPICIOUS_TX_COUNT_1H:
+        if self.features["hourly_count"] >= SUSPICIOUS_TX_COUNT_1H:
             self.score += 20
             self.reasons.append("High frequency transactions")
 
     def check_agent_risk(self):
-        if self.transaction.agent:
-            if self.transaction.agent.is_flagged:
-                self.score += 40
-                self.reasons.append("Flagged agent involved")
+        if self.features["agent_flagged"]:
+            self.score += 40
+            self.reasons.append("Flagged agent involved")
 
     # ------------------------------
     # FINAL RISK LEVEL
@@ -1,7 +1,16 @@
+import time
+
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.contrib.auth import get_user_model
+from django.db import transaction as db_transaction
 from django.utils import timezone
 from decimal import Decimal
 
+from apps.agents.models import AgentProfile
+from apps.ai_engine.shadow import ShadowEvaluator, from_rules
+from apps.wallets.models import Wallet
+
 from .models import (
     Transaction,
     QRCode,
@@ -10,7 +19,82 @@ from .models import (
     TransactionType
 )
 
+from .events import emit_transaction_event
+from .features import RiskFeatureExtractor
+from .qr_cache import QRCodeResolver
 from .risk import RiskEngine
+from .velocity import VelocityCounter
+
+User = get_user_model()
+
+MAX_BATCH_SIZE = 500
+
+
+# --------------------------------------
+# RISK DECISION
+# --------------------------------------
+
+def apply_risk_result(transaction, result):
+    """
+    Copies a RiskEngine result onto the transaction and
+    sets its status from the risk level.
+    """
+
+    transaction.risk_score = result["risk_score"]
+    transaction.risk_level = result["risk_level"]
+    transaction.ai_decision_reason = ", ".join(result["reasons"])
+
+    # Auto AI review decision
+    if transaction.risk_level in ["HIGH", "CRITICAL"]:
+        transaction.status = TransactionStatus.AI_REVIEW
+    else:
+        transaction.status = TransactionStatus.APPROVED
+
+    return transaction
+
+
+# --------------------------------------
+# PREFETCH-AWARE RELATED FIELD
+# --------------------------------------
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Resolves the primary key from objects loaded in bulk by a batch
+    (context["prefetched"][field_name]) instead of one query per item.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get("prefetched", {}).get(self.field_name)
+
+        if prefetched is None:
+            return super().to_internal_value(data)
+
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        if pk not in prefetched:
+            self.fail("does_not_exist", pk_value=data)
+
+        return prefetched[pk]
+
+
+class CachedQRCodeField(PrefetchedPrimaryKeyRelatedField):
+    """
+    Resolves scanned QR codes through the QR resolution cache.
+    """
+
+    def to_internal_value(self, data):
+        if self.context.get("prefetched", {}).get(self.field_name) is not None:
+            return super().to_internal_value(data)
+
+        qr = QRCodeResolver().resolve(data)
+
+        if qr is None:
+            self.fail("does_not_exist", pk_value=data)
+
+        return qr
 
 
 # --------------------------------------
@@ -46,6 +130,14 @@ class QRCodeSerializer(serializers.ModelSerializer):
 
 class TransactionCreateSerializer(serializers.ModelSerializer):
 
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
+    qr_code = CachedQRCodeField(
+        queryset=QRCode.objects.all(),
+        required=False,
+        allow_null=True
+    )
+
     class Meta:
         model = Transaction
         fields = [
@@ -81,6 +173,12 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
             if not qr.is_valid():
                 raise serializers.ValidationError("QR Code expired or inactive.")
 
+            merchant_user_id = getattr(qr, "merchant_user_id", None)
+            if merchant_user_id is not None and data["receiver"].pk != merchant_user_id:
+                raise serializers.ValidationError(
+                    "Receiver does not match QR code merchant."
+                )
+
             if not qr.is_dynamic and qr.amount:
                 if data["amount"] != qr.amount:
                     raise serializers.ValidationError(
@@ -89,7 +187,7 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
 
         # Wallet ownership validation
         wallet_from = data.get("wallet_from")
-        if wallet_from.user != sender:
+        if wallet_from is None or wallet_from.user_id != sender.id:
             raise serializers.ValidationError("Invalid wallet ownership.")
 
         return data
@@ -99,33 +197,172 @@ class TransactionCreateSerializer(serializers.ModelSerializer):
         request = self.context["request"]
         sender = request.user
 
-        transaction = Transaction.objects.create(
+        transaction = Transaction(
             sender=sender,
             status=TransactionStatus.PENDING,
             **validated_data
         )
 
         # --------------------------
-        # RISK ENGINE EXECUTION
+        # RISK ENGINE EXECUTION (UNSAVED INSTANCE)
         # --------------------------
-        risk_engine = RiskEngine(transaction)
-        result = risk_engine.evaluate()
+        features = self.context.get("features")
+        if features is None:
+            features = RiskFeatureExtractor(transaction).extract()
+
+        started = time.perf_counter()
+        result = RiskEngine(transaction, features).evaluate()
+        latency = time.perf_counter() - started
 
-        transaction.risk_score = result["risk_score"]
-        transaction.risk_level = result["risk_level"]
-        transaction.ai_decision_reason = ", ".join(result["reasons"])
+        apply_risk_result(transaction, result)
 
-        # Auto AI review decision
-        if transaction.risk_level in ["HIGH", "CRITICAL"]:
-            transaction.status = TransactionStatus.AI_REVIEW
-        else:
-            transaction.status = TransactionStatus.APPROVED
+        # Single INSERT with the final status
+        transaction.save(force_insert=True)
 
-        transaction.save()
+        # Sampled candidate engines, off the request path
+        ShadowEvaluator().submit(transaction, from_rules(result), latency)
+
+        emit_transaction_event(
+            "transaction.risk_evaluated",
+            transaction,
+            previous_status=TransactionStatus.PENDING,
+            risk_score=result["risk_score"],
+            risk_level=result["risk_level"],
+            reasons=result["reasons"]
+        )
+
+        VelocityCounter().record_created(transaction)
 
         return transaction
 
 
+# --------------------------------------
+# TRANSACTION BATCH SERIALIZER
+# --------------------------------------
+
+class TransactionBatchSerializer(serializers.Serializer):
+    """
+    Validates and inserts up to MAX_BATCH_SIZE transactions at once.
+    Referenced rows are loaded with one query per model, the batch is
+    scored in a single risk pass and inserted with bulk_create.
+    Invalid items are reported individually and never block the others.
+    """
+
+    transactions = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_BATCH_SIZE
+    )
+
+    # (item field, model) pairs resolved in bulk
+    RELATED_FIELDS = [
+        ("receiver", User),
+        ("wallet_from", Wallet),
+        ("wallet_to", Wallet),
+        ("agent", AgentProfile),
+        ("qr_code", QRCode),
+    ]
+
+    def create(self, validated_data):
+
+        request = self.context["request"]
+        sender = request.user
+        items = validated_data["transactions"]
+
+        context = {**self.context, "prefetched": self._prefetch(items)}
+
+        results = [None] * len(items)
+        accepted = []
+
+        for index, item in enumerate(items):
+            item_serializer = TransactionCreateSerializer(data=item, context=context)
+
+            if not item_serializer.is_valid():
+                results[index] = {
+                    "index": index,
+                    "status": "error",
+                    "errors": item_serializer.errors
+                }
+                continue
+
+            transaction = Transaction(
+                sender=sender,
+                reference=Transaction.generate_reference(),
+                **item_serializer.validated_data
+            )
+            accepted.append((index, transaction))
+
+        transactions = [transaction for _, transaction in accepted]
+
+        # --------------------------
+        # RISK PASS (ONE FEATURE QUERY)
+        # --------------------------
+        for transaction, result in zip(
+            transactions,
+            RiskEngine.evaluate_batch(transactions)
+        ):
+            apply_risk_result(transaction, result)
+
+        with db_transaction.atomic():
+            Transaction.objects.bulk_create(transactions)
+
+        VelocityCounter().record_created_many(transactions)
+
+        for transaction in transactions:
+            emit_transaction_event(
+                "transaction.risk_evaluated",
+                transaction,
+                previous_status=TransactionStatus.PENDING,
+                risk_score=transaction.risk_score,
+                risk_level=transaction.risk_level,
+                batch=True
+            )
+
+        for index, transaction in accepted:
+            results[index] = {
+                "index": index,
+                "status": "created",
+                "id": str(transaction.id),
+                "reference": transaction.reference,
+                "transaction_status": transaction.status,
+                "risk_level": transaction.risk_level
+            }
+
+        return results
+
+    def _prefetch(self, items):
+        """
+        One query per referenced model for the whole batch.
+        Returns {item field: {pk: instance}}.
+        """
+
+        wanted = {}
+        for field, model in self.RELATED_FIELDS:
+            pks = wanted.setdefault(model, set())
+            for item in items:
+                value = item.get(field)
+                if value in (None, ""):
+                    continue
+                try:
+                    pks.add(model._meta.pk.to_python(value))
+                except (TypeError, ValueError, DjangoValidationError):
+                    continue
+
+        loaded = {
+            model: (
+                QRCodeResolver().resolve_many(pks)
+                if model is QRCode
+                else model._default_manager.in_bulk(pks)
+            ) if pks else {}
+            for model, pks in wanted.items()
+        }
+
+        return {
+            field: loaded[model]
+            for field, model in self.RELATED_FIELDS
+        }
+
+
 # --------------------------------------
 # TRANSACTION READ SERIALIZER
 # --------------------------------------
@@ -151,9 +388,114 @@ class TransactionSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "executed_at",
+            "settlement",
         ]
 
 
+# --------------------------------------
+# COMPACT HISTORY PROJECTION
+# --------------------------------------
+
+def _as_string(value):
+    return str(value)
+
+
+def _as_datetime(value):
+    value = timezone.localtime(value).isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+class TransactionProjection:
+    """
+    Hand-rolled read serializer for history rows loaded with .values().
+
+    Output matches TransactionSerializer for the selected fields, but
+    skips model instantiation and DRF's per-field machinery. Used for
+    ?view=compact and ?fields=a,b,c sparse fieldsets.
+    """
+
+    # field name -> (values() lookup, converter)
+    COLUMNS = {
+        "id": ("id", _as_string),
+        "reference": ("reference", None),
+        "type": ("type", None),
+        "status": ("status", None),
+        "amount": ("amount", _as_string),
+        "currency": ("currency", None),
+        "network": ("network", None),
+        "gas_fee": ("gas_fee", _as_string),
+        "sender": ("sender_id", None),
+        "receiver": ("receiver_id", None),
+        "sender_email": ("sender__email", None),
+        "receiver_email": ("receiver__email", None),
+        "wallet_from": ("wallet_from_id", _as_string),
+        "wallet_to": ("wallet_to_id", _as_string),
+        "agent": ("agent_id", None),
+        "qr_code": ("qr_code_id", _as_string),
+        "tx_hash": ("tx_hash", None),
+        "block_number": ("block_number", None),
+        "confirmations": ("confirmations", None),
+        "risk_score": ("risk_score", None),
+        "risk_level": ("risk_level", None),
+        "created_at": ("created_at", _as_datetime),
+        "executed_at": ("executed_at", _as_datetime),
+    }
+
+    COMPACT_FIELDS = [
+        "id",
+        "reference",
+        "type",
+        "status",
+        "amount",
+        "currency",
+        "sender_email",
+        "receiver_email",
+        "created_at",
+    ]
+
+    def __init__(self, fields=None):
+        fields = list(dict.fromkeys(fields or self.COMPACT_FIELDS))
+
+        unknown = [name for name in fields if name not in self.COLUMNS]
+        if unknown:
+            raise serializers.ValidationError({
+                "fields": f"Unknown fields: {', '.join(unknown)}"
+            })
+
+        self.fields = fields
+        self.columns = [(name, *self.COLUMNS[name]) for name in fields]
+        self.lookups = list(dict.fromkeys(
+            ["id"] + [lookup for _, lookup, _ in self.columns]
+        ))
+
+    @classmethod
+    def from_request(cls, request):
+        """
+        Returns a projection when the client asked for one, else None.
+        """
+        fields = request.query_params.get("fields")
+
+        if fields:
+            return cls([name.strip() for name in fields.split(",") if name.strip()])
+
+        if request.query_params.get("view") == "compact":
+            return cls()
+
+        return None
+
+    def to_representation(self, row):
+        return {
+            name: (
+                convert(row[lookup])
+                if convert is not None and row[lookup] is not None
+                else row[lookup]
+            )
+            for name, lookup, convert in self.columns
+        }
+
+
 # --------------------------------------
 # DISPUTE SERIALIZER
 # --------------------------------------
@@ -0,0 +1,279 @@
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from apps.merchants.rollups import MerchantRevenueRollup
+
+from .models import (
+    Transaction,
+    TransactionStatus,
+    VOLUME_STATUSES,
+)
+from .counters import record_profile_transitions
+from .stats import UserStatsRollup
+from .velocity import VelocityCounter
+
+
+# -----------------------------------------
+# ALLOWED TRANSITIONS (target <- sources)
+# -----------------------------------------
+
+TRANSITIONS = {
+    TransactionStatus.AI_REVIEW: [
+        TransactionStatus.PENDING,
+        TransactionStatus.APPROVED,
+    ],
+    TransactionStatus.APPROVED: [
+        TransactionStatus.PENDING,
+        TransactionStatus.AI_REVIEW,
+    ],
+    TransactionStatus.REJECTED: [
+        TransactionStatus.PENDING,
+        TransactionStatus.AI_REVIEW,
+    ],
+    TransactionStatus.PROCESSING: [
+        TransactionStatus.APPROVED,
+    ],
+    TransactionStatus.CONFIRMED: [
+        TransactionStatus.APPROVED,
+        TransactionStatus.PROCESSING,
+    ],
+    TransactionStatus.FAILED: [
+        TransactionStatus.APPROVED,
+        TransactionStatus.PROCESSING,
+    ],
+    TransactionStatus.DISPUTED: [
+        TransactionStatus.APPROVED,
+        TransactionStatus.AI_REVIEW,
+        TransactionStatus.CONFIRMED,
+    ],
+    TransactionStatus.REFUNDED: [
+        TransactionStatus.CONFIRMED,
+        TransactionStatus.DISPUTED,
+    ],
+    TransactionStatus.CANCELLED: [
+        TransactionStatus.PENDING,
+        TransactionStatus.AI_REVIEW,
+        TransactionStatus.APPROVED,
+    ],
+}
+
+# Statuses counted on agent / merchant profiles
+PROFILE_COUNTED_STATUSES = [
+    TransactionStatus.CONFIRMED,
+    TransactionStatus.FAILED,
+    TransactionStatus.DISPUTED,
+]
+
+# Columns needed by post-transition side effects
+SIDE_EFFECT_FIELDS = [
+    "id",
+    "status",
+    "type",
+    "amount",
+    "currency",
+    "sender_id",
+    "receiver_id",
+    "agent_id",
+    "qr_code_id",
+    "created_at",
+]
+
+
+# -----------------------------------------
+# STATE MACHINE
+# -----------------------------------------
+
+class TransactionStateMachine:
+    """
+    Atomic, conditional status transitions for Transaction.
+
+    Each transition is a single UPDATE ... WHERE id = ? AND status IN (...)
+    writing only the status and the fields passed in, so a concurrent
+    worker can never overwrite another worker's state change.
+    """
+
+    def __init__(self, queryset=None):
+        if queryset is None:
+            queryset = Transaction.objects.all()
+
+        self.queryset = queryset.select_related(None)
+
+    # ------------------------------
+    # SINGLE TRANSITION
+    # ------------------------------
+
+    def transition(self, transaction, to_status, from_statuses=None, **fields):
+        """
+        Move one transaction (instance or primary key) to to_status.
+        Returns True when the transition happened.
+
+        With an instance the update is a compare-and-swap on the status
+        it was loaded with, and the instance is updated in place.
+        """
+        from_statuses = self._sources(to_status, from_statuses)
+
+        if not isinstance(transaction, Transaction):
+            return self._transition_pk(transaction, to_status, from_statuses, fields)
+
+        if transaction.status not in from_statuses:
+            return False
+
+        previous_status = transaction.status
+        values = self._values(to_status, fields)
+
+        with db_transaction.atomic(savepoint=False):
+            updated = self.queryset.filter(
+                pk=transaction.pk,
+                status=previous_status
+            ).update(**values)
+
+            if not updated:
+                return False
+
+            for field, value in values.items():
+                setattr(transaction, field, value)
+
+            self._after_transition([transaction], {transaction.pk: previous_status})
+
+        return True
+
+    # ------------------------------
+    # BULK TRANSITION (WORKERS)
+    # ------------------------------
+
+    def bulk_transition(self, transaction_ids, to_status, from_statuses=None, **fields):
+        """
+        Move a batch of transactions to to_status in one UPDATE.
+        Rows locked by another worker or in a non-source status are skipped.
+        Returns the primary keys that were transitioned.
+        """
+        from_statuses = self._sources(to_status, from_statuses)
+        values = self._values(to_status, fields)
+
+        with db_transaction.atomic():
+            rows = list(
+                self.queryset
+                .filter(pk__in=transaction_ids, status__in=from_statuses)
+                .select_for_update(skip_locked=True, of=("self",))
+                .only(*SIDE_EFFECT_FIELDS)
+            )
+
+            if not rows:
+                return []
+
+            previous_statuses = {row.pk: row.status for row in rows}
+
+            Transaction.objects.filter(
+                pk__in=previous_statuses.keys(),
+                status__in=from_statuses
+            ).update(**values)
+
+            for row in rows:
+                for field, value in values.items():
+                    setattr(row, field, value)
+
+            self._after_transition(rows, previous_statuses)
+
+        return list(previous_statuses.keys())
+
+    # ------------------------------
+    # HELPERS
+    # ------------------------------
+
+    def _transition_pk(self, pk, to_status, from_statuses, fields):
+        """
+        With a single source status the previous status is known and the
+        transition is one conditional UPDATE. With several, side effects
+        depend on which one the row is in: lock and read it first.
+        """
+        values = self._values(to_status, fields)
+
+        with db_transaction.atomic(savepoint=False):
+            if len(from_statuses) == 1:
+                previous_status = from_statuses[0]
+
+                updated = self.queryset.filter(
+                    pk=pk,
+                    status=previous_status
+                ).update(**values)
+
+                if not updated:
+                    return False
+
+                if self._has_side_effects(previous_status, to_status):
+                    row = Transaction.objects.only(*SIDE_EFFECT_FIELDS).get(pk=pk)
+                    self._after_transition([row], {pk: previous_status})
+
+                return True
+
+            row = (
+                self.queryset
+                .filter(pk=pk, status__in=from_statuses)
+                .select_for_update(of=("self",))
+                .only(*SIDE_EFFECT_FIELDS)
+                .first()
+            )
+
+            if row is None:
+                return False
+
+            previous_status = row.status
+
+            Transaction.objects.filter(pk=pk).update(**values)
+
+            for field, value in values.items():
+                setattr(row, field, value)
+
+            if self._has_side_effects(previous_status, to_status):
+                self._after_transition([row], {pk: previous_status})
+
+        return True
+
+    def _after_transition(self, transactions, previous_statuses):
+        """
+        Side effects of committed transitions (counters, rollups, caches).
+        """
+
+        # Rollups are written in the caller's transaction so they
+        # commit or roll back together with the status change
+        UserStatsRollup().record_transitions(transactions, previous_statuses)
+        MerchantRevenueRollup().record_transitions(transactions, previous_statuses)
+        record_profile_transitions(transactions, previous_statuses)
+
+        def dispatch():
+            counters = VelocityCounter()
+
+            for transaction in transactions:
+                counters.record_transition(
+                    transaction,
+                    previous_statuses[transaction.pk]
+                )
+
+        db_transaction.on_commit(dispatch)
+
+    @staticmethod
+    def _has_side_effects(previous_status, to_status):
+        crosses_volume = (previous_status in VOLUME_STATUSES) != (to_status in VOLUME_STATUSES)
+        crosses_confirmed = (
+            (previous_status == TransactionStatus.CONFIRMED)
+            != (to_status == TransactionStatus.CONFIRMED)
+        )
+
+        counted = to_status in PROFILE_COUNTED_STATUSES
+
+        return crosses_volume or crosses_confirmed or counted
+
+    @staticmethod
+    def _sources(to_status, from_statuses):
+        if from_statuses is None:
+            return TRANSITIONS[to_status]
+
+        return list(from_statuses)
+
+    @staticmethod
+    def _values(to_status, fields):
+        return {
+            "status": to_status,
+            "updated_at": timezone.now(),
+            **fields
+        }
@@ -0,0 +1,240 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import (
+    Transaction,
+    TransactionStatus,
+    UserTransactionStats,
+)
+
+
+# -----------------------------------------
+# CONFIGURATION
+# -----------------------------------------
+
+STATS_CACHE_TIMEOUT = 3600
+
+STATS_COUNTERS = [
+    "sent_count",
+    "sent_volume",
+    "received_count",
+    "received_volume",
+]
+
+
+# -----------------------------------------
+# PER-USER TRANSACTION STATS
+# -----------------------------------------
+
+class UserStatsRollup:
+    """
+    Per-user, per-currency totals of CONFIRMED transactions.
+
+    Rows are adjusted with F() expressions when a transaction enters
+    or leaves CONFIRMED, and the endpoint reads one small cached dict
+    per user, so its cost does not depend on the transaction history.
+
+    Run rebuild_transaction_stats once when deploying the rollup:
+    transactions confirmed before it have no row yet. Decrements are
+    clamped at zero so a refund of such a transaction never breaks the
+    status transition itself.
+    """
+
+    # ------------------------------
+    # INCREMENTAL MAINTENANCE
+    # ------------------------------
+
+    def record_transitions(self, transactions, previous_statuses):
+        """
+        Apply the deltas of committed-or-committing status changes.
+        """
+        deltas = defaultdict(lambda: dict.fromkeys(STATS_COUNTERS, 0))
+
+        for transaction in transactions:
+            was_confirmed = previous_statuses[transaction.pk] == TransactionStatus.CONFIRMED
+            is_confirmed = transaction.status == TransactionStatus.CONFIRMED
+
+            if was_confirmed == is_confirmed:
+                continue
+
+            sign = 1 if is_confirmed else -1
+
+            sent = deltas[(transaction.sender_id, transaction.currency)]
+            sent["sent_count"] += sign
+            sent["sent_volume"] += sign * transaction.amount
+
+            received = deltas[(transaction.receiver_id, transaction.currency)]
+            received["received_count"] += sign
+            received["received_volume"] += sign * transaction.amount
+
+        if not deltas:
+            return
+
+        UserTransactionStats.objects.bulk_create(
+            [
+                UserTransactionStats(user_id=user_id, currency=currency)
+                for user_id, currency in deltas
+            ],
+            ignore_conflicts=True
+        )
+
+        for (user_id, currency), delta in deltas.items():
+            changes = {
+                field: self._clamped(field, value)
+                for field, value in delta.items()
+                if value
+            }
+
+            if changes:
+                UserTransactionStats.objects.filter(
+                    user_id=user_id,
+                    currency=currency
+                ).update(updated_at=timezone.now(), **changes)
+
+        user_ids = {user_id for user_id, _ in deltas}
+        db_transaction.on_commit(lambda: self.invalidate(user_ids))
+
+    # ------------------------------
+    # READS
+    # ------------------------------
+
+    def get(self, user_id):
+        """
+        Returns {"total_sent", "total_received", "by_currency": [...]}.
+        """
+        key = self.cache_key(user_id)
+        stats = cache.get(key)
+
+        if stats is None:
+            stats = self._load(user_id)
+            cache.set(key, stats, STATS_CACHE_TIMEOUT)
+
+        return stats
+
+    def invalidate(self, user_ids):
+        cache.delete_many([self.cache_key(user_id) for user_id in user_ids])
+
+    # ------------------------------
+    # REBUILD
+    # ------------------------------
+
+    def rebuild(self, user_ids=None):
+        """
+        Recompute rollup rows from the transaction table.
+        Returns the number of rows written.
+
+        Existing rows are locked (SELECT ... FOR UPDATE) before the
+        aggregate and rewritten in place in the same transaction: a
+        concurrent transition waits for the rebuild, then applies its
+        delta on top of the rebuilt totals instead of being overwritten.
+        """
+        existing = UserTransactionStats.objects.all()
+
+        if user_ids is not None:
+            existing = existing.filter(user_id__in=user_ids)
+
+        with db_transaction.atomic():
+            rows = {
+                (stats.user_id, stats.currency): stats
+                for stats in existing.select_for_update()
+            }
+
+            totals = self._totals(user_ids)
+            now = timezone.now()
+
+            created = []
+            for key, values in totals.items():
+                stats = rows.get(key)
+
+                if stats is None:
+                    created.append(UserTransactionStats(user_id=key[0], currency=key[1], **values))
+                    continue
+
+                for field, value in values.items():
+                    setattr(stats, field, value)
+
+            # Rows without confirmed transactions are zeroed, not deleted,
+            # so a waiting F() update still finds its row
+            for key, stats in rows.items():
+                if key not in totals:
+                    for field in STATS_COUNTERS:
+                        setattr(stats, field, 0)
+                stats.updated_at = now
+
+            UserTransactionStats.objects.bulk_update(
+                rows.values(),
+                [*STATS_COUNTERS, "updated_at"],
+                batch_size=1000
+            )
+            UserTransactionStats.objects.bulk_create(created, batch_size=1000)
+
+        self.invalidate({user_id for user_id, _ in rows} | {user_id for user_id, _ in totals})
+
+        return len(totals)
+
+    @staticmethod
+    def _totals(user_ids=None):
+        confirmed = Transaction.objects.filter(status=TransactionStatus.CONFIRMED)
+        totals = defaultdict(lambda: dict.fromkeys(STATS_COUNTERS, 0))
+
+        for side in ["sender", "receiver"]:
+            rows = confirmed
+            if user_ids is not None:
+                rows = rows.filter(**{f"{side}_id__in": user_ids})
+
+            prefix = "sent" if side == "sender" else "received"
+            rows = rows.values(f"{side}_id", "currency").annotate(
+                count=Count("id"),
+                volume=Sum("amount")
+            ).order_by()
+
+            for row in rows:
+                total = totals[(row[f"{side}_id"], row["currency"])]
+                total[f"{prefix}_count"] = row["count"]
+                total[f"{prefix}_volume"] = row["volume"] or Decimal("0")
+
+        return totals
+
+    # ------------------------------
+    # HELPERS
+    # ------------------------------
+
+    @staticmethod
+    def _clamped(field, delta):
+        """
+        F(field) + delta, never below zero (counters are unsigned).
+        """
+        output_field = UserTransactionStats._meta.get_field(field)
+
+        return Greatest(F(field) + delta, 0, output_field=output_field)
+
+    @staticmethod
+    def cache_key(user_id):
+        return f"transactions:stats:{user_id}"
+
+    @staticmethod
+    def _load(user_id):
+        rows = list(
+            UserTransactionStats.objects.filter(user_id=user_id)
+            .order_by("currency")
+            .values("currency", *STATS_COUNTERS)
+        )
+
+        return {
+            "total_sent": sum(row["sent_count"] for row in rows),
+            "total_received": sum(row["received_count"] for row in rows),
+            "by_currency": [
+                {
+                    **row,
+                    "sent_volume": str(row["sent_volume"]),
+                    "received_volume": str(row["received_volume"]),
+                }
+                for row in rows
+            ],
+        }
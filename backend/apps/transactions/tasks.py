@@ -0,0 +1,65 @@
+import logging
+
+from celery import shared_task
+from django.utils import timezone
+
+from .counters import ProfileCounters
+from .models import QRCode
+from .qr_cache import QRCodeResolver
+
+logger = logging.getLogger(__name__)
+
+QR_SWEEP_BATCH_SIZE = 1000
+
+
+# -----------------------------------------
+# QR CODE EXPIRY SWEEPER
+# -----------------------------------------
+
+@shared_task
+def deactivate_expired_qr_codes(batch_size=QR_SWEEP_BATCH_SIZE):
+    """
+    Deactivate expired dynamic QR codes in bounded batches.
+
+    Each batch is one indexed SELECT on the expiring-codes partial
+    index plus one UPDATE, committed on its own so locks stay short.
+    Returns the number of codes deactivated.
+    """
+    now = timezone.now()
+    resolver = QRCodeResolver()
+    total = 0
+
+    while True:
+        ids = list(
+            QRCode.objects.filter(
+                is_active=True,
+                is_dynamic=True,
+                expires_at__lte=now
+            ).values_list("id", flat=True)[:batch_size]
+        )
+
+        if not ids:
+            break
+
+        QRCode.objects.filter(pk__in=ids, is_active=True).update(is_active=False)
+        resolver.invalidate(ids)
+
+        total += len(ids)
+
+    if total:
+        logger.info("Deactivated %s expired QR codes", total)
+
+    return total
+
+
+# -----------------------------------------
+# BUFFERED PROFILE COUNTERS
+# -----------------------------------------
+
+@shared_task
+def flush_profile_counters():
+    """
+    Fold buffered merchant / agent counter deltas into the database.
+    No-op unless PROFILE_COUNTERS_BUFFERED is enabled.
+    """
+    return ProfileCounters().flush()
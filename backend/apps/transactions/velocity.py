@@ -0,0 +1,345 @@
+import logging
+from decimal import Decimal
+from datetime import timedelta
+
+import redis
+from django.conf import settings
+from django.utils import timezone
+
+from .models import (
+    Transaction,
+    MERCHANT_TRANSACTION_TYPES,
+    VOLUME_STATUSES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------------------
+# CONFIGURATION
+# -----------------------------------------
+
+BUCKET_SECONDS = 300                     # 5 minute buckets
+KEY_TTL_SECONDS = 25 * 3600              # keep a little more than 24h
+MICRO_UNITS = Decimal("1000000")         # amounts stored as integers
+REBUILD_ATTEMPTS = 3                     # WATCH retries before giving up
+
+SCOPE_SENDER = "sender"
+SCOPE_AGENT = "agent"
+SCOPE_MERCHANT = "merchant"
+
+WINDOW_1H = "1h"
+WINDOW_24H = "24h"
+WINDOW_DAY = "day"
+
+WINDOWS = [WINDOW_1H, WINDOW_24H, WINDOW_DAY]
+
+
+_client = None
+
+
+def get_redis_client():
+    global _client
+
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=0.1,
+            socket_connect_timeout=0.1
+        )
+
+    return _client
+
+
+# -----------------------------------------
+# VELOCITY COUNTERS
+# -----------------------------------------
+
+class VelocityCounter:
+    """
+    Sliding-window count and volume per sender, agent and merchant.
+
+    Each owner gets one Redis hash per 5 minute bucket holding the
+    transaction count ("n") and the spent volume in micro-units ("v").
+    A window is read by fetching its buckets in one pipeline, so the
+    cost is bounded by the bucket count, not the transaction history.
+
+    Granularity: a window covers every bucket that overlaps it, so the
+    rolling "1h" and "24h" windows may include up to one extra bucket
+    (BUCKET_SECONDS) of older transactions. Good enough for velocity
+    limits; the database fallback is exact.
+
+    Counters are rebuilt from the database whenever an owner's
+    "ready" marker is missing, and every read falls back to a single
+    aggregate query when Redis is disabled or unreachable.
+    """
+
+    def __init__(self, client=None):
+        self.enabled = getattr(settings, "VELOCITY_COUNTERS_ENABLED", False)
+        self.client = client
+
+        if self.enabled and self.client is None:
+            self.client = get_redis_client()
+
+    # ------------------------------
+    # WRITES
+    # ------------------------------
+
+    def record_created(self, transaction):
+        """
+        Count a newly inserted transaction.
+        """
+        self.record_created_many([transaction])
+
+    def record_created_many(self, transactions):
+        """
+        Count a batch of inserted transactions in one pipeline.
+        """
+        self._increment([
+            (
+                transaction,
+                1,
+                transaction.amount
+                if transaction.status in VOLUME_STATUSES
+                else Decimal("0")
+            )
+            for transaction in transactions
+        ])
+
+    def record_transition(self, transaction, previous_status):
+        """
+        Adjust volume when a status change enters or leaves
+        the spent statuses.
+        """
+        was_spent = previous_status in VOLUME_STATUSES
+        is_spent = transaction.status in VOLUME_STATUSES
+
+        if was_spent == is_spent:
+            return
+
+        volume = transaction.amount if is_spent else -transaction.amount
+        self._increment([(transaction, 0, volume)])
+
+    # ------------------------------
+    # READS
+    # ------------------------------
+
+    def window(self, scope, owner_id, window, now=None):
+        """
+        Returns {"count": int, "volume": Decimal} for one window.
+        """
+        return self.snapshot(scope, owner_id, [window], now=now)[window]
+
+    def snapshot(self, scope, owner_id, windows=WINDOWS, now=None):
+        """
+        Returns {window: {"count": int, "volume": Decimal}}.
+        """
+        now = now or timezone.now()
+
+        if self.enabled:
+            try:
+                return self._snapshot_from_redis(scope, owner_id, windows, now)
+            except redis.RedisError as e:
+                logger.warning("Velocity counters unavailable: %s", e)
+
+        return self._snapshot_from_database(scope, owner_id, windows, now)
+
+    # ------------------------------
+    # REBUILD
+    # ------------------------------
+
+    def rebuild(self, scope, owner_id, now=None):
+        """
+        Recompute the last 24h of buckets for one owner from the database.
+
+        The buckets are WATCHed before the database read: an increment
+        landing between the read and EXEC aborts the rewrite, which is
+        retried so the increment is never overwritten. After
+        REBUILD_ATTEMPTS aborts, the computed buckets are returned
+        without being written (the next read rebuilds again).
+        """
+        now = now or timezone.now()
+
+        ready_key = self._ready_key(scope, owner_id)
+        keys = [
+            self._bucket_key(scope, owner_id, index)
+            for index in self._bucket_range(now - timedelta(hours=24), now)
+        ]
+
+        with self.client.pipeline(transaction=True) as pipe:
+            for _ in range(REBUILD_ATTEMPTS):
+                try:
+                    pipe.watch(ready_key, *keys)
+
+                    buckets = self._buckets_from_database(scope, owner_id, now)
+
+                    # Buckets and ready marker replaced in one MULTI/EXEC
+                    pipe.multi()
+                    pipe.delete(*keys)
+
+                    for index, values in buckets.items():
+                        key = self._bucket_key(scope, owner_id, index)
+                        pipe.hset(key, mapping=values)
+                        pipe.expire(key, KEY_TTL_SECONDS)
+
+                    pipe.set(ready_key, 1, ex=KEY_TTL_SECONDS)
+                    pipe.execute()
+
+                    return buckets
+
+                except redis.WatchError:
+                    continue
+
+        logger.warning("Velocity rebuild for %s %s kept racing with writes", scope, owner_id)
+
+        return buckets
+
+    def _buckets_from_database(self, scope, owner_id, now):
+        rows = self._scope_queryset(scope, owner_id).filter(
+            created_at__gte=now - timedelta(hours=24)
+        ).values_list("created_at", "amount", "status")
+
+        buckets = {}
+        for created_at, amount, status in rows:
+            bucket = buckets.setdefault(self._bucket(created_at), {"n": 0, "v": 0})
+            bucket["n"] += 1
+            if status in VOLUME_STATUSES:
+                bucket["v"] += self._to_micros(amount)
+
+        return buckets
+
+    # ------------------------------
+    # HELPERS
+    # ------------------------------
+
+    def _increment(self, deltas):
+        """
+        deltas: [(transaction, count, volume), ...]
+        """
+        if not self.enabled or not deltas:
+            return
+
+        try:
+            pipe = self.client.pipeline(transaction=False)
+
+            for transaction, count, volume in deltas:
+                bucket = self._bucket(transaction.created_at or timezone.now())
+                micros = self._to_micros(volume)
+
+                for scope, owner_id in self.scopes_for(transaction):
+                    key = self._bucket_key(scope, owner_id, bucket)
+                    if count:
+                        pipe.hincrby(key, "n", count)
+                    if micros:
+                        pipe.hincrby(key, "v", micros)
+                    pipe.expire(key, KEY_TTL_SECONDS)
+
+            pipe.execute()
+
+        except redis.RedisError as e:
+            logger.warning("Velocity counter update failed: %s", e)
+
+    def _snapshot_from_redis(self, scope, owner_id, windows, now):
+        starts = self._window_starts(windows, now)
+        indexes = list(self._bucket_range(min(starts.values()), now))
+
+        pipe = self.client.pipeline(transaction=False)
+        pipe.exists(self._ready_key(scope, owner_id))
+        for index in indexes:
+            pipe.hmget(self._bucket_key(scope, owner_id, index), "n", "v")
+        ready, *values = pipe.execute()
+
+        if ready:
+            buckets = {
+                index: {"n": int(n or 0), "v": int(v or 0)}
+                for index, (n, v) in zip(indexes, values)
+            }
+        else:
+            buckets = self.rebuild(scope, owner_id, now)
+
+        result = {}
+        for window, start in starts.items():
+            first = self._bucket(start)
+            count = volume = 0
+            for index, bucket in buckets.items():
+                if index >= first:
+                    count += bucket["n"]
+                    volume += bucket["v"]
+            result[window] = {
+                "count": count,
+                "volume": Decimal(volume) / MICRO_UNITS,
+            }
+
+        return result
+
+    def _snapshot_from_database(self, scope, owner_id, windows, now):
+        rows = self._scope_queryset(scope, owner_id).windowed(
+            self._window_starts(windows, now)
+        )
+
+        return {
+            window: {"count": row["count"], "volume": row["volume"]}
+            for window, row in rows.items()
+        }
+
+    @staticmethod
+    def scopes_for(transaction):
+        scopes = [(SCOPE_SENDER, transaction.sender_id)]
+
+        if transaction.agent_id:
+            scopes.append((SCOPE_AGENT, transaction.agent_id))
+
+        if transaction.type in MERCHANT_TRANSACTION_TYPES:
+            scopes.append((SCOPE_MERCHANT, transaction.receiver_id))
+
+        return scopes
+
+    @staticmethod
+    def _scope_queryset(scope, owner_id):
+        if scope == SCOPE_SENDER:
+            return Transaction.objects.for_sender(owner_id)
+
+        if scope == SCOPE_AGENT:
+            return Transaction.objects.for_agent(owner_id)
+
+        if scope == SCOPE_MERCHANT:
+            return Transaction.objects.for_merchant(owner_id)
+
+        raise ValueError(f"Unknown velocity scope: {scope}")
+
+    @staticmethod
+    def _window_starts(windows, now):
+        starts = {}
+
+        for window in windows:
+            if window == WINDOW_1H:
+                starts[window] = now - timedelta(hours=1)
+            elif window == WINDOW_24H:
+                starts[window] = now - timedelta(hours=24)
+            elif window == WINDOW_DAY:
+                starts[window] = timezone.localtime(now).replace(
+                    hour=0, minute=0, second=0, microsecond=0
+                )
+            else:
+                raise ValueError(f"Unknown velocity window: {window}")
+
+        return starts
+
+    @staticmethod
+    def _bucket(moment):
+        return int(moment.timestamp()) // BUCKET_SECONDS
+
+    def _bucket_range(self, start, end):
+        return range(self._bucket(start), self._bucket(end) + 1)
+
+    @staticmethod
+    def _bucket_key(scope, owner_id, index):
+        return f"velocity:{scope}:{owner_id}:{index}"
+
+    @staticmethod
+    def _ready_key(scope, owner_id):
+        return f"velocity:{scope}:{owner_id}:ready"
+
+    @staticmethod
+    def _to_micros(amount):
+        return int(Decimal(amount) * MICRO_UNITS)
@@ -2,7 +2,9 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.core.exceptions import ValidationError
 from django.db.models import Q
+from django.http import Http404
 from django.utils import timezone
 
 from .models import (
@@ -15,11 +17,16 @@ from .models import (
 from .serializers import (
     TransactionSerializer,
     TransactionCreateSerializer,
+    TransactionBatchSerializer,
+    TransactionProjection,
     QRCodeSerializer,
     TransactionDisputeSerializer
 )
 
+from .pagination import QRCodePagination, TransactionHistoryPagination
 from .risk import RiskEngine
+from .state import TransactionStateMachine
+from .stats import UserStatsRollup
 
 
 # ==========================================================
@@ -29,26 +36,77 @@ from .risk import RiskEngine
 class TransactionViewSet(viewsets.ModelViewSet):
 
     permission_classes = [IsAuthenticated]
+    pagination_class = TransactionHistoryPagination
 
     def get_queryset(self):
         user = self.request.user
 
+        # Single-row lookups only: the history list uses get_history_branches
         return Transaction.objects.filter(
             Q(sender=user) | Q(receiver=user)
         ).select_related(
             "sender",
-            "receiver",
-            "wallet_from",
-            "wallet_to",
-            "agent",
-            "qr_code"
-        ).order_by("-created_at")
+            "receiver"
+        )
+
+    def get_history_branches(self):
+        """
+        One queryset per side of the history, each served by its
+        own (sender|receiver, created_at) index.
+        """
+        user = self.request.user
+
+        return [
+            Transaction.objects.filter(sender=user),
+            Transaction.objects.filter(receiver=user),
+        ]
 
     def get_serializer_class(self):
         if self.action == "create":
             return TransactionCreateSerializer
+        if self.action == "batch":
+            return TransactionBatchSerializer
         return TransactionSerializer
 
+    # -----------------------------------
+    # TRANSACTION HISTORY (CURSOR PAGINATED)
+    # -----------------------------------
+
+    def list(self, request, *args, **kwargs):
+
+        paginator = self.paginator
+        projection = TransactionProjection.from_request(request)
+        page_ids = paginator.paginate_branches(
+            self.get_history_branches(),
+            request
+        )
+
+        # Compact / sparse fieldsets: .values() projection, no model instances
+        if projection is not None:
+            rows = {
+                row["id"]: row
+                for row in Transaction.objects.filter(
+                    pk__in=page_ids
+                ).values(*projection.lookups)
+            }
+
+            return paginator.get_paginated_response([
+                projection.to_representation(rows[pk])
+                for pk in page_ids
+            ])
+
+        rows = Transaction.objects.filter(
+            pk__in=page_ids
+        ).select_related(
+            "sender",
+            "receiver"
+        ).in_bulk()
+
+        page = [rows[pk] for pk in page_ids]
+        serializer = self.get_serializer(page, many=True)
+
+        return paginator.get_paginated_response(serializer.data)
+
     # -----------------------------------
     # CREATE TRANSACTION
     # -----------------------------------
@@ -68,22 +126,71 @@ class TransactionViewSet(viewsets.ModelViewSet):
         )
 
     # -----------------------------------
-    # MANUAL AI REVIEW APPROVAL
+    # BATCH INGESTION (POS / CASH-OUTS)
     # -----------------------------------
 
-    @action(detail=True, methods=["post"])
-    def approve(self, request, pk=None):
+    @action(detail=False, methods=["post"])
+    def batch(self, request):
 
-        transaction = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
 
-        if transaction.status != TransactionStatus.AI_REVIEW:
-            return Response(
-                {"error": "Transaction not under AI review."},
-                status=400
+        created = sum(1 for item in results if item["status"] == "created")
+
+        return Response(
+            {
+                "created": created,
+                "failed": len(results) - created,
+                "results": results
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+
+    # -----------------------------------
+    # CONDITIONAL STATUS TRANSITION
+    # -----------------------------------
+
+    def _transition(self, to_status, from_statuses, error, **fields):
+        """
+        Single conditional UPDATE scoped to the user's transactions.
+        Returns an error Response when the transition did not happen.
+        """
+
+        machine = TransactionStateMachine(self.get_queryset())
+
+        try:
+            moved = machine.transition(
+                self.kwargs["pk"],
+                to_status,
+                from_statuses,
+                **fields
             )
+        except (ValueError, ValidationError):
+            raise Http404
+
+        if moved:
+            return None
 
-        transaction.status = TransactionStatus.APPROVED
-        transaction.save(update_fields=["status"])
+        # Only the failure path needs to tell 404 from 400
+        self.get_object()
+
+        return Response({"error": error}, status=400)
+
+    # -----------------------------------
+    # MANUAL AI REVIEW APPROVAL
+    # -----------------------------------
+
+    @action(detail=True, methods=["post"])
+    def approve(self, request, pk=None):
+
+        failed = self._transition(
+            TransactionStatus.APPROVED,
+            [TransactionStatus.AI_REVIEW],
+            "Transaction not under AI review."
+        )
+        if failed:
+            return failed
 
         return Response({"message": "Transaction approved."})
 
@@ -94,19 +201,13 @@ class TransactionViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"])
     def reject(self, request, pk=None):
 
-        transaction = self.get_object()
-
-        if transaction.status not in [
-            TransactionStatus.AI_REVIEW,
-            TransactionStatus.PENDING
-        ]:
-            return Response(
-                {"error": "Transaction cannot be rejected."},
-                status=400
-            )
-
-        transaction.status = TransactionStatus.REJECTED
-        transaction.save(update_fields=["status"])
+        failed = self._transition(
+            TransactionStatus.REJECTED,
+            [TransactionStatus.AI_REVIEW, TransactionStatus.PENDING],
+            "Transaction cannot be rejected."
+        )
+        if failed:
+            return failed
 
         return Response({"message": "Transaction rejected."})
 
@@ -117,14 +218,6 @@ class TransactionViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"])
     def confirm_onchain(self, request, pk=None):
 
-        transaction = self.get_object()
-
-        if transaction.status != TransactionStatus.APPROVED:
-            return Response(
-                {"error": "Transaction not approved."},
-                status=400
-            )
-
         tx_hash = request.data.get("tx_hash")
         block_number = request.data.get("block_number")
 
@@ -134,11 +227,16 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 status=400
             )
 
-        transaction.status = TransactionStatus.CONFIRMED
-        transaction.tx_hash = tx_hash
-        transaction.block_number = block_number
-        transaction.executed_at = timezone.now()
-        transaction.save()
+        failed = self._transition(
+            TransactionStatus.CONFIRMED,
+            [TransactionStatus.APPROVED],
+            "Transaction not approved.",
+            tx_hash=tx_hash,
+            block_number=block_number,
+            executed_at=timezone.now()
+        )
+        if failed:
+            return failed
 
         return Response({"message": "Transaction confirmed on-chain."})
 
@@ -149,22 +247,7 @@ class TransactionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def stats(self, request):
 
-        user = request.user
-
-        total_sent = Transaction.objects.filter(
-            sender=user,
-            status=TransactionStatus.CONFIRMED
-        ).count()
-
-        total_received = Transaction.objects.filter(
-            receiver=user,
-            status=TransactionStatus.CONFIRMED
-        ).count()
-
-        return Response({
-            "total_sent": total_sent,
-            "total_received": total_received
-        })
+        return Response(UserStatsRollup().get(request.user.pk))
 
 
 # ==========================================================
@@ -175,12 +258,29 @@ class QRCodeViewSet(viewsets.ModelViewSet):
 
     serializer_class = QRCodeSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = QRCodePagination
 
     def get_queryset(self):
-        return QRCode.objects.filter(
+        queryset = QRCode.objects.filter(
             merchant__user=self.request.user
         )
 
+        if self.action != "list":
+            return queryset
+
+        # ?status=active (default) | inactive | all
+        state = self.request.query_params.get("status", "active")
+        now = timezone.now()
+        live = Q(is_active=True) & (Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+
+        if state == "active":
+            return queryset.filter(live)
+
+        if state == "inactive":
+            return queryset.exclude(live)
+
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(
             merchant=self.request.user.merchantprofile
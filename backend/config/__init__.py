@@ -0,0 +1,5 @@
+# Load the Celery app with Django so that shared tasks (.delay() from
+# web processes included) use the FubaPay broker settings.
+from .celery import app as celery_app
+
+__all__ = ("celery_app",)
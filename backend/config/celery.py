@@ -0,0 +1,33 @@
+"""
+Celery application for FubaPay.
+
+Started with:
+- celery -A config worker
+- celery -A config beat
+"""
+
+import os
+
+from celery import Celery
+
+
+# --------------------------------------------------
+# Set default settings module
+# --------------------------------------------------
+
+os.environ.setdefault(
+    "DJANGO_SETTINGS_MODULE",
+    os.getenv("DJANGO_SETTINGS_MODULE", "config.settings.prod")
+)
+
+
+# --------------------------------------------------
+# Create Celery application
+# --------------------------------------------------
+
+app = Celery("fubapay")
+
+app.config_from_object("django.conf:settings", namespace="CELERY")
+
+# Loads apps.<app>.tasks for every installed app
+app.autodiscover_tasks()
@@ -6,6 +6,8 @@ Shared between development and production
 import os
 from pathlib import Path
 
+from celery.schedules import crontab
+
 # =====================================================
 # BASE DIRECTORY
 # =====================================================
@@ -176,9 +178,103 @@ STATICFILES_DIRS = [BASE_DIR / "static"]
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# =====================================================
+# REDIS
+# =====================================================
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+
+# Sliding-window velocity counters used by risk and limit checks
+VELOCITY_COUNTERS_ENABLED = os.getenv("VELOCITY_COUNTERS_ENABLED", "True") == "True"
+
+# Buffer merchant / agent statistics counters in Redis (flushed by Celery beat)
+PROFILE_COUNTERS_BUFFERED = os.getenv("PROFILE_COUNTERS_BUFFERED", "False") == "True"
+
+# Seconds an agent feature snapshot is reused in-process across evaluations
+# (0 = shared within one evaluation only; limit and velocity checks never reuse it)
+AGENT_FEATURES_TTL = int(os.getenv("AGENT_FEATURES_TTL", 0))
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+        "KEY_PREFIX": "fubapay",
+        "TIMEOUT": 300,
+    }
+}
+
+# =====================================================
+# CELERY
+# =====================================================
+
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_TASK_IGNORE_RESULT = True
+
+CELERY_BEAT_SCHEDULE = {
+    "deactivate-expired-qr-codes": {
+        "task": "apps.transactions.tasks.deactivate_expired_qr_codes",
+        "schedule": 300,
+    },
+    "flush-profile-counters": {
+        "task": "apps.transactions.tasks.flush_profile_counters",
+        "schedule": 5,
+    },
+    "review-pending-transactions": {
+        "task": "apps.ai_engine.tasks.review_pending_transactions",
+        "schedule": 2,
+    },
+    "settle-merchants": {
+        "task": "apps.merchants.tasks.settle_merchants",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    "rescore-agents": {
+        "task": "apps.agents.tasks.rescore_agents",
+        "schedule": crontab(hour=2, minute=0),
+    },
+}
+
 #=======================================
 
 OPENAI_API_KEY=os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+
+# Modèle LLM et prix (USD par million de tokens) pour les métriques de coût
+AI_LLM_MODEL = os.getenv("AI_LLM_MODEL", "gpt-4o-mini")
+AI_LLM_PROMPT_PRICE = float(os.getenv("AI_LLM_PROMPT_PRICE", 0.15))
+AI_LLM_COMPLETION_PRICE = float(os.getenv("AI_LLM_COMPLETION_PRICE", 0.60))
+
+# Budget total d'une évaluation IA (secondes) + disjoncteur
+AI_DECISION_TIMEOUT = float(os.getenv("AI_DECISION_TIMEOUT", 2.0))
+AI_BREAKER_FAILURE_THRESHOLD = int(os.getenv("AI_BREAKER_FAILURE_THRESHOLD", 5))
+AI_BREAKER_SLOW_CALL_THRESHOLD = float(os.getenv("AI_BREAKER_SLOW_CALL_THRESHOLD", 1.5))
+AI_BREAKER_RESET_TIMEOUT = int(os.getenv("AI_BREAKER_RESET_TIMEOUT", 30))
+
+# Revue IA asynchrone des transactions à faible risque (Celery)
+AI_ASYNC_REVIEW = os.getenv("AI_ASYNC_REVIEW", "True") == "True"
+AI_REVIEW_TIMEOUT = float(os.getenv("AI_REVIEW_TIMEOUT", 20.0))
+AI_REVIEW_BATCH_SIZE = int(os.getenv("AI_REVIEW_BATCH_SIZE", 20))
+
+# Modèle local de fraude (artefacts versionnés, voir train_fraud_model)
+AI_MODEL_DIR = os.getenv("AI_MODEL_DIR", str(BASE_DIR / "var" / "models"))
+AI_MODEL_VERSION = os.getenv("AI_MODEL_VERSION")          # None = dernière version
+AI_MODEL_RELOAD_INTERVAL = int(os.getenv("AI_MODEL_RELOAD_INTERVAL", 60))   # secondes
+# Seuils sur la probabilité calibrée (voir FraudModelTrainer)
+AI_MODEL_APPROVE_THRESHOLD = float(os.getenv("AI_MODEL_APPROVE_THRESHOLD", 0.2))
+AI_MODEL_BLOCK_THRESHOLD = float(os.getenv("AI_MODEL_BLOCK_THRESHOLD", 0.95))
+
+# Cache des décisions IA (par vecteur de features tranché)
+AI_DECISION_CACHE_TTL = int(os.getenv("AI_DECISION_CACHE_TTL", 300))
+AI_DECISION_CACHE_SIZE = int(os.getenv("AI_DECISION_CACHE_SIZE", 1024))
+
+# Export des métriques IA (ligne JSON fubapay.ai.metrics par processus, secondes)
+AI_METRICS_EXPORT_INTERVAL = int(os.getenv("AI_METRICS_EXPORT_INTERVAL", 60))
+
+# Moteurs candidats en mode ombre (noms ShadowEvaluator ou chemins pointés)
+AI_SHADOW_ENGINES = [name for name in os.getenv("AI_SHADOW_ENGINES", "").split(",") if name]
+AI_SHADOW_SAMPLE_RATE = float(os.getenv("AI_SHADOW_SAMPLE_RATE", 0.0))
+AI_SHADOW_WORKERS = int(os.getenv("AI_SHADOW_WORKERS", 2))
 
 #========================================
 
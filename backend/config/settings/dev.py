@@ -32,6 +32,20 @@ DATABASES = {
 }
 
 
+# =====================================================
+# REDIS (counters fall back to the database unless enabled)
+# =====================================================
+
+VELOCITY_COUNTERS_ENABLED = os.getenv("VELOCITY_COUNTERS_ENABLED", "False") == "True"
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "fubapay-dev",
+    }
+}
+
+
 # =====================================================
 # EMAIL (Console backend for development)
 # =====================================================
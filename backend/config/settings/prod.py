@@ -143,6 +143,19 @@ LOGGING = {
             "filename": os.path.join(BASE_DIR, "fubapay.log"),
             "formatter": "verbose",
         },
+        # Lignes JSON des métriques IA (une par processus et par intervalle)
+        "metrics": {
+            "level": "INFO",
+            "class": "logging.FileHandler",
+            "filename": os.path.join(BASE_DIR, "fubapay-metrics.log"),
+        },
+    },
+    "loggers": {
+        "fubapay.ai.metrics": {
+            "handlers": ["metrics"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
     "root": {
         "handlers": ["file"],
@@ -0,0 +1,108 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.agents.batch import AgentBatchScorer
+from apps.agents.models import AgentProfile
+from apps.ai_engine.scoring import AIScoringEngine
+from apps.transactions.counters import rebuild_agent_counters
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestAgentBatchScoring:
+
+    def create_agent(self, email, **fields):
+        return AgentProfile.objects.create(
+            user=User.objects.create_user(email=email),
+            **fields
+        )
+
+    def create_transactions(self, agent, status, count, days_ago=0):
+        sender = User.objects.create_user(email=f"{agent.pk}-{status}-{days_ago}@gmail.com")
+
+        for _ in range(count):
+            tx = Transaction.objects.create(
+                type=TransactionType.AGENT_EXCHANGE,
+                status=status,
+                sender=sender,
+                receiver=agent.user,
+                agent=agent,
+                amount=Decimal("10"),
+            )
+            if days_ago:
+                Transaction.objects.filter(pk=tx.pk).update(
+                    created_at=timezone.now() - timedelta(days=days_ago)
+                )
+
+    # 📊 Tous les agents recalculés en une requête groupée
+    def test_rescores_all_agents_in_one_pass(self, django_assert_max_num_queries):
+        reliable = self.create_agent("reliable@gmail.com")
+        self.create_transactions(reliable, TransactionStatus.CONFIRMED, 30)
+
+        risky = self.create_agent("risky@gmail.com", reputation_score=80, trust_level="trusted")
+        self.create_transactions(risky, TransactionStatus.FAILED, 6)
+        self.create_transactions(risky, TransactionStatus.DISPUTED, 1, days_ago=10)
+
+        idle = self.create_agent("idle@gmail.com")
+        settled = self.create_agent("settled@gmail.com", reputation_score=60, trust_level="standard")
+
+        # Historique antérieur aux compteurs : initialisé une fois
+        assert rebuild_agent_counters() == 4
+
+        with django_assert_max_num_queries(5):
+            summary = AgentBatchScorer().run()
+
+        assert summary["agents"] == 4
+        assert summary["updated"] == 3             # "settled" est déjà à jour
+
+        expected = {
+            reliable.pk: (75, "trusted"),           # 50 + 12 + 3 + 10
+            risky.pk: (22, "new"),                  # 50 - 12 - 6 - 10, sans bonus stabilité
+            idle.pk: (60, "standard"),              # 50 + 10
+            settled.pk: (60, "standard"),
+        }
+        for profile in AgentProfile.objects.all():
+            assert (profile.reputation_score, profile.trust_level) == expected[profile.pk]
+
+    # 🧮 Score borné et niveaux de confiance vectorisés
+    def test_scores_are_clipped_and_levels_match_model(self):
+        agent = self.create_agent("worst@gmail.com")
+        self.create_transactions(agent, TransactionStatus.DISPUTED, 12)
+        call_command("rebuild_agent_counters", stdout=io.StringIO())
+
+        AgentBatchScorer().run()
+        agent.refresh_from_db()
+        assert agent.reputation_score == 0
+
+        levels = AgentBatchScorer.trust_levels([100, 85, 84, 70, 50, 49])
+        assert list(levels) == ["elite", "elite", "trusted", "trusted", "standard", "new"]
+
+        agent.reputation_score = 84
+        agent.update_trust_level()
+        assert agent.trust_level == "trusted"
+
+    # 🎯 Même score que le recalcul unitaire (mêmes compteurs, mêmes fenêtres)
+    def test_batch_matches_unit_scoring(self):
+        agent = self.create_agent("agent@gmail.com")
+        self.create_transactions(agent, TransactionStatus.CONFIRMED, 20, days_ago=40)
+        self.create_transactions(agent, TransactionStatus.REFUNDED, 2, days_ago=40)
+        self.create_transactions(agent, TransactionStatus.FAILED, 3, days_ago=2)
+        self.create_transactions(agent, TransactionStatus.DISPUTED, 1, days_ago=5)
+
+        rebuild_agent_counters()
+        agent.refresh_from_db()
+        assert (agent.successful_transactions, agent.failed_transactions, agent.dispute_count) == (22, 3, 1)
+        assert agent.total_transactions == 25
+
+        AgentBatchScorer().run()
+        agent.refresh_from_db()
+
+        assert AIScoringEngine(agent).calculate_score(save=False) == agent.reputation_score
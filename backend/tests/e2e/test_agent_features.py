@@ -0,0 +1,101 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.agents.features import AgentFeatureStore
+from apps.agents.limits import AgentLimitManager
+from apps.agents.models import AgentProfile
+from apps.agents.scoring import AgentScoringEngine
+from apps.ai_engine.fraud import FraudDetectionEngine
+from apps.ai_engine.scoring import AIScoringEngine
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestAgentFeatureSnapshot:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.VELOCITY_COUNTERS_ENABLED = False
+        AgentFeatureStore.invalidate()
+
+        self.sender = User.objects.create_user(email="sender@gmail.com")
+        self.agent = AgentProfile.objects.create(
+            user=User.objects.create_user(email="agent@gmail.com"),
+            reputation_score=60,
+            successful_transactions=4,
+            failed_transactions=3,
+            dispute_count=1,
+        )
+
+        self.create(TransactionStatus.CONFIRMED, "150")
+        self.create(TransactionStatus.CONFIRMED, "50", hours_ago=30)
+        self.create(TransactionStatus.FAILED, "20")
+        self.create(TransactionStatus.FAILED, "20", hours_ago=72)
+        self.create(TransactionStatus.DISPUTED, "80", hours_ago=24 * 10)
+        self.create(TransactionStatus.FAILED, "20", hours_ago=24 * 40)
+
+        yield
+        AgentFeatureStore.invalidate()
+
+    def create(self, status, amount, hours_ago=0):
+        tx = Transaction.objects.create(
+            type=TransactionType.AGENT_EXCHANGE,
+            status=status,
+            sender=self.sender,
+            receiver=self.agent.user,
+            agent=self.agent,
+            amount=Decimal(amount),
+        )
+        if hours_ago:
+            Transaction.objects.filter(pk=tx.pk).update(
+                created_at=timezone.now() - timedelta(hours=hours_ago)
+            )
+
+    # 📦 Toutes les fenêtres en une seule requête
+    def test_snapshot_in_one_query(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            features = AgentFeatureStore(ttl=0).get(self.agent)
+
+        assert features["volume_24h"] == Decimal("150")
+        assert features["confirmed_volume_24h"] == Decimal("150")
+        assert features["failed_24h"] == 1
+        assert features["failed_7d"] == 2
+        assert features["disputes_30d"] == 1
+        assert features["successful_transactions"] == 4      # compteurs du profil
+
+    # 🔁 Quatre moteurs, un seul snapshot
+    def test_engines_share_snapshot(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            features = AgentFeatureStore(ttl=5).get(self.agent)
+
+            fraud = FraudDetectionEngine(self.agent, features)
+            scoring = AIScoringEngine(self.agent, features)
+            limits = AgentLimitManager(self.agent, features)
+            behavior = AgentScoringEngine(self.agent, features)
+
+            fraud.analyze_transaction(Transaction(amount=Decimal("10")))
+            limits.can_process("10")
+
+            assert scoring._stability_bonus() == 0
+            assert behavior.features is features
+
+        # Snapshot mémorisé (si activé) tant que le profil n'est pas modifié
+        with django_assert_num_queries(0):
+            assert AgentFeatureStore(ttl=5).get(self.agent) is features
+
+        scoring.calculate_score()
+        assert AgentFeatureStore(ttl=5).get(self.agent) is not features
+
+    # 🚧 Limites : volume du jour relu malgré un snapshot mémorisé
+    def test_limits_ignore_memoized_snapshot(self):
+        AgentFeatureStore(ttl=60).get(self.agent)
+        self.create(TransactionStatus.CONFIRMED, "40")      # écriture sans changement de updated_at
+
+        assert AgentLimitManager(self.agent).get_today_volume() == Decimal("190")
+        assert FraudDetectionEngine(self.agent).features["volume_24h"] == Decimal("190")
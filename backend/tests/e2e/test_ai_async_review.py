@@ -0,0 +1,226 @@
+import json
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from apps.agents.models import AgentProfile
+from apps.ai_engine.breaker import CLOSED
+from apps.ai_engine.cache import DecisionCache
+from apps.ai_engine.decision import AIDecisionEngine, openai_breaker
+from apps.ai_engine.review import AIReviewService, review_breaker
+from apps.ai_engine.risk import RiskEngine
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+
+User = get_user_model()
+
+
+class FakeCompletions:
+
+    def __init__(self, decision, delay=0):
+        self.content = json.dumps(decision)
+        self.delay = delay
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        time.sleep(self.delay)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeBatchCompletions:
+    """
+    Répond à un prompt multi-items : BLOCK pour les montants 500-1000.
+    """
+
+    def __init__(self, results=None, delay=0):
+        self.results = results
+        self.delay = delay
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        time.sleep(self.delay)
+        items = json.loads(kwargs["messages"][1]["content"])
+
+        results = [
+            {
+                "id": item["id"],
+                "decision": "BLOCK" if item["amt"] == "500-1000" else "APPROVE",
+                "risk_score": 80,
+                "reason": "batch",
+            }
+            for item in items
+        ] if self.results is None else self.results
+
+        message = SimpleNamespace(content=json.dumps({"results": results}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+@pytest.mark.django_db
+class TestAIAsyncReview:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.OPENAI_API_KEY = "sk-test"
+        settings.AI_ASYNC_REVIEW = True
+        openai_breaker.reset()
+        review_breaker.reset()
+
+        self.payer = User.objects.create_user(email="payer@gmail.com")
+        self.receiver = User.objects.create_user(email="receiver@gmail.com")
+        self.agent = AgentProfile.objects.create(
+            user=User.objects.create_user(email="agent@gmail.com")
+        )
+
+    def create_transaction(self, status=TransactionStatus.PENDING, amount="120"):
+        return Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=status,
+            sender=self.payer,
+            receiver=self.receiver,
+            agent=self.agent,
+            amount=Decimal(amount),
+        )
+
+    def fake_engine(self, engine, decision, delay=0):
+        completions = FakeCompletions(decision, delay)
+        engine.cache = DecisionCache()
+        engine.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        return completions
+
+    def review(self, transaction, decision):
+        engine = AIDecisionEngine()
+        self.fake_engine(engine, decision)
+        return AIReviewService(engine).review(transaction.pk)
+
+    # ⚡ Faible risque → approuvé localement, revue IA mise en file
+    def test_low_risk_is_approved_without_waiting_for_model(self, django_capture_on_commit_callbacks):
+        engine = RiskEngine(self.create_transaction())
+        completions = self.fake_engine(engine.ai_engine, {"decision": "APPROVE", "risk_score": 5, "reason": "ok"})
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            result = engine.evaluate()
+
+        assert result["decision"] == "APPROVE"
+        assert result["details"]["ai_review"] == "queued"
+        assert completions.calls == []
+        assert len(callbacks) == 1
+
+    # ⚖️ Cas limite → le modèle décide en ligne
+    def test_borderline_waits_on_model(self, django_capture_on_commit_callbacks):
+        AgentProfile.objects.filter(pk=self.agent.pk).update(dispute_count=3)
+        self.agent.refresh_from_db()
+
+        engine = RiskEngine(self.create_transaction())
+        completions = self.fake_engine(engine.ai_engine, {"decision": "REVIEW", "risk_score": 55, "reason": "disputes"})
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            result = engine.evaluate()
+
+        assert result["decision"] == "REVIEW"
+        assert len(completions.calls) == 1
+        assert callbacks == []
+
+    # 🚨 Verdict BLOCK → DISPUTED + agent signalé
+    def test_block_verdict_disputes_and_flags_agent(self):
+        transaction = self.create_transaction(status=TransactionStatus.APPROVED)
+
+        outcome = self.review(transaction, {"decision": "BLOCK", "risk_score": 91, "reason": "mule ring"})
+
+        transaction.refresh_from_db()
+        self.agent.refresh_from_db()
+        assert outcome["agent_flagged"]
+        assert transaction.status == TransactionStatus.DISPUTED
+        assert transaction.ai_decision_reason == "mule ring"
+        assert transaction.risk_score == 91
+        assert self.agent.is_flagged
+
+    # 🔎 Verdict REVIEW → AI_REVIEW, sauf si déjà confirmé
+    def test_review_verdict_moves_to_ai_review_when_possible(self):
+        approved = self.create_transaction(status=TransactionStatus.APPROVED)
+        confirmed = self.create_transaction(status=TransactionStatus.CONFIRMED)
+        verdict = {"decision": "REVIEW", "risk_score": 60, "reason": "unusual hour"}
+
+        self.review(approved, verdict)
+        self.review(confirmed, verdict)
+
+        approved.refresh_from_db()
+        confirmed.refresh_from_db()
+        assert approved.status == TransactionStatus.AI_REVIEW
+        assert confirmed.status == TransactionStatus.CONFIRMED
+        assert confirmed.ai_decision_reason == "unusual hour"
+
+    # 🐢 Revue lente : disjoncteur dédié, celui du chemin de paiement reste fermé
+    def test_slow_review_does_not_trip_payment_breaker(self, monkeypatch):
+        monkeypatch.setattr(openai_breaker, "failure_threshold", 1)
+        monkeypatch.setattr(openai_breaker, "slow_call_threshold", 0.01)
+        transaction = self.create_transaction(status=TransactionStatus.APPROVED)
+
+        service = AIReviewService()
+        self.fake_engine(service._engine(), {"decision": "APPROVE", "risk_score": 5, "reason": "ok"}, delay=0.05)
+        service.review(transaction.pk)
+
+        assert service.engine.breaker is review_breaker
+        assert openai_breaker.state == CLOSED
+        assert review_breaker.state == CLOSED
+
+    # 📦 Lot → un seul appel LLM, verdicts démultiplexés par transaction
+    def test_batch_review_uses_one_model_call(self):
+        transactions = [
+            self.create_transaction(status=TransactionStatus.APPROVED, amount=amount)
+            for amount in ["120", "130", "600"]
+        ]
+        engine = AIDecisionEngine(cache=DecisionCache())
+        completions = FakeBatchCompletions()
+        engine.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+        result = AIReviewService(engine).review_batch([t.pk for t in transactions])
+
+        assert len(completions.calls) == 1
+        # Contextes identiques (120 / 130) envoyés une seule fois
+        assert len(json.loads(completions.calls[0]["messages"][1]["content"])) == 2
+        assert len(result["reviewed"]) == 3
+        assert result["unresolved"] == []
+
+        statuses = dict(Transaction.objects.values_list("amount", "status"))
+        assert statuses[Decimal("600")] == TransactionStatus.DISPUTED
+        assert statuses[Decimal("120")] == TransactionStatus.APPROVED
+
+    # 🧪 Items invalides ou inconnus → non résolus, jamais appliqués
+    def test_invalid_batch_items_stay_unresolved(self):
+        transaction = self.create_transaction(status=TransactionStatus.APPROVED)
+        engine = AIDecisionEngine(cache=DecisionCache())
+        engine.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeBatchCompletions([
+            {"id": 7, "decision": "BLOCK", "risk_score": 99, "reason": "unknown id"},
+            {"id": 0, "decision": "MAYBE", "risk_score": 99, "reason": "invalid"},
+        ])))
+
+        result = AIReviewService(engine).review_batch([transaction.pk])
+
+        transaction.refresh_from_db()
+        assert result == {"reviewed": [], "unresolved": [str(transaction.pk)]}
+        assert transaction.status == TransactionStatus.APPROVED
+
+    # 🐢 Lot lent : compté par le disjoncteur de revue, pas par celui du paiement
+    def test_slow_batch_does_not_trip_payment_breaker(self, monkeypatch):
+        monkeypatch.setattr(openai_breaker, "failure_threshold", 1)
+        monkeypatch.setattr(openai_breaker, "slow_call_threshold", 0.01)
+        transactions = [
+            self.create_transaction(status=TransactionStatus.APPROVED, amount=amount)
+            for amount in ["120", "600"]
+        ]
+
+        service = AIReviewService()
+        engine = service._engine()
+        engine.cache = DecisionCache()
+        engine.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeBatchCompletions(delay=0.05)))
+
+        result = service.review_batch([t.pk for t in transactions])
+
+        assert len(result["reviewed"]) == 2
+        assert openai_breaker.state == CLOSED
+        assert review_breaker.state == CLOSED
@@ -0,0 +1,121 @@
+import json
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from apps.agents.models import AgentProfile
+from apps.ai_engine.cache import DecisionCache
+from apps.ai_engine.decision import AIDecisionEngine
+from apps.ai_engine.metrics import metrics
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+
+User = get_user_model()
+
+
+class FakeCompletions:
+
+    def __init__(self, content):
+        self.content = content
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.django_db
+class TestAIDecisionCache:
+
+    DECISION = '{"decision": "APPROVE", "risk_score": 12, "reason": "usual pattern"}'
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.OPENAI_API_KEY = "sk-test"
+        metrics.reset()
+
+        self.payer = User.objects.create_user(email="payer@gmail.com")
+        self.receiver = User.objects.create_user(email="receiver@gmail.com")
+        self.agent = AgentProfile.objects.create(
+            user=User.objects.create_user(email="agent@gmail.com")
+        )
+
+    def create_engine(self, content=DECISION, **cache_options):
+        engine = AIDecisionEngine(cache=DecisionCache(**cache_options))
+        engine.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(content)))
+        return engine, engine.client.chat.completions
+
+    def create_transaction(self, amount):
+        return Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=TransactionStatus.PENDING,
+            sender=self.payer,
+            receiver=self.receiver,
+            agent=self.agent,
+            amount=Decimal(amount),
+        )
+
+    # ⚡ Même contexte de risque → un seul appel LLM
+    def test_identical_context_is_served_from_cache(self):
+        engine, completions = self.create_engine()
+
+        first = engine.evaluate_transaction(self.create_transaction("120"))
+        second = engine.evaluate_transaction(self.create_transaction("130"))
+
+        assert first == second == json.loads(self.DECISION)
+        assert len(completions.calls) == 1
+        assert metrics.get("decision_cache.hits") == 1
+        assert metrics.get("decision_cache.misses") == 1
+        assert engine.cache.stats()["hit_rate"] == 0.5
+
+        # Le prompt ne contient que le vecteur tranché
+        prompt = json.loads(completions.calls[0]["messages"][1]["content"])
+        assert prompt["amt"] == "100-250"
+        assert "created_at" not in prompt
+
+    # 🎯 Autre tranche de montant → nouvel appel
+    def test_different_bucket_calls_model(self):
+        engine, completions = self.create_engine()
+
+        engine.evaluate_transaction(self.create_transaction("120"))
+        engine.evaluate_transaction(self.create_transaction("600"))
+
+        assert len(completions.calls) == 2
+
+    # ⏱️ Expiration TTL + éviction LRU
+    def test_ttl_and_lru_eviction(self):
+        clock = FakeClock()
+        engine, completions = self.create_engine(max_size=2, ttl=60, clock=clock)
+
+        for amount in ["20", "120", "20", "600", "20"]:
+            engine.evaluate_transaction(self.create_transaction(amount))
+
+        # "100-250" a été évincée (la moins récemment utilisée), "10-25" est restée
+        assert len(completions.calls) == 3
+        engine.evaluate_transaction(self.create_transaction("120"))
+        assert len(completions.calls) == 4
+
+        clock.now = 61
+        engine.evaluate_transaction(self.create_transaction("20"))
+        assert len(completions.calls) == 5
+
+    # 🚫 Réponse illisible : jamais mise en cache
+    def test_parsing_errors_are_not_cached(self):
+        engine, completions = self.create_engine(content="not json")
+
+        for _ in range(2):
+            decision = engine.evaluate_transaction(self.create_transaction("120"))
+            assert decision["reason"] == "AI parsing error"
+
+        assert len(completions.calls) == 2
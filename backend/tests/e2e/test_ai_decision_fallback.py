@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from apps.agents.models import AgentProfile
+from apps.ai_engine.breaker import CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+from apps.ai_engine.cache import decision_cache
+from apps.ai_engine.decision import AIDecisionEngine, AIUnavailable, openai_breaker
+from apps.ai_engine.risk import RiskEngine
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+
+User = get_user_model()
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    Faux serveur OpenAI : /v1/chat/completions avec latence et statut réglables.
+    """
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server.requests += 1
+
+        time.sleep(server.delay)
+
+        if server.status != 200:
+            body = {"error": {"message": "upstream error", "type": "server_error"}}
+        else:
+            body = {
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "gpt-4o-mini",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": json.dumps(server.decision)},
+                    "finish_reason": "stop",
+                }],
+            }
+
+        payload = json.dumps(body).encode()
+        try:
+            self.send_response(server.status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass                                # le client a abandonné (timeout)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.django_db
+class TestAIDecisionFallback:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, monkeypatch):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAIHandler)
+        server.daemon_threads = True
+        server.requests = 0
+        server.delay = 0
+        server.status = 200
+        server.decision = {"decision": "BLOCK", "risk_score": 88, "reason": "mule pattern"}
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.server = server
+
+        settings.OPENAI_API_KEY = "sk-test"
+        settings.OPENAI_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}/v1"
+        settings.AI_DECISION_TIMEOUT = 0.5
+        settings.AI_ASYNC_REVIEW = False
+
+        decision_cache.clear()
+        openai_breaker.reset()
+        monkeypatch.setattr(openai_breaker, "failure_threshold", 2)
+
+        self.payer = User.objects.create_user(email="payer@gmail.com")
+        self.receiver = User.objects.create_user(email="receiver@gmail.com")
+        self.agent = AgentProfile.objects.create(
+            user=User.objects.create_user(email="agent@gmail.com")
+        )
+
+        yield
+
+        server.shutdown()
+        server.server_close()
+        openai_breaker.reset()
+        decision_cache.clear()
+
+    def evaluate(self, amount="120"):
+        transaction = Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=TransactionStatus.PENDING,
+            sender=self.payer,
+            receiver=self.receiver,
+            agent=self.agent,
+            amount=Decimal(amount),
+        )
+        return RiskEngine(transaction).evaluate()
+
+    # 🤖 Fournisseur sain → décision IA
+    def test_healthy_provider_decides(self):
+        result = self.evaluate()
+
+        assert result["decision"] == "BLOCK"
+        assert result["risk_score"] == 88
+        assert self.server.requests == 1
+
+    # 🐢 Fournisseur lent → repli local dans le budget
+    def test_slow_provider_falls_back_within_deadline(self):
+        self.server.delay = 2
+
+        started = time.monotonic()
+        result = self.evaluate()
+        elapsed = time.monotonic() - started
+
+        assert elapsed < 1.5
+        assert result["decision"] == "APPROVE"
+        assert result["details"]["source"] == "fallback"
+
+    # ⚡ Erreurs répétées → disjoncteur ouvert, plus d'appel au fournisseur
+    def test_breaker_opens_after_errors(self):
+        self.server.status = 500
+
+        results = [self.evaluate(amount) for amount in ["20", "120", "600", "3000"]]
+
+        assert all(result["details"]["source"] == "fallback" for result in results)
+        assert self.server.requests == 2
+        assert openai_breaker.state == OPEN
+
+    # 🔁 Demi-ouverture : un seul appel d'essai
+    def test_breaker_half_open_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            "test",
+            failure_threshold=1,
+            slow_call_threshold=1,
+            reset_timeout=30,
+            clock=clock
+        )
+
+        breaker.record_failure()
+        assert not breaker.allow()
+
+        clock.now = 31
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+
+        breaker.record_success(duration=2)          # trop lent → réouvert
+        assert breaker.state == OPEN
+
+        clock.now = 62
+        assert breaker.allow()
+        breaker.record_success(duration=0.1)
+        assert breaker.state == CLOSED
+
+    # 💥 Erreur inattendue pendant l'essai → emplacement libéré, disjoncteur réouvert
+    def test_unexpected_error_releases_half_open_trial(self, monkeypatch):
+        clock = FakeClock()
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30, clock=clock)
+        engine = AIDecisionEngine(breaker=breaker)
+
+        def crash(*args, **kwargs):
+            raise ValueError("malformed response")
+
+        monkeypatch.setattr(engine, "_complete", crash)
+
+        breaker.record_failure()
+        clock.now = 31
+
+        with pytest.raises(AIUnavailable):
+            engine._call("system", {"amount": 1}, timeout=1)
+
+        assert breaker.state == OPEN
+
+        clock.now = 62
+        assert breaker.allow()
@@ -0,0 +1,136 @@
+import json
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from apps.agents.models import AgentProfile
+from apps.ai_engine.cache import DecisionCache, decision_features
+from apps.ai_engine.decision import AIDecisionEngine
+from apps.ai_engine.metrics import MetricsRegistry, metrics
+from apps.ai_engine.prompt import SYSTEM_PROMPT, TokenCounter, build_messages
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+
+User = get_user_model()
+
+
+class FakeCompletions:
+
+    def __init__(self, usage=None):
+        self.usage = usage
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        message = SimpleNamespace(
+            content='{"decision":"APPROVE","risk_score":10,"reason":"usual pattern"}'
+        )
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=self.usage)
+
+
+@pytest.mark.django_db
+class TestAIPromptBudget:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.OPENAI_API_KEY = "sk-test"
+        metrics.reset()
+
+        self.agent = AgentProfile.objects.create(
+            user=User.objects.create_user(email="agent@gmail.com"),
+            total_transactions=42,
+        )
+        self.transaction = Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=TransactionStatus.PENDING,
+            sender=User.objects.create_user(email="payer@gmail.com"),
+            receiver=User.objects.create_user(email="receiver@gmail.com"),
+            agent=self.agent,
+            amount=Decimal("120"),
+        )
+
+    def create_engine(self, usage=None):
+        engine = AIDecisionEngine(cache=DecisionCache())
+        engine.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions(usage)))
+        return engine, engine.client.chat.completions
+
+    # ✂️ Prompt compact : clés courtes, JSON sans espaces, réponse plafonnée
+    def test_prompt_is_compacted(self):
+        engine, completions = self.create_engine()
+        engine.evaluate_transaction(self.transaction)
+
+        call = completions.calls[0]
+        system, user = call["messages"]
+
+        assert system["content"] == SYSTEM_PROMPT
+        assert json.loads(user["content"]) == {
+            "amt": "100-250", "cur": "USDC", "st": "PENDING",
+            "rep": 50, "lvl": "new", "vol": "0-100", "n": "25-50", "disp": 0, "frz": 0,
+        }
+        assert " " not in user["content"]
+        assert call["max_tokens"] > 0
+
+        # Moins de tokens que l'ancien corps verbeux
+        counter = TokenCounter()
+        verbose = json.dumps(
+            decision_features(engine._build_payload(self.transaction, self.agent))
+        )
+        assert counter.count(user["content"]) < counter.count(verbose) * 0.7
+
+    # 💰 Tokens et coût depuis response.usage
+    def test_usage_and_cost_metrics(self):
+        engine, _ = self.create_engine(SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+        engine.evaluate_transaction(self.transaction)
+
+        assert metrics.get("ai.llm.calls") == 1
+        assert metrics.get("ai.tokens.prompt") == 120
+        assert metrics.get("ai.tokens.completion") == 30
+        assert metrics.get("ai.cost.micro_usd") == 36             # 120 × 0.15 + 30 × 0.60
+        assert metrics.histogram("ai.llm.latency_ms")["count"] == 1
+        assert metrics.histogram("ai.tokens.prompt_per_call")["sum"] == 120
+
+        # Usage renvoyé : aucun compteur de tokens local construit
+        assert engine.tokens is None
+
+    # 🔢 Sans usage renvoyé → comptage local des tokens
+    def test_tokens_counted_locally_without_usage(self):
+        engine, completions = self.create_engine()
+        engine.evaluate_transaction(self.transaction)
+
+        messages = completions.calls[0]["messages"]
+        expected = TokenCounter().count_messages(build_messages(SYSTEM_PROMPT, json.loads(messages[1]["content"])))
+
+        assert metrics.get("ai.tokens.estimated_calls") == 1
+        assert metrics.get("ai.tokens.prompt") == expected
+        assert metrics.get("ai.tokens.completion") > 0
+
+    # 📤 Export périodique : une ligne JSON par intervalle, stats des caches incluses
+    def test_metrics_are_exported_as_log_lines(self, settings, caplog):
+        settings.AI_METRICS_EXPORT_INTERVAL = 60
+        now = [0.0]
+        registry = MetricsRegistry(clock=lambda: now[0])
+        registry.register("decision_cache", lambda: {"hit_rate": 0.5})
+
+        with caplog.at_level("INFO", logger="fubapay.ai.metrics"):
+            registry.incr("ai.tokens.prompt", 120)
+            registry.observe("ai.llm.latency_ms", 40)
+            assert not caplog.records
+
+            now[0] = 61
+            registry.incr("ai.llm.calls")
+            registry.incr("ai.llm.calls")
+
+        assert len(caplog.records) == 1
+        record = json.loads(caplog.records[0].getMessage())
+        assert record["counters"] == {"ai.tokens.prompt": 120, "ai.llm.calls": 1}
+        assert record["histograms"]["ai.llm.latency_ms"]["count"] == 1
+        assert record["sources"] == {"decision_cache": {"hit_rate": 0.5}}
+
+        # Registre global : stats du cache de décision exportées
+        engine, _ = self.create_engine(SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+        engine.evaluate_transaction(self.transaction)
+
+        exported = metrics.export()
+        assert exported["counters"]["ai.tokens.prompt"] == 120
+        assert "hit_rate" in exported["sources"]["decision_cache"]
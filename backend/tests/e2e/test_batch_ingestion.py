@@ -0,0 +1,122 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.transactions.models import Transaction
+from apps.transactions.views import TransactionViewSet
+from apps.wallets.models import BlockchainNetwork, Wallet
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestBatchIngestion:
+
+    def setup_method(self):
+        self.factory = APIRequestFactory()
+        self.view = TransactionViewSet.as_view({"post": "batch"})
+        self.create_view = TransactionViewSet.as_view({"post": "create"})
+
+    def create_merchant_and_payer(self):
+        network = BlockchainNetwork.objects.create(
+            name="POLYGON",
+            chain_id=137,
+            rpc_primary="https://polygon-rpc.com",
+            explorer_url="https://polygonscan.com"
+        )
+        payer = User.objects.create_user(email="pos@gmail.com")
+        merchant = User.objects.create_user(email="shop@gmail.com", role="merchant")
+        wallet = Wallet.objects.create(
+            user=payer,
+            network=network,
+            wallet_type="USER",
+            address="0xpayer"
+        )
+        return payer, merchant, wallet
+
+    def post_batch(self, user, items):
+        request = self.factory.post(
+            "/api/transactions/batch/",
+            {"transactions": items},
+            format="json"
+        )
+        force_authenticate(request, user=user)
+        return self.view(request)
+
+    def items(self, merchant, wallet, count):
+        return [
+            {
+                "type": "MERCHANT_PAYMENT",
+                "receiver": merchant.id,
+                "wallet_from": str(wallet.id),
+                "amount": "12.50",
+            }
+            for _ in range(count)
+        ]
+
+    # ✅ Lot valide inséré en une fois
+    def test_batch_creates_all_items(self):
+        payer, merchant, wallet = self.create_merchant_and_payer()
+
+        response = self.post_batch(payer, self.items(merchant, wallet, 20))
+
+        assert response.status_code == 201
+        assert response.data["created"] == 20
+        assert Transaction.objects.filter(sender=payer).count() == 20
+        assert all(item["status"] == "created" for item in response.data["results"])
+
+    # ⚠️ Erreurs par élément sans bloquer le reste
+    def test_batch_reports_per_item_errors(self):
+        payer, merchant, wallet = self.create_merchant_and_payer()
+        items = self.items(merchant, wallet, 2)
+        items.append({**items[0], "receiver": payer.id})
+        items.append({**items[0], "amount": "-1"})
+
+        response = self.post_batch(payer, items)
+
+        results = response.data["results"]
+        assert response.data["created"] == 2
+        assert [item["status"] for item in results] == [
+            "created", "created", "error", "error"
+        ]
+        assert Transaction.objects.count() == 2
+
+    # ⚡ Nombre de requêtes indépendant de la taille du lot
+    def test_batch_query_count_is_constant(self):
+        payer, merchant, wallet = self.create_merchant_and_payer()
+
+        with CaptureQueriesContext(connection) as small:
+            self.post_batch(payer, self.items(merchant, wallet, 5))
+
+        with CaptureQueriesContext(connection) as large:
+            self.post_batch(payer, self.items(merchant, wallet, 30))
+
+        assert len(large.captured_queries) == len(small.captured_queries)
+
+    # 📝 Création unitaire : un seul INSERT, aucun UPDATE
+    def test_single_create_writes_once(self):
+        payer, merchant, wallet = self.create_merchant_and_payer()
+
+        request = self.factory.post(
+            "/api/transactions/",
+            self.items(merchant, wallet, 1)[0],
+            format="json"
+        )
+        force_authenticate(request, user=payer)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create_view(request)
+
+        writes = [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE"))
+        ]
+
+        assert response.status_code == 201
+        assert response.data["status"] == "APPROVED"
+        assert len(writes) == 1
+        assert writes[0].startswith("INSERT")
@@ -0,0 +1,178 @@
+import io
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+import joblib
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.agents.models import AgentProfile
+from apps.ai_engine.model import (
+    FEATURES,
+    FraudModel,
+    FraudModelTrainer,
+    point_in_time_features,
+    transaction_features,
+)
+from apps.ai_engine.risk import RiskEngine
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestFraudModel:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, tmp_path):
+        settings.OPENAI_API_KEY = "sk-test"
+        settings.AI_MODEL_DIR = str(tmp_path)
+        self.model_dir = tmp_path
+
+        self.receiver = User.objects.create_user(email="receiver@gmail.com")
+        self.agent = AgentProfile.objects.create(
+            user=User.objects.create_user(email="agent@gmail.com")
+        )
+
+        # Historique : gros montants contestés / petits montants confirmés
+        for index in range(60):
+            sender = User.objects.create_user(email=f"user{index}@gmail.com")
+            fraud = index % 4 == 0
+
+            Transaction.objects.create(
+                type=TransactionType.P2P,
+                status=TransactionStatus.DISPUTED if fraud else TransactionStatus.CONFIRMED,
+                sender=sender,
+                receiver=self.receiver,
+                amount=Decimal(4000 + index * 10 if fraud else 10 + index),
+            )
+
+    def payment(self, amount, **fields):
+        return Transaction(
+            type=TransactionType.P2P,
+            status=TransactionStatus.PENDING,
+            sender=User.objects.create_user(email=f"payer{amount}@gmail.com"),
+            receiver=self.receiver,
+            amount=Decimal(amount),
+            **fields
+        )
+
+    # 🧠 Entraînement → artefact versionné, prédiction cohérente
+    def test_train_and_predict(self):
+        call_command("train_fraud_model", "--min-samples", "50", stdout=io.StringIO())
+
+        artifacts = list(self.model_dir.glob("fraud_model_*.joblib"))
+        assert len(artifacts) == 1
+
+        model = FraudModel.current()
+        assert model.features == FEATURES
+        assert model.metrics["samples"] == 60
+
+        risky = transaction_features(self.payment("4500"))
+        usual = transaction_features(self.payment("25"))
+        assert model.predict(risky) > 0.5
+        assert model.predict(usual) < 0.1
+        assert model.metrics["calibration_samples"] == 12
+
+        # Inférence en Python pur : quelques microsecondes
+        started = time.perf_counter()
+        for _ in range(10000):
+            model.predict(usual)
+        assert (time.perf_counter() - started) / 10000 < 50e-6
+
+    # 🚦 Modèle présent → décision locale, sans appel LLM
+    def test_risk_engine_uses_model_before_llm(self):
+        FraudModelTrainer.save(FraudModelTrainer(min_samples=50).train())
+
+        transaction = Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=TransactionStatus.PENDING,
+            sender=User.objects.create_user(email="payer@gmail.com"),
+            receiver=self.receiver,
+            agent=self.agent,
+            amount=Decimal("20"),
+        )
+        engine = RiskEngine(transaction)
+        engine.ai_engine = None                 # tout appel LLM échouerait
+
+        result = engine.evaluate()
+
+        assert result["decision"] == "APPROVE"
+        assert result["details"]["source"] == "model"
+        assert result["details"]["fraud_probability"] < 0.2
+
+    # 🎯 Mêmes features à l'entraînement et à l'inférence (à l'instant de la transaction)
+    def test_training_and_inference_features_match(self):
+        payer = User.objects.create_user(email="payer@gmail.com")
+        now = timezone.now()
+
+        rows = [
+            (self.agent, TransactionStatus.FAILED, "30", timedelta(days=3)),
+            (self.agent, TransactionStatus.CONFIRMED, "40", timedelta(days=2)),
+            (self.agent, TransactionStatus.DISPUTED, "50", timedelta(hours=30)),
+            (self.agent, TransactionStatus.FAILED, "60", timedelta(hours=2)),      # issue pas encore connue
+            (None, TransactionStatus.PENDING, "70", timedelta(minutes=30)),
+            (None, TransactionStatus.REJECTED, "80", timedelta(minutes=10)),
+        ]
+        for agent, status, amount, age in rows:
+            transaction = Transaction.objects.create(
+                type=TransactionType.P2P,
+                status=status,
+                sender=payer,
+                receiver=self.receiver,
+                agent=agent,
+                amount=Decimal(amount),
+            )
+            Transaction.objects.filter(pk=transaction.pk).update(created_at=now - age)
+
+        transaction = Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=TransactionStatus.DISPUTED,
+            sender=payer,
+            receiver=self.receiver,
+            agent=self.agent,
+            amount=Decimal("90"),
+        )
+        transaction.refresh_from_db()
+
+        frame = point_in_time_features(FraudModelTrainer._history(now - timedelta(days=60)))
+        trained = frame.loc[frame["created_at"] == transaction.created_at, FEATURES].iloc[0].tolist()
+
+        assert transaction_features(transaction) == pytest.approx(trained)
+
+        # Agent : 2 issues connues (1 échec), 1 litige ; l'échec récent est ignoré
+        assert trained[FEATURES.index("agent_failure_rate")] == 0.5
+        assert trained[FEATURES.index("agent_dispute_count")] == 1
+
+    # 📂 Artefact résolu une fois par intervalle, pas à chaque évaluation
+    def test_artifact_is_resolved_once_per_interval(self, settings, monkeypatch):
+        artifact = FraudModelTrainer(min_samples=50).train()
+        FraudModelTrainer.save(artifact)
+
+        resolutions = []
+        artifact_path = FraudModel.artifact_path
+
+        def counted(directory=None, version=None):
+            resolutions.append(directory)
+            return artifact_path(directory, version)
+
+        monkeypatch.setattr(FraudModel, "artifact_path", staticmethod(counted))
+
+        model = FraudModel.current()
+        assert FraudModel.current() is model
+        assert len(resolutions) == 1
+
+        # Version déposée par un autre processus : visible après l'intervalle
+        joblib.dump({**artifact, "version": "99990101000000"}, self.model_dir / "fraud_model_99990101000000.joblib")
+        assert FraudModel.current() is model
+
+        settings.AI_MODEL_RELOAD_INTERVAL = 0
+        assert FraudModel.current().version == "99990101000000"
+
+    # 📉 Pas assez d'historique → erreur explicite
+    def test_training_requires_enough_samples(self):
+        with pytest.raises(ValueError):
+            FraudModelTrainer(min_samples=1000).train()
@@ -0,0 +1,239 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.audit.logger import AuditLogger
+from apps.merchants.dashboard import MerchantDashboardCache
+from apps.merchants.models import MerchantProfile, MerchantDailyStats, MerchantHourlyStats
+from apps.merchants.views import MerchantDashboardView, MerchantRevenueSeriesView
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+from apps.transactions.state import TransactionStateMachine
+
+User = get_user_model()
+
+
+class MerchantPaymentsMixin:
+
+    def create_merchant(self):
+        user = User.objects.create_user(email="shop@gmail.com", role="merchant")
+        merchant = MerchantProfile.objects.create(
+            user=user,
+            business_name="Boutique",
+            merchant_code="SHOP001"
+        )
+        payer = User.objects.create_user(email="payer@gmail.com")
+        return merchant, payer
+
+    def pay(self, merchant, payer, amount, confirm=True):
+        tx = Transaction.objects.create(
+            type=TransactionType.MERCHANT_PAYMENT,
+            status=TransactionStatus.APPROVED,
+            sender=payer,
+            receiver=merchant.user,
+            amount=Decimal(amount),
+        )
+        if confirm:
+            tx.mark_confirmed("0xhash", 1)
+        return tx
+
+
+@pytest.mark.django_db
+class TestMerchantDashboard(MerchantPaymentsMixin):
+
+    def setup_method(self):
+        cache.clear()
+
+    def get_dashboard(self, user):
+        request = APIRequestFactory().get("/api/merchants/dashboard/")
+        force_authenticate(request, user=user)
+        return MerchantDashboardView.as_view()(request)
+
+    # 📊 Rollup mis à jour à la confirmation
+    def test_dashboard_reads_rollup(self, django_assert_max_num_queries):
+        merchant, payer = self.create_merchant()
+        self.pay(merchant, payer, "20")
+        self.pay(merchant, payer, "5.5")
+        self.pay(merchant, payer, "100", confirm=False)
+
+        with django_assert_max_num_queries(4):
+            response = self.get_dashboard(merchant.user)
+
+        data = response.data
+        assert response.status_code == 200
+        assert data["total_revenue"] == Decimal("25.5")
+        assert data["today_revenue"] == Decimal("25.5")
+        assert data["monthly_revenue"] == Decimal("25.5")
+        assert data["total_transactions"] == 2
+        assert data["ai_score"] == 100
+        assert len(data["recent_transactions"]) == 3
+        assert data["alerts"] == []
+
+    # ↩️ Remboursement → décrément
+    def test_refund_decrements_rollup(self):
+        merchant, payer = self.create_merchant()
+        tx = self.pay(merchant, payer, "20")
+        self.pay(merchant, payer, "10")
+
+        tx.refresh_from_db()
+        TransactionStateMachine().transition(tx, TransactionStatus.REFUNDED)
+
+        stats = MerchantDailyStats.objects.get(merchant=merchant)
+        assert stats.transaction_count == 1
+        assert stats.volume == Decimal("10")
+
+    # 🧮 Paiement antérieur au rollup : pas de compteur négatif
+    def test_refund_before_backfill_clamps_at_zero(self):
+        merchant, payer = self.create_merchant()
+        tx = Transaction.objects.create(
+            type=TransactionType.MERCHANT_PAYMENT,
+            status=TransactionStatus.CONFIRMED,
+            sender=payer,
+            receiver=merchant.user,
+            amount=Decimal("20"),
+        )
+
+        TransactionStateMachine().transition(tx, TransactionStatus.REFUNDED)
+
+        for model in (MerchantDailyStats, MerchantHourlyStats):
+            stats = model.objects.get(merchant=merchant)
+            assert (stats.transaction_count, stats.volume) == (0, Decimal("0"))
+
+    # 🔁 Backfill identique à la mise à jour incrémentale
+    def test_backfill_matches_incremental(self):
+        merchant, payer = self.create_merchant()
+        self.pay(merchant, payer, "20")
+        self.pay(merchant, payer, "7")
+
+        before = list(MerchantDailyStats.objects.values("date", "transaction_count", "volume"))
+        call_command("backfill_merchant_stats")
+        after = list(MerchantDailyStats.objects.values("date", "transaction_count", "volume"))
+
+        assert before == after
+        assert after[0]["volume"] == Decimal("27")
+
+
+@pytest.mark.django_db
+class TestMerchantRevenueSeries(MerchantPaymentsMixin):
+
+    def get_series(self, user, query="", **headers):
+        request = APIRequestFactory().get(f"/api/merchants/dashboard/series/?{query}", **headers)
+        force_authenticate(request, user=user)
+        return MerchantRevenueSeriesView.as_view()(request)
+
+    # 📈 Séries en colonnes, complétées par des zéros
+    def test_daily_and_hourly_series(self):
+        merchant, payer = self.create_merchant()
+        self.pay(merchant, payer, "20")
+        self.pay(merchant, payer, "5")
+
+        today = timezone.localdate()
+        data = self.get_series(merchant.user, "interval=day").data
+
+        assert len(data["buckets"]) == 30
+        assert data["buckets"][-1] == today.isoformat()
+        assert data["count"][-1] == 2
+        assert data["volume"][-1] == "25.000000"
+        assert sum(data["count"]) == 2
+
+        data = self.get_series(merchant.user, "interval=hour").data
+        assert len(data["buckets"]) == 24
+        assert sum(data["count"]) == 2
+
+        start = (today - timedelta(days=70)).isoformat()
+        data = self.get_series(merchant.user, f"interval=month&start={start}").data
+        assert data["count"][-1] == 2
+
+    # 🏷️ ETag / 304 tant que le rollup ne change pas
+    def test_etag_revalidation(self):
+        merchant, payer = self.create_merchant()
+        self.pay(merchant, payer, "20")
+
+        first = self.get_series(merchant.user)
+        etag = first["ETag"]
+        assert first.has_header("Last-Modified")
+
+        cached = self.get_series(merchant.user, HTTP_IF_NONE_MATCH=etag)
+        assert cached.status_code == 304
+
+        self.pay(merchant, payer, "1")
+        changed = self.get_series(merchant.user, HTTP_IF_NONE_MATCH=etag)
+        assert changed.status_code == 200
+        assert changed["ETag"] != etag
+
+    # ❌ Intervalle ou plage invalide
+    def test_invalid_parameters(self):
+        merchant, _ = self.create_merchant()
+
+        assert self.get_series(merchant.user, "interval=minute").status_code == 400
+        assert self.get_series(merchant.user, "interval=hour&start=2020-01-01").status_code == 400
+        assert self.get_series(merchant.user, "start=yesterday").status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+class TestMerchantDashboardCache(MerchantPaymentsMixin):
+
+    def setup_method(self):
+        cache.clear()
+
+    def get_dashboard(self, user):
+        request = APIRequestFactory().get("/api/merchants/dashboard/")
+        force_authenticate(request, user=user)
+        return MerchantDashboardView.as_view()(request)
+
+    # ⚡ Polls servis depuis le cache (seule la requête du profil reste)
+    def test_polls_hit_cache(self, django_assert_num_queries):
+        merchant, payer = self.create_merchant()
+        self.pay(merchant, payer, "20")
+        self.get_dashboard(merchant.user)
+
+        with django_assert_num_queries(1):
+            response = self.get_dashboard(merchant.user)
+
+        assert response.data["total_revenue"] == Decimal("20")
+
+    # 🔄 Invalidation sur paiement confirmé, remboursement et alerte risque
+    def test_events_invalidate(self):
+        merchant, payer = self.create_merchant()
+        tx = self.pay(merchant, payer, "20")
+        assert self.get_dashboard(merchant.user).data["total_revenue"] == Decimal("20")
+
+        self.pay(merchant, payer, "5")
+        assert self.get_dashboard(merchant.user).data["total_revenue"] == Decimal("25")
+
+        tx.refresh_from_db()
+        TransactionStateMachine().transition(tx, TransactionStatus.REFUNDED)
+        assert self.get_dashboard(merchant.user).data["total_revenue"] == Decimal("5")
+
+        AuditLogger.log_event(action="RISK_ALERT", user=merchant.user)
+        assert len(self.get_dashboard(merchant.user).data["alerts"]) == 1
+
+    # 🚦 Single-flight : un recalcul en cours → dernier tableau servi
+    def test_single_flight_serves_last_dashboard(self, django_assert_num_queries):
+        merchant, payer = self.create_merchant()
+        dashboards = MerchantDashboardCache(merchant)
+        first = dashboards.get()
+
+        self.pay(merchant, payer, "20")
+        cache.add(f"{dashboards._key(dashboards._version())}:lock", 1)
+
+        with django_assert_num_queries(0):
+            assert dashboards.get() == first
+
+    # 🔐 Attente expirée sans tableau : recalcul sans libérer le verrou d'un autre
+    def test_waiter_does_not_release_foreign_lock(self, monkeypatch):
+        merchant, payer = self.create_merchant()
+        self.pay(merchant, payer, "20")
+        dashboards = MerchantDashboardCache(merchant)
+        monkeypatch.setattr(MerchantDashboardCache, "LOCK_WAIT", 0.1)
+
+        lock = f"{dashboards._key(dashboards._version())}:lock"
+        cache.add(lock, "owner")
+
+        assert dashboards.get()["total_revenue"] == Decimal("20")
+        assert cache.get(lock) == "owner"
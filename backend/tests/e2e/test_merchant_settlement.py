@@ -0,0 +1,125 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.merchants.models import MerchantProfile, MerchantSettlement, MerchantWallet
+from apps.merchants.settlement import SettlementEngine
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestMerchantSettlement:
+
+    def create_merchant(self, code, rate, wallet=True):
+        user = User.objects.create_user(email=f"{code.lower()}@gmail.com", role="merchant")
+        merchant = MerchantProfile.objects.create(
+            user=user,
+            business_name=code,
+            merchant_code=code,
+            commission_rate=Decimal(rate)
+        )
+        if wallet:
+            MerchantWallet.objects.create(
+                merchant=merchant,
+                network="polygon",
+                wallet_address=f"0x{code.lower()}",
+                is_default=True
+            )
+        return merchant
+
+    def pay(self, merchant, payer, amount, days_ago=1, status=TransactionStatus.CONFIRMED):
+        tx = Transaction.objects.create(
+            type=TransactionType.QR_PAYMENT,
+            status=status,
+            sender=payer,
+            receiver=merchant.user,
+            amount=Decimal(amount),
+        )
+        Transaction.objects.filter(pk=tx.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago),
+            updated_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return tx
+
+    # 💸 Regroupement par marchand, commission arrondie une seule fois
+    def test_settles_all_merchants_in_one_pass(self, django_assert_max_num_queries):
+        payer = User.objects.create_user(email="payer@gmail.com")
+        shop = self.create_merchant("SHOP", "0.20")
+        cafe = self.create_merchant("CAFE", "1.50", wallet=False)
+
+        for amount in ["10.333333", "20", "0.01"]:
+            self.pay(shop, payer, amount)
+        self.pay(cafe, payer, "99.99")
+        self.pay(shop, payer, "50", days_ago=0)                                 # période suivante
+        self.pay(shop, payer, "70", status=TransactionStatus.APPROVED)         # non confirmé
+
+        with django_assert_max_num_queries(7):
+            summary = SettlementEngine().run()
+
+        assert summary["settlements"] == 2
+        assert summary["transactions"] == 4
+        assert summary["on_hold"] == 1
+
+        shop_settlement = MerchantSettlement.objects.get(merchant=shop)
+        assert shop_settlement.gross_volume == Decimal("30.343333")
+        assert shop_settlement.commission == Decimal("0.060687")
+        assert shop_settlement.net_amount == Decimal("30.282646")
+        assert shop_settlement.payout_address == "0xshop"
+        assert shop_settlement.transactions.count() == 3
+
+        assert MerchantSettlement.objects.get(merchant=cafe).status == "on_hold"
+        assert summary["payouts"] == [{
+            "settlement_id": str(shop_settlement.id),
+            "merchant_id": str(shop.id),
+            "network": "polygon",
+            "address": "0xshop",
+            "amount": "30.282646",
+            "currency": "USDC",
+        }]
+
+    # 🔁 Une relance ne règle pas deux fois
+    def test_rerun_is_idempotent(self):
+        payer = User.objects.create_user(email="payer@gmail.com")
+        shop = self.create_merchant("SHOP", "0.20")
+        self.pay(shop, payer, "10")
+
+        assert SettlementEngine().run()["settlements"] == 1
+        assert SettlementEngine().run()["settlements"] == 0
+        assert MerchantSettlement.objects.count() == 1
+
+    # ⏱️ Paiement remboursé entre le regroupement et le lien : totaux recalculés
+    def test_totals_follow_linked_payments(self, monkeypatch):
+        payer = User.objects.create_user(email="payer@gmail.com")
+        shop = self.create_merchant("SHOP", "1.00")
+        cafe = self.create_merchant("CAFE", "1.00")
+        self.pay(shop, payer, "10")
+        refunded = self.pay(shop, payer, "40")
+        gone = self.pay(cafe, payer, "5")
+
+        settle = SettlementEngine._settlement
+
+        def refund_meanwhile(engine, batch_id, group, wallet):
+            # Remboursements validés par une autre transaction après le SELECT groupé
+            Transaction.objects.filter(pk__in=[refunded.pk, gone.pk]).update(
+                status=TransactionStatus.REFUNDED,
+                updated_at=timezone.now()
+            )
+            return settle(engine, batch_id, group, wallet)
+
+        monkeypatch.setattr(SettlementEngine, "_settlement", refund_meanwhile)
+        summary = SettlementEngine().run()
+
+        assert summary["settlements"] == 1
+        assert summary["transactions"] == 1
+
+        settlement = MerchantSettlement.objects.get()
+        assert settlement.merchant == shop
+        assert settlement.gross_volume == Decimal("10")
+        assert settlement.commission == Decimal("0.1")
+        assert settlement.net_amount == Decimal("9.9")
+        assert Transaction.objects.get(pk=refunded.pk).settlement is None
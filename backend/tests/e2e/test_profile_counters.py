@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from apps.agents.models import AgentProfile
+from apps.agents.scoring import AgentScoringEngine
+from apps.merchants.models import MerchantProfile
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+from apps.transactions.state import TransactionStateMachine
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestProfileCounters:
+
+    def create_merchant(self):
+        user = User.objects.create_user(email="shop@gmail.com", role="merchant")
+        return MerchantProfile.objects.create(
+            user=user,
+            business_name="Boutique",
+            merchant_code="SHOP001",
+            commission_rate=Decimal("1.00")
+        )
+
+    # 🔒 Instances périmées : aucune mise à jour perdue
+    def test_stale_instances_do_not_lose_updates(self):
+        merchant = self.create_merchant()
+        first = MerchantProfile.objects.get(pk=merchant.pk)
+        second = MerchantProfile.objects.get(pk=merchant.pk)
+
+        first.increase_volume(Decimal("10"))
+        second.increase_volume(Decimal("15"))
+        assert second.apply_commission(Decimal("100")) == Decimal("1")
+
+        merchant.refresh_from_db()
+        assert merchant.total_volume == Decimal("25")
+        assert merchant.total_transactions == 2
+        assert merchant.total_commission_paid == Decimal("1")
+
+    # 🔄 Transitions → compteurs marchand et agent
+    def test_state_machine_updates_counters(self):
+        merchant = self.create_merchant()
+        payer = User.objects.create_user(email="payer@gmail.com")
+        agent = AgentProfile.objects.create(
+            user=User.objects.create_user(email="agent@gmail.com")
+        )
+
+        payments = [
+            Transaction.objects.create(
+                type=TransactionType.MERCHANT_PAYMENT,
+                status=TransactionStatus.APPROVED,
+                sender=payer,
+                receiver=merchant.user,
+                agent=agent,
+                amount=Decimal(amount),
+            )
+            for amount in ["40", "60", "5"]
+        ]
+
+        payments[0].mark_confirmed("0x1", 1)
+        TransactionStateMachine().transition(payments[1].pk, TransactionStatus.CONFIRMED)
+        TransactionStateMachine().transition(payments[2].pk, TransactionStatus.FAILED)
+
+        merchant.refresh_from_db()
+        assert merchant.total_volume == Decimal("100")
+        assert merchant.total_transactions == 2
+        assert merchant.total_commission_paid == Decimal("1")
+
+        agent.refresh_from_db()
+        assert agent.total_transactions == 3
+        assert agent.successful_transactions == 2
+        assert agent.failed_transactions == 1
+        assert agent.total_volume == Decimal("100")
+
+        # Un save() partiel ne doit pas écraser les compteurs
+        stale = AgentProfile.objects.get(pk=agent.pk)
+        TransactionStateMachine().transition(payments[0].pk, TransactionStatus.DISPUTED)
+        stale.freeze()
+
+        agent.refresh_from_db()
+        assert agent.dispute_count == 1
+        assert agent.is_frozen
+
+    # ⚖️ Litige : le scoring pénalise sans recompter la dispute
+    def test_dispute_scoring_does_not_double_count(self):
+        agent = AgentProfile.objects.create(
+            user=User.objects.create_user(email="agent@gmail.com"),
+            reputation_score=60
+        )
+        tx = Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=TransactionStatus.CONFIRMED,
+            sender=User.objects.create_user(email="payer@gmail.com"),
+            receiver=User.objects.create_user(email="receiver@gmail.com"),
+            agent=agent,
+            amount=Decimal("20"),
+        )
+
+        TransactionStateMachine().transition(tx.pk, TransactionStatus.DISPUTED)
+        tx.refresh_from_db()
+        AgentScoringEngine(AgentProfile.objects.get(pk=agent.pk)).update_after_transaction(tx)
+
+        agent.refresh_from_db()
+        assert agent.dispute_count == 1
+        assert agent.reputation_score == 53
@@ -0,0 +1,189 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.merchants.models import MerchantProfile, MerchantWallet
+from apps.transactions.models import QRCode
+from apps.transactions.qr_cache import QRCodeResolver
+from apps.transactions.serializers import TransactionCreateSerializer
+from apps.ai_engine.tasks import review_transaction
+from apps.transactions.tasks import deactivate_expired_qr_codes
+from apps.transactions.views import QRCodeViewSet
+from apps.wallets.models import BlockchainNetwork, Wallet
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestQRResolutionCache:
+
+    def setup_method(self):
+        cache.clear()
+        self.resolver = QRCodeResolver()
+
+    def create_qr(self, **kwargs):
+        user = User.objects.create_user(email="shop@gmail.com", role="merchant")
+        merchant = MerchantProfile.objects.create(
+            user=user,
+            business_name="Boutique",
+            merchant_code="SHOP001"
+        )
+        MerchantWallet.objects.create(
+            merchant=merchant,
+            network="polygon",
+            wallet_address="0xshop",
+            is_default=True
+        )
+        return QRCode.objects.create(merchant=merchant, label="Caisse 1", **kwargs)
+
+    # ⚡ Deuxième scan sans requête SQL
+    def test_resolve_is_cached(self, django_assert_num_queries):
+        qr = self.create_qr(amount=Decimal("15"), is_dynamic=False)
+
+        first = self.resolver.resolve(qr.pk)
+
+        with django_assert_num_queries(0):
+            second = self.resolver.resolve(str(qr.pk))
+
+        assert first.pk == second.pk == qr.pk
+        assert second.amount == Decimal("15")
+        assert second.merchant_user_id == qr.merchant.user_id
+        assert second.is_valid()
+
+    # 🚫 Cache négatif pour les codes inconnus
+    def test_unknown_code_negative_cache(self, django_assert_num_queries):
+        unknown = uuid.uuid4()
+
+        assert self.resolver.resolve(unknown) is None
+
+        with django_assert_num_queries(0):
+            assert self.resolver.resolve(unknown) is None
+
+    # 🔄 Invalidation à la désactivation / modification
+    def test_invalidation_on_update(self):
+        qr = self.create_qr()
+        assert self.resolver.resolve(qr.pk).is_valid()
+
+        qr.deactivate()
+        assert not self.resolver.resolve(qr.pk).is_valid()
+
+        qr.is_active = True
+        qr.label = "Caisse 2"
+        qr.save()
+        assert self.resolver.resolve(qr.pk).label == "Caisse 2"
+
+    # 📲 Validation scan-to-pay : aucune requête pour le QR
+    def test_scan_to_pay_validation_uses_cache(self, django_assert_num_queries):
+        qr = self.create_qr(amount=Decimal("15"), is_dynamic=False)
+        network = BlockchainNetwork.objects.create(
+            name="POLYGON",
+            chain_id=137,
+            rpc_primary="https://polygon-rpc.com",
+            explorer_url="https://polygonscan.com"
+        )
+        payer = User.objects.create_user(email="payer@gmail.com")
+        wallet = Wallet.objects.create(
+            user=payer,
+            network=network,
+            wallet_type="USER",
+            address="0xpayer"
+        )
+        self.resolver.resolve(qr.pk)
+
+        request = APIRequestFactory().post("/api/transactions/")
+        request.user = payer
+        payload = {
+            "type": "QR_PAYMENT",
+            "receiver": qr.merchant.user_id,
+            "wallet_from": str(wallet.id),
+            "amount": "15",
+            "qr_code": str(qr.pk),
+        }
+
+        # Destinataire + portefeuille uniquement
+        with django_assert_num_queries(2):
+            serializer = TransactionCreateSerializer(
+                data=payload,
+                context={"request": request}
+            )
+            assert serializer.is_valid(), serializer.errors
+
+        other = User.objects.create_user(email="other@gmail.com")
+        serializer = TransactionCreateSerializer(
+            data={**payload, "receiver": other.id},
+            context={"request": request}
+        )
+        assert not serializer.is_valid()
+
+
+@pytest.mark.django_db
+class TestQRExpirySweeper:
+
+    def setup_method(self):
+        cache.clear()
+
+    def create_codes(self):
+        user = User.objects.create_user(email="shop@gmail.com", role="merchant")
+        merchant = MerchantProfile.objects.create(
+            user=user,
+            business_name="Boutique",
+            merchant_code="SHOP001"
+        )
+        past = timezone.now() - timedelta(minutes=5)
+        future = timezone.now() + timedelta(hours=1)
+
+        expired = [
+            QRCode.objects.create(merchant=merchant, label=f"Vente {i}", expires_at=past)
+            for i in range(5)
+        ]
+        live = QRCode.objects.create(merchant=merchant, label="Vente live", expires_at=future)
+        static = QRCode.objects.create(
+            merchant=merchant,
+            label="Comptoir",
+            is_dynamic=False,
+            expires_at=past
+        )
+        return user, expired, live, static
+
+    # 🧹 Désactivation par lots des codes dynamiques expirés
+    def test_sweeper_deactivates_in_batches(self):
+        _, expired, live, static = self.create_codes()
+        QRCodeResolver().resolve(expired[0].pk)
+
+        assert deactivate_expired_qr_codes(batch_size=2) == 5
+
+        assert not QRCode.objects.filter(pk__in=[qr.pk for qr in expired], is_active=True).exists()
+        assert QRCode.objects.get(pk=live.pk).is_active
+        assert QRCode.objects.get(pk=static.pk).is_active
+        assert not QRCodeResolver().resolve(expired[0].pk).is_active
+        assert deactivate_expired_qr_codes() == 0
+
+    # 📋 Listing filtré (codes valides par défaut) et paginé
+    def test_listing_is_filtered_and_paginated(self):
+        user, expired, live, _ = self.create_codes()
+        view = QRCodeViewSet.as_view({"get": "list"})
+
+        request = APIRequestFactory().get("/api/qr/")
+        force_authenticate(request, user=user)
+        response = view(request)
+
+        assert response.status_code == 200
+        assert [item["id"] for item in response.data["results"]] == [str(live.pk)]
+
+        request = APIRequestFactory().get("/api/qr/?status=inactive&page_size=2")
+        force_authenticate(request, user=user)
+        response = view(request)
+
+        assert len(response.data["results"]) == 2
+        assert response.data["next"] is not None
+
+    # 📮 Tâches liées à l'application Celery FubaPay (et non à l'app par défaut)
+    def test_tasks_use_fubapay_celery_app(self):
+        assert deactivate_expired_qr_codes.app.main == "fubapay"
+        assert review_transaction.app.main == "fubapay"
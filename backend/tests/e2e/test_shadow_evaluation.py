@@ -0,0 +1,235 @@
+import io
+import json
+import threading
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.agents.models import AgentProfile
+from apps.ai_engine import shadow
+from apps.ai_engine.cache import decision_cache
+from apps.ai_engine.decision import openai_breaker
+from apps.ai_engine.metrics import metrics
+from apps.ai_engine.models import ShadowEvaluation, ShadowMode
+from apps.ai_engine.breaker import CLOSED, OPEN
+from apps.ai_engine.shadow import ENGINES, ShadowEvaluator, shadow_breaker, shadow_cache
+from apps.transactions.models import RiskLevel, Transaction, TransactionStatus, TransactionType
+
+User = get_user_model()
+
+
+def blocking_engine(transaction):
+    # Candidat qui écrit en base : l'écriture doit être annulée
+    AgentProfile.objects.filter(pk=transaction.agent_id).update(reputation_score=0)
+    return {"decision": "BLOCK", "risk_score": 95}
+
+
+def broken_engine(transaction):
+    raise RuntimeError("candidate crashed")
+
+
+@pytest.mark.django_db
+class TestShadowEvaluation:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, monkeypatch):
+        settings.VELOCITY_COUNTERS_ENABLED = False
+        # LLM injoignable (connexion refusée) : repli local déterministe
+        settings.OPENAI_API_KEY = "sk-test"
+        settings.OPENAI_BASE_URL = "http://127.0.0.1:9/v1"
+        openai_breaker.reset()
+        shadow_breaker.reset()
+        decision_cache.clear()
+        shadow_cache.clear()
+        metrics.reset()
+
+        monkeypatch.setitem(ENGINES, "blocking", blocking_engine)
+        monkeypatch.setitem(ENGINES, "broken", broken_engine)
+
+        self.sender = User.objects.create_user(email="sender@gmail.com")
+        self.receiver = User.objects.create_user(email="receiver@gmail.com")
+        self.agent = AgentProfile.objects.create(
+            user=User.objects.create_user(email="agent@gmail.com"),
+            reputation_score=60,
+        )
+
+        yield
+        openai_breaker.reset()
+        shadow_breaker.reset()
+
+    def create(self, amount="20", risk_level=RiskLevel.LOW, agent=True):
+        return Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=TransactionStatus.APPROVED,
+            sender=self.sender,
+            receiver=self.receiver,
+            agent=self.agent if agent else None,
+            amount=Decimal(amount),
+            risk_level=risk_level,
+        )
+
+    # 👥 Candidats comparés à la production, sans effet de bord
+    def test_run_records_disagreement_and_latency(self):
+        transaction = self.create()
+        evaluator = ShadowEvaluator(engines=["rules", "blocking", "broken"], sample_rate=1.0)
+
+        evaluations = evaluator.run(
+            transaction,
+            {"decision": "APPROVE", "risk_score": 0},
+            production_latency=0.002
+        )
+
+        by_engine = {row.engine: row for row in ShadowEvaluation.objects.all()}
+        assert len(evaluations) == 3
+        assert by_engine["rules"].agrees is True
+        assert by_engine["blocking"].agrees is False
+        assert by_engine["blocking"].decision == "BLOCK"
+        assert by_engine["broken"].agrees is None
+        assert "candidate crashed" in by_engine["broken"].error
+
+        # Écriture du candidat annulée
+        self.agent.refresh_from_db()
+        assert self.agent.reputation_score == 60
+
+        assert metrics.get("shadow.blocking.disagree") == 1
+        assert metrics.get("shadow.broken.errors") == 1
+        assert metrics.histogram("shadow.rules.latency_ms")["count"] == 1
+        assert metrics.histogram("shadow.production.latency_ms")["p50"] == 2
+
+    # 🔒 Moteur IA en ombre : aucune écriture du profil agent
+    def test_ai_engine_does_not_write_agent_profile(self):
+        transaction = self.create()
+
+        with CaptureQueriesContext(connection) as queries:
+            evaluations = ShadowEvaluator(engines=["ai"], sample_rate=1.0).run(
+                transaction,
+                {"decision": "APPROVE", "risk_score": 0},
+                record=False
+            )
+
+        assert evaluations[0].error == ""
+        assert not [
+            query for query in queries.captured_queries
+            if query["sql"].startswith("UPDATE") and "agentprofile" in query["sql"]
+        ]
+
+        self.agent.refresh_from_db()
+        assert self.agent.reputation_score == 60
+
+    # ⚡ Échecs du LLM en ombre : disjoncteur de production intact
+    def test_ai_engine_failures_leave_production_breaker(self, monkeypatch):
+        monkeypatch.setattr(openai_breaker, "failure_threshold", 1)
+        monkeypatch.setattr(shadow_breaker, "failure_threshold", 1)
+
+        evaluator = ShadowEvaluator(engines=["ai"], sample_rate=1.0)
+        for amount in ["20", "300"]:
+            evaluator.run(self.create(amount), {"decision": "APPROVE", "risk_score": 0}, record=False)
+
+        assert shadow_breaker.state == OPEN
+        assert metrics.get("breaker.openai-shadow.rejected") == 1
+        assert openai_breaker.state == CLOSED
+        assert metrics.get("breaker.openai.rejected") == 0
+        assert shadow_cache.stats()["misses"] == 2
+        assert decision_cache.stats()["misses"] == 0
+
+    # 🎲 Désactivé par défaut : rien n'est échantillonné
+    def test_submit_disabled_without_engines(self):
+        transaction = self.create()
+
+        assert ShadowEvaluator(engines=[], sample_rate=1.0).submit(transaction, {"decision": "APPROVE"}) is False
+        assert ShadowEvaluator(engines=["rules"], sample_rate=0.0).submit(transaction, {"decision": "APPROVE"}) is False
+        assert metrics.get("shadow.sampled") == 0
+
+    # ⏪ Rejeu historique : référence = décision enregistrée
+    def test_replay_command(self):
+        self.create()
+        self.create(risk_level=RiskLevel.HIGH)
+        self.create(agent=False)
+
+        out = io.StringIO()
+        call_command(
+            "replay_shadow_engines",
+            "--engine", "rules",
+            "--engine", "ai",
+            "--workers", "1",
+            "--chunk-size", "2",
+            stdout=out
+        )
+
+        summary = json.loads(out.getvalue().rsplit("}", 1)[0] + "}")
+        assert summary["transactions"] == 3
+
+        rules = summary["engines"]["rules"]
+        assert rules["evaluated"] == 3
+        assert rules["disagree"] == 1                   # HIGH enregistré, LOW au rejeu
+        assert rules["disagreement_rate"] == round(1 / 3, 4)
+
+        ai = summary["engines"]["ai"]
+        assert ai["skipped"] == 1                       # sans agent
+        assert ai["evaluated"] == 2                     # LLM injoignable : repli local
+        assert ai["errors"] == 0
+        assert ShadowEvaluation.objects.filter(mode=ShadowMode.REPLAY, engine="rules").count() == 3
+
+
+@pytest.mark.django_db(transaction=True)
+class TestShadowLiveSampling:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, monkeypatch):
+        settings.VELOCITY_COUNTERS_ENABLED = False
+        settings.AI_SHADOW_WORKERS = 1
+        metrics.reset()
+
+        self.release = threading.Event()
+        monkeypatch.setitem(ENGINES, "blocking", blocking_engine)
+        monkeypatch.setitem(ENGINES, "waiting", self.waiting_engine)
+
+        self.transaction = Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=TransactionStatus.APPROVED,
+            sender=User.objects.create_user(email="sender@gmail.com"),
+            receiver=User.objects.create_user(email="receiver@gmail.com"),
+            amount=Decimal("20"),
+        )
+
+        ShadowEvaluator.shutdown()
+        yield
+        self.release.set()
+        ShadowEvaluator.shutdown()
+
+    def waiting_engine(self, transaction):
+        self.release.wait(5)
+        return {"decision": "APPROVE", "risk_score": 0}
+
+    # 🧵 Trafic live : évaluation dans le pool, hors du chemin de la requête
+    def test_submit_runs_in_pool(self):
+        evaluator = ShadowEvaluator(engines=["blocking"], sample_rate=1.0)
+
+        assert evaluator.submit(self.transaction, {"decision": "APPROVE", "risk_score": 0}, latency=0.01)
+        ShadowEvaluator.shutdown(wait=True)
+
+        evaluation = ShadowEvaluation.objects.get()
+        assert evaluation.mode == ShadowMode.LIVE
+        assert evaluation.decision == "BLOCK"
+        assert metrics.get("shadow.sampled") == 1
+        assert metrics.histogram("shadow.production.latency_ms")["count"] == 1
+
+    # 🚮 File pleine : échantillon abandonné, requête jamais bloquée
+    def test_submit_drops_when_queue_is_full(self, monkeypatch):
+        monkeypatch.setattr(shadow, "MAX_PENDING_PER_WORKER", 1)
+        evaluator = ShadowEvaluator(engines=["waiting"], sample_rate=1.0)
+        production = {"decision": "APPROVE", "risk_score": 0}
+
+        assert evaluator.submit(self.transaction, production) is True
+        assert evaluator.submit(self.transaction, production) is False
+        assert metrics.get("shadow.dropped") == 1
+
+        self.release.set()
+        ShadowEvaluator.shutdown(wait=True)
+
+        assert ShadowEvaluation.objects.count() == 1
+        assert metrics.get("shadow.sampled") == 1
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+from apps.transactions.views import TransactionViewSet
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestTransactionHistoryPagination:
+
+    def setup_method(self):
+        self.factory = APIRequestFactory()
+        self.view = TransactionViewSet.as_view({"get": "list"})
+
+    def create_history(self, user, other, count):
+        now = timezone.now()
+        transactions = []
+
+        for i in range(count):
+            sent = i % 2 == 0
+            transactions.append(Transaction.objects.create(
+                type=TransactionType.P2P,
+                status=TransactionStatus.APPROVED,
+                sender=user if sent else other,
+                receiver=other if sent else user,
+                amount=Decimal("10"),
+            ))
+
+        # Horodatages distincts, plus un doublon pour tester le départage par id
+        for i, tx in enumerate(transactions):
+            Transaction.objects.filter(pk=tx.pk).update(
+                created_at=now - timedelta(minutes=i // 2 * 2)
+            )
+
+        return transactions
+
+    def get_page(self, user, url):
+        request = self.factory.get(url)
+        force_authenticate(request, user=user)
+        return self.view(request)
+
+    # 📄 Parcours complet sans doublon ni trou, envoyées + reçues
+    def test_cursor_walks_full_history(self):
+        user = User.objects.create_user(email="history@gmail.com")
+        other = User.objects.create_user(email="peer@gmail.com")
+        stranger = User.objects.create_user(email="stranger@gmail.com")
+
+        self.create_history(user, other, 11)
+        self.create_history(other, stranger, 3)
+
+        seen = []
+        url = "/api/transactions/?page_size=4"
+        while url:
+            response = self.get_page(user, url)
+            assert response.status_code == 200
+            seen.extend(item["id"] for item in response.data["results"])
+            url = response.data["next"]
+
+        expected = [
+            str(pk) for pk in Transaction.objects.filter(
+                Q(sender=user) | Q(receiver=user)
+            ).order_by("-created_at", "-id").values_list("id", flat=True)
+        ]
+
+        assert len(seen) == 11
+        assert seen == expected
+
+    # ⚡ Nombre de requêtes indépendant de la taille de l'historique
+    def test_page_query_count_is_constant(self):
+        user = User.objects.create_user(email="history@gmail.com")
+        other = User.objects.create_user(email="peer@gmail.com")
+        self.create_history(user, other, 12)
+
+        with CaptureQueriesContext(connection) as small:
+            self.get_page(user, "/api/transactions/?page_size=10")
+
+        self.create_history(user, other, 60)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.get_page(user, "/api/transactions/?page_size=10")
+
+        assert len(response.data["results"]) == 10
+        assert response.data["next"] is not None
+        assert len(large.captured_queries) == len(small.captured_queries)
+
+    # ❌ Curseur invalide
+    def test_invalid_cursor(self):
+        user = User.objects.create_user(email="history@gmail.com")
+
+        response = self.get_page(user, "/api/transactions/?cursor=not-a-cursor")
+
+        assert response.status_code == 404
+
+    # 🪶 Vue compacte : mêmes valeurs que le serializer complet, moins de champs
+    def test_compact_view_matches_full_serializer(self):
+        user = User.objects.create_user(email="history@gmail.com")
+        other = User.objects.create_user(email="peer@gmail.com")
+        self.create_history(user, other, 5)
+
+        full = self.get_page(user, "/api/transactions/").data["results"]
+        compact = self.get_page(user, "/api/transactions/?view=compact").data["results"]
+
+        assert len(compact) == len(full) == 5
+        for slim, row in zip(compact, full):
+            assert "metadata" not in slim
+            assert slim == {name: row[name] for name in slim}
+
+    # 🎯 Champs à la demande
+    def test_sparse_fieldsets(self):
+        user = User.objects.create_user(email="history@gmail.com")
+        other = User.objects.create_user(email="peer@gmail.com")
+        self.create_history(user, other, 3)
+
+        response = self.get_page(user, "/api/transactions/?fields=amount,status")
+
+        assert response.status_code == 200
+        assert all(
+            list(item) == ["amount", "status"]
+            for item in response.data["results"]
+        )
+
+        response = self.get_page(user, "/api/transactions/?fields=amount,password")
+        assert response.status_code == 400
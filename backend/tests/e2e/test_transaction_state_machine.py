@@ -0,0 +1,124 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from apps.merchants.models import MerchantDailyStats, MerchantProfile
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType, UserTransactionStats
+from apps.transactions.state import TransactionStateMachine
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestTransactionStateMachine:
+
+    def create_transaction(self, status=TransactionStatus.APPROVED, suffix="1"):
+        sender = User.objects.create_user(email=f"sender{suffix}@gmail.com")
+        receiver = User.objects.create_user(email=f"receiver{suffix}@gmail.com")
+
+        return Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=status,
+            sender=sender,
+            receiver=receiver,
+            amount=Decimal("50"),
+        )
+
+    # ✅ Transition conditionnelle en une seule requête
+    def test_transition_single_update(self, django_assert_num_queries):
+        tx = self.create_transaction(TransactionStatus.AI_REVIEW)
+
+        with django_assert_num_queries(1):
+            moved = TransactionStateMachine().transition(
+                tx.pk,
+                TransactionStatus.APPROVED,
+                [TransactionStatus.AI_REVIEW]
+            )
+
+        assert moved is True
+        tx.refresh_from_db()
+        assert tx.status == TransactionStatus.APPROVED
+
+    # ❌ Statut source invalide → aucune écriture
+    def test_transition_refused_from_wrong_status(self):
+        tx = self.create_transaction(TransactionStatus.REJECTED)
+
+        moved = TransactionStateMachine().transition(
+            tx.pk,
+            TransactionStatus.APPROVED,
+            [TransactionStatus.AI_REVIEW]
+        )
+
+        assert moved is False
+        tx.refresh_from_db()
+        assert tx.status == TransactionStatus.REJECTED
+
+    # 🔒 Pas de mise à jour perdue avec une instance périmée
+    def test_stale_instance_cannot_overwrite(self):
+        tx = self.create_transaction(TransactionStatus.APPROVED)
+        stale = Transaction.objects.get(pk=tx.pk)
+
+        assert tx.mark_processing() is True
+        assert tx.mark_confirmed("0xabc", 42) is True
+
+        assert stale.mark_processing() is False
+
+        tx.refresh_from_db()
+        assert tx.status == TransactionStatus.CONFIRMED
+        assert tx.tx_hash == "0xabc"
+        assert tx.block_number == 42
+
+    # 📝 mark_confirmed n'écrit que les colonnes concernées
+    def test_mark_confirmed_keeps_other_columns(self):
+        tx = self.create_transaction(TransactionStatus.APPROVED)
+        Transaction.objects.filter(pk=tx.pk).update(ai_decision_reason="kept")
+
+        tx.mark_confirmed("0xdef", 7)
+
+        tx.refresh_from_db()
+        assert tx.ai_decision_reason == "kept"
+        assert tx.executed_at is not None
+
+    # 📦 Transitions en lot pour les workers
+    def test_bulk_transition(self):
+        approved = [
+            self.create_transaction(TransactionStatus.APPROVED, suffix=str(i))
+            for i in range(3)
+        ]
+        rejected = self.create_transaction(TransactionStatus.REJECTED, suffix="x")
+
+        moved = TransactionStateMachine().bulk_transition(
+            [tx.pk for tx in approved] + [rejected.pk],
+            TransactionStatus.PROCESSING
+        )
+
+        assert set(moved) == {tx.pk for tx in approved}
+        assert Transaction.objects.filter(
+            status=TransactionStatus.PROCESSING
+        ).count() == 3
+
+    # ⚖️ Par pk depuis plusieurs statuts sources : statut réel lu, rollups décrémentés
+    def test_pk_transition_reads_actual_source_status(self):
+        merchant = MerchantProfile.objects.create(
+            user=User.objects.create_user(email="shop@gmail.com", role="merchant"),
+            business_name="Boutique",
+            merchant_code="SHOP001"
+        )
+        tx = Transaction.objects.create(
+            type=TransactionType.MERCHANT_PAYMENT,
+            status=TransactionStatus.APPROVED,
+            sender=User.objects.create_user(email="payer@gmail.com"),
+            receiver=merchant.user,
+            amount=Decimal("50"),
+        )
+        tx.mark_confirmed("0xhash", 1)
+
+        assert TransactionStateMachine().transition(tx.pk, TransactionStatus.DISPUTED) is True
+
+        tx.refresh_from_db()
+        daily = MerchantDailyStats.objects.get(merchant=merchant)
+        sender = UserTransactionStats.objects.get(user=tx.sender)
+        assert tx.status == TransactionStatus.DISPUTED
+        assert (daily.transaction_count, daily.volume) == (0, Decimal("0"))
+        assert (sender.sent_count, sender.sent_volume) == (0, Decimal("0"))
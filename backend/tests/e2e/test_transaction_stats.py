@@ -0,0 +1,146 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.transactions.models import (
+    Transaction,
+    TransactionStatus,
+    TransactionType,
+    UserTransactionStats,
+)
+from apps.transactions.state import TransactionStateMachine
+from apps.transactions.views import TransactionViewSet
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTransactionStats:
+
+    def setup_method(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.view = TransactionViewSet.as_view({"get": "stats"})
+
+    def create_transaction(self, sender, receiver, amount, currency="USDC"):
+        return Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=TransactionStatus.APPROVED,
+            sender=sender,
+            receiver=receiver,
+            amount=Decimal(amount),
+            currency=currency,
+        )
+
+    def get_stats(self, user):
+        request = self.factory.get("/api/transactions/stats/")
+        force_authenticate(request, user=user)
+        return self.view(request)
+
+    # 📈 Mise à jour incrémentale à la confirmation
+    def test_confirmed_transitions_update_rollup(self):
+        alice = User.objects.create_user(email="alice@gmail.com")
+        bob = User.objects.create_user(email="bob@gmail.com")
+
+        first = self.create_transaction(alice, bob, "10")
+        second = self.create_transaction(alice, bob, "5", currency="EURC")
+        third = self.create_transaction(bob, alice, "2.5")
+
+        assert self.get_stats(alice).data["total_sent"] == 0
+
+        first.mark_confirmed("0x1", 1)
+        second.mark_confirmed("0x2", 2)
+        TransactionStateMachine().transition(third.pk, TransactionStatus.CONFIRMED)
+
+        stats = self.get_stats(alice).data
+        assert stats["total_sent"] == 2
+        assert stats["total_received"] == 1
+        assert stats["by_currency"] == [
+            {
+                "currency": "EURC",
+                "sent_count": 1,
+                "sent_volume": "5.000000",
+                "received_count": 0,
+                "received_volume": "0.000000",
+            },
+            {
+                "currency": "USDC",
+                "sent_count": 1,
+                "sent_volume": "10.000000",
+                "received_count": 1,
+                "received_volume": "2.500000",
+            },
+        ]
+
+        # Sortie de CONFIRMED → décrément
+        TransactionStateMachine().transition(first, TransactionStatus.REFUNDED)
+        assert self.get_stats(alice).data["total_sent"] == 1
+
+    # ⚡ Endpoint servi depuis le cache
+    def test_stats_served_from_cache(self, django_assert_num_queries):
+        alice = User.objects.create_user(email="alice@gmail.com")
+        bob = User.objects.create_user(email="bob@gmail.com")
+        self.create_transaction(alice, bob, "10").mark_confirmed("0x1", 1)
+
+        self.get_stats(alice)
+
+        with django_assert_num_queries(0):
+            response = self.get_stats(alice)
+
+        assert response.data["total_sent"] == 1
+
+    # 🔁 Reconstruction par commande
+    def test_rebuild_command(self):
+        alice = User.objects.create_user(email="alice@gmail.com")
+        bob = User.objects.create_user(email="bob@gmail.com")
+
+        for _ in range(3):
+            Transaction.objects.create(
+                type=TransactionType.P2P,
+                status=TransactionStatus.CONFIRMED,
+                sender=alice,
+                receiver=bob,
+                amount=Decimal("4"),
+            )
+
+        assert not UserTransactionStats.objects.exists()
+
+        call_command("rebuild_transaction_stats")
+
+        stats = self.get_stats(bob).data
+        assert stats["total_received"] == 3
+        assert stats["by_currency"][0]["received_volume"] == "12.000000"
+
+        # Lignes existantes corrigées sur place (mêmes pk)
+        row = UserTransactionStats.objects.get(user=bob)
+        UserTransactionStats.objects.filter(pk=row.pk).update(received_count=99)
+
+        call_command("rebuild_transaction_stats")
+
+        rebuilt = UserTransactionStats.objects.get(user=bob)
+        assert (rebuilt.pk, rebuilt.received_count) == (row.pk, 3)
+
+    # 🧱 Remboursement d'une transaction antérieure au rollup → pas de compteur négatif
+    def test_refund_before_backfill_clamps_at_zero(self):
+        alice = User.objects.create_user(email="alice@gmail.com")
+        bob = User.objects.create_user(email="bob@gmail.com")
+
+        legacy = Transaction.objects.create(
+            type=TransactionType.P2P,
+            status=TransactionStatus.CONFIRMED,
+            sender=alice,
+            receiver=bob,
+            amount=Decimal("7"),
+        )
+
+        TransactionStateMachine().transition(legacy, TransactionStatus.REFUNDED)
+
+        legacy.refresh_from_db()
+        assert legacy.status == TransactionStatus.REFUNDED
+
+        row = UserTransactionStats.objects.get(user=alice)
+        assert (row.sent_count, row.sent_volume) == (0, Decimal("0"))
@@ -0,0 +1,80 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from apps.agents.models import AgentProfile
+from apps.agents.scoring import AgentScoringEngine
+from apps.transactions.models import Transaction, TransactionStatus, TransactionType
+
+User = get_user_model()
+
+
+@pytest.mark.django_db
+class TestTransactionWindowedAggregates:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings):
+        settings.VELOCITY_COUNTERS_ENABLED = False
+        settings.AGENT_FEATURES_TTL = 0
+
+        self.sender = User.objects.create_user(email="sender@gmail.com")
+        self.agent = AgentProfile.objects.create(
+            user=User.objects.create_user(email="agent@gmail.com"),
+            reputation_score=60,
+        )
+
+    def create(self, status, amount, hours_ago=0, agent=True):
+        tx = Transaction.objects.create(
+            type=TransactionType.AGENT_EXCHANGE,
+            status=status,
+            sender=self.sender,
+            receiver=self.agent.user,
+            agent=self.agent if agent else None,
+            amount=Decimal(amount),
+        )
+        if hours_ago:
+            Transaction.objects.filter(pk=tx.pk).update(
+                created_at=timezone.now() - timedelta(hours=hours_ago)
+            )
+
+    # 📊 Somme, comptage et répartition par statut en un aller-retour SQL
+    def test_windowed_breakdown_in_one_query(self, django_assert_num_queries):
+        self.create(TransactionStatus.CONFIRMED, "100")
+        self.create(TransactionStatus.PROCESSING, "40", hours_ago=2)
+        self.create(TransactionStatus.FAILED, "30", hours_ago=2)
+        self.create(TransactionStatus.CONFIRMED, "500", hours_ago=48)
+        self.create(TransactionStatus.CONFIRMED, "999", agent=False)
+
+        now = timezone.now()
+
+        with django_assert_num_queries(1):
+            rows = Transaction.objects.for_agent(self.agent.pk).windowed(
+                {"1h": now - timedelta(hours=1), "7d": now - timedelta(days=7)},
+                statuses=[TransactionStatus.CONFIRMED, TransactionStatus.FAILED],
+            )
+
+        assert rows["1h"]["count"] == 1
+        assert rows["1h"]["volume"] == Decimal("100")
+        assert rows["7d"]["count"] == 4
+        assert rows["7d"]["volume"] == Decimal("640")            # CONFIRMED + PROCESSING
+        assert rows["7d"]["statuses"][TransactionStatus.CONFIRMED] == {
+            "count": 2, "volume": Decimal("600")
+        }
+        assert rows["7d"]["statuses"][TransactionStatus.FAILED] == {
+            "count": 1, "volume": Decimal("30")
+        }
+
+    # 🧮 Contrôle journalier sans charger les transactions
+    def test_daily_behavior_check_uses_aggregates(self, django_assert_max_num_queries):
+        for _ in range(5):
+            self.create(TransactionStatus.FAILED, "10")
+        self.create(TransactionStatus.CONFIRMED, "1200")
+
+        with django_assert_max_num_queries(4):          # agrégat + écritures du score
+            AgentScoringEngine(self.agent).daily_behavior_check()
+
+        self.agent.refresh_from_db()
+        assert self.agent.reputation_score == 50       # -5 volume, -5 échecs